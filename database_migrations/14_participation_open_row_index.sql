@@ -0,0 +1,43 @@
+-- =====================================================
+-- ONE OPEN PARTICIPATION ROW PER USER PER EVENT
+-- Date: October 2026
+-- Purpose: Enforce at most one active (left_at IS NULL) participation row
+--          per (event_id, user_id) so batched journal flushes can use
+--          INSERT ... ON CONFLICT DO NOTHING and stay idempotent on replay
+-- =====================================================
+
+BEGIN;
+
+-- Close duplicate open rows left behind by earlier races, keeping the newest
+UPDATE participation p
+SET left_at = p.joined_at,
+    duration_minutes = 0,
+    updated_at = NOW()
+FROM (
+    SELECT id,
+           ROW_NUMBER() OVER (PARTITION BY event_id, user_id ORDER BY joined_at DESC, id DESC) AS rn
+    FROM participation
+    WHERE left_at IS NULL
+) dupes
+WHERE p.id = dupes.id
+AND dupes.rn > 1;
+
+-- Partial unique index: only active rows participate
+CREATE UNIQUE INDEX IF NOT EXISTS idx_participation_open_unique
+    ON participation(event_id, user_id)
+    WHERE left_at IS NULL;
+
+-- Record this migration as successful
+INSERT INTO schema_migrations (migration_name, success, applied_at)
+VALUES ('14_participation_open_row_index.sql', TRUE, CURRENT_TIMESTAMP)
+ON CONFLICT (migration_name) DO NOTHING;
+
+COMMIT;
+
+-- =====================================================
+-- MIGRATION COMPLETE
+-- =====================================================
+--
+-- Active participation lookups by (event_id, user_id) now hit a
+-- small partial index, and duplicate open rows are rejected.
+-- =====================================================
@@ -0,0 +1,38 @@
+-- =====================================================
+-- IDEMPOTENT PAYROLL PERSISTENCE
+-- Date: October 2026
+-- Purpose: Key payouts on (payroll_id, user_id) so a payroll can be
+--          re-stored (e.g. after a Discord interaction timeout) as a single
+--          bulk upsert without duplicating rows
+-- =====================================================
+
+BEGIN;
+
+-- Remove duplicate payouts from earlier retries, keeping the newest row
+DELETE FROM payouts p
+USING (
+    SELECT id,
+           ROW_NUMBER() OVER (PARTITION BY payroll_id, user_id ORDER BY created_at DESC, id DESC) AS rn
+    FROM payouts
+) dupes
+WHERE p.id = dupes.id
+AND dupes.rn > 1;
+
+-- One payout per user per payroll
+CREATE UNIQUE INDEX IF NOT EXISTS idx_payouts_payroll_user
+    ON payouts(payroll_id, user_id);
+
+-- Record this migration as successful
+INSERT INTO schema_migrations (migration_name, success, applied_at)
+VALUES ('15_payout_idempotency.sql', TRUE, CURRENT_TIMESTAMP)
+ON CONFLICT (migration_name) DO NOTHING;
+
+COMMIT;
+
+-- =====================================================
+-- MIGRATION COMPLETE
+-- =====================================================
+--
+-- payrolls.payroll_id (already UNIQUE) and payouts(payroll_id, user_id)
+-- together make _store_payroll an idempotent upsert.
+-- =====================================================
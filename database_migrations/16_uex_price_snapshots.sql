@@ -0,0 +1,58 @@
+-- =====================================================
+-- VERSIONED UEX PRICE SNAPSHOTS
+-- Date: October 2026
+-- Purpose: Group every price refresh under one snapshot ID so historical
+--          prices stay addressable and "prices at time T" is an indexed
+--          lookup instead of a scan over accumulated uex_prices rows
+-- =====================================================
+
+BEGIN;
+
+-- One row per price refresh (append-only)
+CREATE TABLE IF NOT EXISTS uex_price_snapshots (
+    snapshot_id BIGSERIAL PRIMARY KEY,
+    item_category TEXT NOT NULL DEFAULT 'ore',
+    fetched_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    item_count INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT 'uex_api'       -- 'uex_api', 'backfill'
+);
+
+-- Point-in-time lookup: latest snapshot at or before a timestamp
+CREATE INDEX IF NOT EXISTS idx_uex_price_snapshots_lookup
+    ON uex_price_snapshots(item_category, fetched_at DESC);
+
+ALTER TABLE uex_prices
+    ADD COLUMN IF NOT EXISTS snapshot_id BIGINT REFERENCES uex_price_snapshots(snapshot_id);
+
+CREATE INDEX IF NOT EXISTS idx_uex_prices_snapshot ON uex_prices(snapshot_id);
+
+-- Backfill: each historical refresh (category + fetched_at) becomes a snapshot
+INSERT INTO uex_price_snapshots (item_category, fetched_at, item_count, source)
+SELECT item_category, fetched_at, COUNT(*), 'backfill'
+FROM uex_prices
+WHERE snapshot_id IS NULL
+AND fetched_at IS NOT NULL
+GROUP BY item_category, fetched_at;
+
+UPDATE uex_prices p
+SET snapshot_id = s.snapshot_id
+FROM uex_price_snapshots s
+WHERE p.snapshot_id IS NULL
+AND s.source = 'backfill'
+AND s.item_category = p.item_category
+AND s.fetched_at = p.fetched_at;
+
+-- Record this migration as successful
+INSERT INTO schema_migrations (migration_name, success, applied_at)
+VALUES ('16_uex_price_snapshots.sql', TRUE, CURRENT_TIMESTAMP)
+ON CONFLICT (migration_name) DO NOTHING;
+
+COMMIT;
+
+-- =====================================================
+-- MIGRATION COMPLETE
+-- =====================================================
+--
+-- uex_prices rows are written once per snapshot and never rewritten;
+-- is_current is still maintained for readers that rely on it.
+-- =====================================================
@@ -0,0 +1,35 @@
+-- =====================================================
+-- UEX PRICE SNAPSHOT CONTENT HASH
+-- Date: October 2026
+-- Purpose: Skip appending a snapshot when a refresh returns the same prices
+--          as the latest one, and record when that content was last confirmed
+-- =====================================================
+
+BEGIN;
+
+-- Hash of the snapshot's prices; equal hashes mean identical content
+ALTER TABLE uex_price_snapshots
+    ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Last refresh that returned this snapshot's content (warm start freshness)
+ALTER TABLE uex_price_snapshots
+    ADD COLUMN IF NOT EXISTS checked_at TIMESTAMP;
+
+UPDATE uex_price_snapshots
+SET checked_at = fetched_at
+WHERE checked_at IS NULL;
+
+-- Record this migration as successful
+INSERT INTO schema_migrations (migration_name, success, applied_at)
+VALUES ('17_uex_snapshot_content_hash.sql', TRUE, CURRENT_TIMESTAMP)
+ON CONFLICT (migration_name) DO NOTHING;
+
+COMMIT;
+
+-- =====================================================
+-- MIGRATION COMPLETE
+-- =====================================================
+--
+-- Backfilled snapshots keep a NULL content_hash, so the first refresh after
+-- this migration always appends a new snapshot.
+-- =====================================================
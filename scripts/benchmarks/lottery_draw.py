@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: weighted lottery drawing.
+
+Draws k winners without replacement from N synthetic entrants with the
+Fenwick-tree engine and with a naive approach that rebuilds the cumulative
+ticket list after each winner, then reports timings and checks that the
+seeded drawing is reproducible. draw_winners_ms is end to end, including
+the O(n) audit digest of the entry list (also reported on its own).
+
+Usage:
+    python scripts/benchmarks/lottery_draw.py [--entrants 50000] [--winners 25] [--runs 5]
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add src to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from modules.lottery.drawing import TicketTree, draw_winners, entries_digest
+
+def naive_draw(tickets, winner_count, rng):
+    """Rebuild the prefix list after every winner: O(k n)."""
+    remaining = list(tickets)
+    winners = []
+    while len(winners) < winner_count:
+        prefix = list(itertools.accumulate(remaining))
+        if not prefix or prefix[-1] == 0:
+            break
+        index = bisect.bisect_right(prefix, rng.randrange(prefix[-1]))
+        winners.append(index)
+        remaining[index] = 0
+    return winners
+
+def fenwick_draw(tickets, winner_count, rng):
+    """Tree build plus k O(log n) draws, without the audit digest."""
+    tree = TicketTree(tickets)
+    remaining = tree.total
+    winners = []
+    while remaining > 0 and len(winners) < winner_count:
+        index = tree.find(rng.randrange(remaining))
+        winners.append(index)
+        remaining -= tree.remove(index)
+    return winners
+
+def time_runs(fn, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, round(statistics.median(samples), 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entrants', type=int, default=50000)
+    parser.add_argument('--winners', type=int, default=25)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    user_ids = sorted(rng.sample(range(10 ** 17, 10 ** 18), args.entrants))
+    tickets = [rng.randint(1, 8) for _ in range(args.entrants)]
+
+    result, draw_winners_ms = time_runs(
+        lambda: draw_winners('lot-bench', user_ids, tickets, args.winners, seed='bench'), args.runs
+    )
+    _, digest_ms = time_runs(lambda: entries_digest(user_ids, tickets), args.runs)
+    _, fenwick_ms = time_runs(lambda: fenwick_draw(tickets, args.winners, random.Random(1)), args.runs)
+    _, naive_ms = time_runs(lambda: naive_draw(tickets, args.winners, random.Random(1)), args.runs)
+    replay = draw_winners('lot-bench', user_ids, tickets, args.winners, seed='bench')
+
+    print(json.dumps({
+        'entrants': args.entrants,
+        'winners': args.winners,
+        'total_tickets': result.total_tickets,
+        'draw_winners_ms': draw_winners_ms,
+        'audit_digest_ms': digest_ms,
+        'fenwick_ms': fenwick_ms,
+        'naive_ms': naive_ms,
+        'distinct_winners': len(set(result.winners)) == len(result.winners),
+        'reproducible': replay.winners == result.winners,
+    }, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
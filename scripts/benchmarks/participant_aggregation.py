@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark: participant aggregation for payroll.
+
+Compares the legacy get_event_participants path (COUNT(*) + LIMIT 3 sample +
+aggregate with the duration expression repeated in SUM and HAVING) against
+the single CTE query in PARTICIPANT_TOTALS_SQL, on synthetic events of
+10k participation rows.
+
+Runs against DATABASE_URL using a session-local TEMP participation table,
+so no real data is read or written.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/benchmarks/participant_aggregation.py \\
+        [--rows 10000] [--events 4] [--iterations 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add src to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import asyncpg
+
+from database.connection import _to_asyncpg_sql
+from modules.payroll.core import PARTICIPANT_TOTALS_SQL
+
+LEGACY_DURATION = """
+    COALESCE(
+        duration_minutes,
+        CASE
+            WHEN left_at IS NOT NULL AND joined_at IS NOT NULL THEN
+                EXTRACT(EPOCH FROM (left_at - joined_at))/60
+            WHEN joined_at IS NOT NULL THEN
+                EXTRACT(EPOCH FROM (NOW() - joined_at))/60
+            ELSE 0
+        END
+    )
+"""
+
+LEGACY_QUERIES = [
+    "SELECT COUNT(*) as total_records FROM participation WHERE event_id = $1",
+    """
+    SELECT user_id, username, duration_minutes, joined_at, left_at
+    FROM participation WHERE event_id = $1 LIMIT 3
+    """,
+    f"""
+    SELECT
+        user_id, username, display_name,
+        SUM({LEGACY_DURATION}) as total_minutes,
+        COUNT(*) as session_count,
+        BOOL_OR(is_org_member) as is_org_member,
+        MIN(joined_at) as first_joined,
+        MAX(COALESCE(left_at, joined_at)) as last_active
+    FROM participation
+    WHERE event_id = $1
+    GROUP BY user_id, username, display_name
+    HAVING SUM({LEGACY_DURATION}) > 0
+    ORDER BY total_minutes DESC
+    """,
+]
+
+async def seed(conn, event_ids, rows_per_event):
+    """Create and fill a TEMP participation table shadowing the real one."""
+    await conn.execute("""
+        CREATE TEMP TABLE participation (
+            id SERIAL PRIMARY KEY,
+            event_id TEXT NOT NULL,
+            user_id BIGINT NOT NULL,
+            username TEXT NOT NULL,
+            display_name TEXT,
+            channel_id BIGINT,
+            joined_at TIMESTAMP,
+            left_at TIMESTAMP,
+            duration_minutes INTEGER,
+            is_org_member BOOLEAN DEFAULT FALSE
+        )
+    """)
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(hours=4)
+    records = []
+    for event_id in event_ids:
+        for _ in range(rows_per_event):
+            user_id = rng.randint(1, rows_per_event // 20 or 1)
+            joined = start + timedelta(seconds=rng.randint(0, 3 * 3600))
+            closed = rng.random() < 0.9
+            left = joined + timedelta(seconds=rng.randint(60, 3600)) if closed else None
+            duration = int((left - joined).total_seconds() // 60) if closed and rng.random() < 0.5 else None
+            records.append((
+                event_id, user_id, f"user{user_id}", f"User {user_id}",
+                rng.randint(1, 6), joined, left, duration, rng.random() < 0.7
+            ))
+    await conn.copy_records_to_table(
+        'participation',
+        records=records,
+        columns=['event_id', 'user_id', 'username', 'display_name', 'channel_id',
+                 'joined_at', 'left_at', 'duration_minutes', 'is_org_member']
+    )
+    await conn.execute("CREATE INDEX ON participation(event_id)")
+    await conn.execute("ANALYZE participation")
+
+async def time_it(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': round(statistics.mean(samples), 3),
+        'p50_ms': round(samples[len(samples) // 2], 3),
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+async def explain(conn, query, *args):
+    plan = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}", *args)
+    plan = json.loads(plan)[0] if isinstance(plan, str) else plan[0]
+    return plan['Planning Time'], plan['Execution Time']
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='participation rows per event')
+    parser.add_argument('--events', type=int, default=4, help='events in the batch comparison')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ DATABASE_URL is required")
+        return 1
+
+    event_ids = [f"sm-bench{i:02d}" for i in range(args.events)]
+    new_sql = _to_asyncpg_sql(PARTICIPANT_TOTALS_SQL)
+
+    conn = await asyncpg.connect(database_url)
+    try:
+        print(f"🌱 Seeding {args.rows} rows x {args.events} events...")
+        await seed(conn, event_ids, args.rows)
+
+        async def legacy_single():
+            for query in LEGACY_QUERIES:
+                await conn.fetch(query, event_ids[0])
+
+        async def cte_single():
+            await conn.fetch(new_sql, [event_ids[0]])
+
+        async def legacy_batch():
+            for event_id in event_ids:
+                for query in LEGACY_QUERIES:
+                    await conn.fetch(query, event_id)
+
+        async def cte_batch():
+            await conn.fetch(new_sql, event_ids)
+
+        legacy_plan = [await explain(conn, query, event_ids[0]) for query in LEGACY_QUERIES]
+        cte_plan = await explain(conn, new_sql, [event_ids[0]])
+
+        results = {
+            'rows_per_event': args.rows,
+            'events': args.events,
+            'single_event': {
+                'legacy': {**await time_it(legacy_single, args.iterations), 'round_trips': len(LEGACY_QUERIES)},
+                'cte': {**await time_it(cte_single, args.iterations), 'round_trips': 1},
+            },
+            'batch': {
+                'legacy': {**await time_it(legacy_batch, args.iterations), 'round_trips': len(LEGACY_QUERIES) * args.events},
+                'cte': {**await time_it(cte_batch, args.iterations), 'round_trips': 1},
+            },
+            'planner': {
+                'legacy_planning_ms': round(sum(p for p, _ in legacy_plan), 3),
+                'legacy_execution_ms': round(sum(e for _, e in legacy_plan), 3),
+                'cte_planning_ms': round(cte_plan[0], 3),
+                'cte_execution_ms': round(cte_plan[1], 3),
+            },
+        }
+        print(json.dumps(results, indent=2))
+        return 0
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
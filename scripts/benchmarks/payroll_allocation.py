@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: payroll allocation what-if simulations.
+
+Allocates a payroll across N synthetic participants with the integer
+largest-remainder engine and with the legacy per-participant Decimal loop, then reports timings and
+how far each result drifts from the exact total.
+
+Usage:
+    python scripts/benchmarks/payroll_allocation.py [--participants 100000] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+# Add src to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from modules.payroll.allocation import participation_weights, allocate_payroll, to_centi
+
+def legacy_allocate(total, minutes, donation_percentage):
+    """The Decimal loop calculate_payroll used before the allocation engine."""
+    total_minutes = sum(minutes)
+    finals = []
+    for m in minutes:
+        base = total * Decimal(m) / Decimal(total_minutes)
+        final = base - base * Decimal(donation_percentage) / Decimal('100')
+        finals.append(final.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+    return finals
+
+def time_runs(fn, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, round(statistics.median(samples), 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--total', default='987654321.09', help='payroll total in aUEC')
+    parser.add_argument('--donation', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    minutes = [Decimal(rng.randint(1, 24000)) / 100 for _ in range(args.participants)]
+    multipliers = [rng.choice([1, 1, 1, 1.25, 1.5]) for _ in range(args.participants)]
+    total = Decimal(args.total)
+    total_centi = to_centi(total)
+
+    weights, weights_ms = time_runs(lambda: participation_weights(minutes, multipliers, cap_minutes=180), 1)
+    results = {
+        'participants': args.participants,
+        'weights_ms': weights_ms,
+    }
+
+    alloc, elapsed = time_runs(lambda: allocate_payroll(total_centi, weights, args.donation), args.runs)
+    results['int_ms'] = elapsed
+    results['int_drift_centi'] = total_centi - sum(alloc.final_centi) - alloc.retained_centi
+
+    plain_weights = participation_weights(minutes)
+    finals, legacy_ms = time_runs(lambda: legacy_allocate(total, minutes, 0), 1)
+    results['legacy_ms'] = legacy_ms
+    results['legacy_drift_centi'] = total_centi - to_centi(sum(finals))
+    results['engine_vs_legacy_max_diff_centi'] = max(
+        abs(new - to_centi(old))
+        for new, old in zip(allocate_payroll(total_centi, plain_weights).final_centi, finals)
+    )
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Benchmark: named statement registry vs ad hoc SQL.
+
+For every read statement in database.statements, compares:
+
+- ad hoc: a connection with asyncpg's statement cache disabled, so each
+  call is parsed and planned again (what re-sent, uncached SQL costs)
+- registry: a normal pooled-style connection where the statement is
+  prepared once and reused
+
+The planner's 'Planning Time' per statement shows the planning cost each
+cached call can skip. A second section replays journal flushes of varying
+batch sizes through the old multi-row VALUES form (one distinct statement
+text per batch size) and the UNNEST registry statements (one text).
+
+Runs against DATABASE_URL using session-local TEMP events/participation
+tables, so no real data is read or written. The distinct-text count runs
+offline without a database (--offline).
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/benchmarks/prepared_statements.py \\
+        [--rows 5000] [--iterations 200] [--batches 200]
+    python scripts/benchmarks/prepared_statements.py --offline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add src to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from database.connection import _returns_rows, _to_asyncpg_sql
+from database.statements import (
+    CLOSE_PARTICIPATION_BATCH, INSERT_PARTICIPATION_BATCH, registered_statements
+)
+import modules.mining.concurrency   # noqa: F401 - registers events.* sweep statements
+import modules.payroll.core         # noqa: F401 - registers payroll.participant_totals
+
+EVENT_ID = 'sm-bench00'
+GUILD_ID = 814699481912049704
+ASYNCPG_DEFAULT_CACHE_SIZE = 100
+
+# Parameters for each read statement
+READ_PARAMS = {
+    'participation.count': (EVENT_ID,),
+    'participation.stats': (EVENT_ID,),
+    'participation.intervals': (EVENT_ID,),
+    'events.by_id': (EVENT_ID,),
+    'events.times': (EVENT_ID,),
+    'events.active_mining': (GUILD_ID,),
+    'events.max_concurrent': (EVENT_ID, EVENT_ID),
+    'payroll.participant_totals': ([EVENT_ID],),
+}
+
+def legacy_insert_sql(batch_size):
+    """The journal's old multi-row INSERT text for a given batch size."""
+    values_sql = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'] * batch_size)
+    return _to_asyncpg_sql(f"""
+        INSERT INTO participation (
+            event_id, user_id, username, display_name,
+            channel_id, channel_name, joined_at, left_at,
+            duration_minutes, is_org_member
+        ) VALUES {values_sql}
+        ON CONFLICT (event_id, user_id) WHERE left_at IS NULL DO NOTHING
+    """)
+
+def legacy_leave_sql(batch_size):
+    values_sql = ', '.join(['(%s::text, %s::bigint, %s::timestamp)'] * batch_size)
+    return _to_asyncpg_sql(f"""
+        UPDATE participation p
+        SET left_at = v.left_at,
+            duration_minutes = EXTRACT(EPOCH FROM (v.left_at - p.joined_at))/60,
+            updated_at = v.left_at
+        FROM (VALUES {values_sql}) AS v(event_id, user_id, left_at)
+        WHERE p.event_id = v.event_id
+        AND p.user_id = v.user_id
+        AND p.left_at IS NULL
+    """)
+
+def batch_sizes(count, max_batch, rng):
+    """Journal flush sizes: mostly small timer flushes, occasional bursts."""
+    return [min(max_batch, max(1, int(rng.expovariate(1 / 12)))) for _ in range(count)]
+
+def distinct_texts(sizes):
+    return {
+        'flushes': len(sizes),
+        'legacy_distinct_texts': len({legacy_insert_sql(n) for n in sizes}) + len({legacy_leave_sql(n) for n in sizes}),
+        'registry_distinct_texts': 2,
+        'asyncpg_cache_size': ASYNCPG_DEFAULT_CACHE_SIZE,
+    }
+
+async def seed(conn, rows):
+    """TEMP events/participation tables shadowing the real ones."""
+    await conn.execute("""
+        CREATE TEMP TABLE events (
+            event_id TEXT PRIMARY KEY,
+            guild_id BIGINT,
+            event_type TEXT,
+            event_name TEXT,
+            organizer_id BIGINT,
+            organizer_name TEXT,
+            started_at TIMESTAMP,
+            ended_at TIMESTAMP,
+            status TEXT,
+            total_participants INTEGER,
+            total_duration_minutes INTEGER,
+            max_concurrent INTEGER,
+            updated_at TIMESTAMP
+        )
+    """)
+    await conn.execute("""
+        CREATE TEMP TABLE participation (
+            id SERIAL PRIMARY KEY,
+            event_id TEXT NOT NULL,
+            user_id BIGINT NOT NULL,
+            username TEXT NOT NULL,
+            display_name TEXT,
+            channel_id BIGINT,
+            channel_name TEXT,
+            joined_at TIMESTAMP NOT NULL,
+            left_at TIMESTAMP,
+            duration_minutes INTEGER,
+            is_org_member BOOLEAN DEFAULT FALSE,
+            updated_at TIMESTAMP
+        )
+    """)
+    start = datetime.now() - timedelta(hours=4)
+    await conn.executemany(
+        "INSERT INTO events (event_id, guild_id, event_type, event_name, started_at, status) VALUES ($1, $2, 'mining', 'Bench', $3, $4)",
+        [(f"sm-bench{i:02d}", GUILD_ID, start + timedelta(minutes=i), 'open' if i == 0 else 'closed') for i in range(20)]
+    )
+    rng = random.Random(42)
+    records = []
+    for _ in range(rows):
+        user_id = rng.randint(1, max(1, rows // 20))
+        joined = start + timedelta(seconds=rng.randint(0, 3 * 3600))
+        left = joined + timedelta(seconds=rng.randint(60, 3600)) if rng.random() < 0.9 else None
+        records.append((
+            EVENT_ID, user_id, f"user{user_id}", f"User {user_id}", rng.randint(1, 6), f"vc-{user_id % 6}",
+            joined, left, int((left - joined).total_seconds() // 60) if left else None, rng.random() < 0.7
+        ))
+    await conn.copy_records_to_table(
+        'participation', records=records,
+        columns=['event_id', 'user_id', 'username', 'display_name', 'channel_id', 'channel_name',
+                 'joined_at', 'left_at', 'duration_minutes', 'is_org_member']
+    )
+    await conn.execute("CREATE INDEX ON participation(event_id)")
+    await conn.execute("CREATE UNIQUE INDEX ON participation(event_id, user_id) WHERE left_at IS NULL")
+    await conn.execute("ANALYZE events")
+    await conn.execute("ANALYZE participation")
+
+async def time_calls(conn, sql, args, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await conn.fetch(sql, *args)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': round(statistics.mean(samples), 4),
+        'p50_ms': round(samples[len(samples) // 2], 4),
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 4),
+    }
+
+async def planning_ms(conn, sql, args):
+    plan = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", *args)
+    plan = json.loads(plan)[0] if isinstance(plan, str) else plan[0]
+    return round(plan['Planning Time'], 4)
+
+async def bench_reads(adhoc, cached, iterations):
+    results = {}
+    for statement in registered_statements():
+        args = READ_PARAMS.get(statement.name)
+        if args is None or not _returns_rows(statement):
+            continue
+        sql = _to_asyncpg_sql(statement)
+        adhoc_timing = await time_calls(adhoc, sql, args, iterations)
+        cached_timing = await time_calls(cached, sql, args, iterations)
+        results[statement.name] = {
+            'planning_ms': await planning_ms(cached, sql, args),
+            'adhoc': adhoc_timing,
+            'registry': cached_timing,
+            'saved_per_call_ms': round(adhoc_timing['mean_ms'] - cached_timing['mean_ms'], 4),
+        }
+    return results
+
+async def bench_journal(conn, sizes):
+    """Replay journal flushes both ways inside a transaction that is rolled back."""
+    now = datetime.now()
+    results = {}
+    for label in ('legacy_values', 'registry_unnest'):
+        transaction = conn.transaction()
+        await transaction.start()
+        try:
+            started = time.perf_counter()
+            next_user = 10_000_000
+            for size in sizes:
+                rows = []
+                for _ in range(size):
+                    next_user += 1
+                    rows.append((EVENT_ID, next_user, f"u{next_user}", None, 1, 'vc-1', now, None, None, True))
+                leaves = [(EVENT_ID, row[1], now) for row in rows]
+                if label == 'legacy_values':
+                    await conn.execute(legacy_insert_sql(size), *[value for row in rows for value in row])
+                    await conn.execute(legacy_leave_sql(size), *[value for leave in leaves for value in leave])
+                else:
+                    await conn.execute(_to_asyncpg_sql(INSERT_PARTICIPATION_BATCH), *[list(column) for column in zip(*rows)])
+                    await conn.execute(_to_asyncpg_sql(CLOSE_PARTICIPATION_BATCH), *[list(column) for column in zip(*leaves)])
+            elapsed = time.perf_counter() - started
+        finally:
+            await transaction.rollback()
+        results[label] = {
+            'total_s': round(elapsed, 4),
+            'mean_flush_ms': round(elapsed / len(sizes) * 1000, 4),
+        }
+    return results
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000, help='participation rows in the benchmark event')
+    parser.add_argument('--iterations', type=int, default=200, help='calls per read statement and mode')
+    parser.add_argument('--batches', type=int, default=200, help='journal flushes to replay')
+    parser.add_argument('--max-batch', type=int, default=500, help='journal max batch size')
+    parser.add_argument('--offline', action='store_true', help='only count distinct statement texts')
+    args = parser.parse_args()
+
+    sizes = batch_sizes(args.batches, args.max_batch, random.Random(17))
+    results = {'journal_statement_texts': distinct_texts(sizes)}
+    if args.offline:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ DATABASE_URL is required (or use --offline)")
+        return 1
+
+    import asyncpg
+
+    cached = await asyncpg.connect(database_url)
+    adhoc = await asyncpg.connect(database_url, statement_cache_size=0)
+    try:
+        print(f"🌱 Seeding {args.rows} participation rows...")
+        for conn in (cached, adhoc):   # TEMP tables are per session
+            await seed(conn, args.rows)
+
+        results['reads'] = await bench_reads(adhoc, cached, args.iterations)
+        results['journal_flushes'] = await bench_journal(cached, sizes)
+        results['summary'] = {
+            'statements': len(results['reads']),
+            'total_planning_ms': round(sum(r['planning_ms'] for r in results['reads'].values()), 4),
+            'mean_saved_per_call_ms': round(
+                statistics.mean(r['saved_per_call_ms'] for r in results['reads'].values()), 4
+            ) if results['reads'] else 0.0,
+        }
+        print(json.dumps(results, indent=2))
+        return 0
+    finally:
+        await cached.close()
+        await adhoc.close()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Benchmark: voice event replay harness.
+
+Generates or replays a recorded voice-state stream (JSONL) against the
+tracking stack and reports how it behaves under a busy op:
+
+- handler latency per voice update (p50 / p99 / max)
+- database round trips per voice update
+- event-loop lag measured by a ticker task running alongside the replay
+- process max RSS, and the Python heap peak with --trace-heap (tracemalloc
+  slows allocation, so it is off by default to keep latencies honest)
+
+Targets:
+    tracker   modules.mining.participation.VoiceTracker (write-behind journal)
+    legacy    handlers.voice_tracking._handle_voice_state_update
+
+Discord objects are stubs, and timestamps come from the stream through a
+virtual clock, so durations look like a real op. Database access goes
+through a counting stand-in with a configurable simulated latency. With
+--database-url, VoiceTracker's journal writes go to that PostgreSQL
+instead. The participation SQL is PostgreSQL-specific, so there is no
+SQLite mode.
+
+Stream format (one JSON object per line):
+    {"meta": {"events": {"sm-bench1": [channel_id, ...]}, "untracked": [channel_id, ...]}}
+    {"t": 12.5, "user_id": 500001, "name": "m1", "before": 10001, "after": null, "kind": "leave"}
+
+Usage:
+    python scripts/benchmarks/voice_replay.py --generate stream.jsonl [--updates 50000]
+    python scripts/benchmarks/voice_replay.py --replay stream.jsonl --output results.json
+    python scripts/benchmarks/voice_replay.py --updates 20000 --output new.json --compare old.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# Add src to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+REPLAY_EPOCH = datetime(2025, 1, 5, 18, 0, 0)
+LAG_TICK_SECONDS = 0.005
+
+# ----------------------------------------------------------------------
+# Stream generation and loading
+# ----------------------------------------------------------------------
+
+def generate_stream(updates, events, channels_per_event, members, toggle_ratio, rng):
+    """Synthetic op: members join, switch, toggle mute/deafen/stream and leave."""
+    tracked = {
+        f"sm-bench{e}": [10_000 + e * 100 + c for c in range(channels_per_event)]
+        for e in range(events)
+    }
+    tracked_ids = [cid for ids in tracked.values() for cid in ids]
+    untracked = [90_000 + i for i in range(max(2, len(tracked_ids) // 2))]
+    all_channels = tracked_ids + untracked
+
+    location = {}
+    t = 0.0
+    yield {"meta": {"events": tracked, "untracked": untracked}}
+    for _ in range(updates):
+        t += rng.expovariate(1 / 0.25)   # ~4 updates/s, bursty
+        user_id = 500_000 + rng.randrange(members)
+        current = location.get(user_id)
+        if current is not None and rng.random() < toggle_ratio:
+            kind, target = 'toggle', current
+        elif current is None:
+            kind, target = 'join', rng.choice(all_channels)
+        elif rng.random() < 0.6:
+            kind, target = 'switch', rng.choice([c for c in all_channels if c != current])
+        else:
+            kind, target = 'leave', None
+        location[user_id] = target
+        yield {"t": round(t, 3), "user_id": user_id, "name": f"m{user_id - 500_000}",
+               "before": current, "after": target, "kind": kind}
+
+def write_stream(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+def load_stream(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or 'meta' not in lines[0]:
+        raise ValueError(f"{path}: first line must be a meta record")
+    return lines[0]['meta'], lines[1:]
+
+# ----------------------------------------------------------------------
+# Stubs
+# ----------------------------------------------------------------------
+
+class ReplayClock(datetime):
+    """datetime subclass whose now() follows the stream's timestamps."""
+    current = REPLAY_EPOCH
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+class StubVoiceChannel:
+    """Minimal discord.VoiceChannel stand-in."""
+    __slots__ = ('id', 'name', 'members', 'guild')
+
+    def __init__(self, channel_id, guild):
+        self.id = channel_id
+        self.name = f"vc-{channel_id}"
+        self.members = []
+        self.guild = guild
+
+class StubGuild:
+    def __init__(self):
+        self.id = 814699481912049704
+        self.name = 'Replay Guild'
+        self.channels = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return None
+
+class DBStandIn:
+    """Counting async cursor stand-in with simulated round-trip latency."""
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+        self.round_trips = 0
+        self.transactions = 0
+        self.connections = 0
+
+    @asynccontextmanager
+    async def cursor(self, commit=True):
+        self.transactions += 1
+        yield self
+
+    async def execute(self, query, params=None):
+        self.round_trips += 1
+        self.rowcount = 0
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def executemany(self, query, params_seq):
+        await self.execute(query)
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def legacy_save(self, *args, **kwargs):
+        """Stand-in for database.operations.save_mining_participation (blocking)."""
+        self.connections += 1
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return True
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+async def lag_monitor(samples, stop):
+    """Record how late each LAG_TICK_SECONDS sleep wakes up."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + LAG_TICK_SECONDS
+        await asyncio.sleep(LAG_TICK_SECONDS)
+        samples.append(max(0.0, loop.time() - expected))
+
+def summarize_ms(samples):
+    return {
+        'p50_ms': round(percentile(samples, 50) * 1000, 4),
+        'p99_ms': round(percentile(samples, 99) * 1000, 4),
+        'max_ms': round(max(samples, default=0) * 1000, 4),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 4) if samples else 0.0,
+    }
+
+async def replay(handler, updates, guild, members):
+    """Feed each update to handler, yielding to the loop in between."""
+    latencies = []
+    lag = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(lag_monitor(lag, stop))
+    started = time.perf_counter()
+
+    for update in updates:
+        ReplayClock.current = REPLAY_EPOCH + timedelta(seconds=update['t'])
+        member = members.get(update['user_id'])
+        if member is None:
+            member = SimpleNamespace(
+                id=update['user_id'], name=update['name'], display_name=update['name'].upper(),
+                bot=False, roles=[], guild=guild
+            )
+            members[member.id] = member
+        before = SimpleNamespace(channel=guild.get_channel(update['before']))
+        after = SimpleNamespace(channel=guild.get_channel(update['after']))
+
+        t0 = time.perf_counter()
+        await handler(member, before, after)
+        latencies.append(time.perf_counter() - t0)
+
+        # Voice updates arrive from the gateway one at a time; let other tasks run
+        await asyncio.sleep(0)
+
+    wall = time.perf_counter() - started
+    stop.set()
+    await monitor
+    return latencies, lag, wall
+
+# ----------------------------------------------------------------------
+# Targets
+# ----------------------------------------------------------------------
+
+async def run_tracker(meta, updates, guild, db, database_url):
+    from modules.mining import participation, journal
+    from modules.mining.participation import VoiceTracker
+
+    participation.datetime = ReplayClock
+    if database_url:
+        from database.connection import initialize_database, initialize_async_database, get_async_cursor
+        initialize_database(database_url)
+        await initialize_async_database()
+        counted = get_async_cursor
+
+        @asynccontextmanager
+        async def counting_cursor(commit=True):
+            db.transactions += 1
+            async with counted(commit=commit) as cursor:
+                execute = cursor.execute
+
+                async def counted_execute(query, params=None):
+                    db.round_trips += 1
+                    return await execute(query, params)
+                cursor.execute = counted_execute
+                yield cursor
+        journal.get_async_cursor = counting_cursor
+    else:
+        journal.get_async_cursor = db.cursor
+
+    tracker = VoiceTracker(SimpleNamespace(guilds=[guild], get_channel=guild.get_channel))
+    tracker.journal = journal.ParticipationJournal(spill_path=None)
+    for event_id, channel_ids in meta['events'].items():
+        await tracker.start_tracking(event_id, {f"vc-{cid}": str(cid) for cid in channel_ids})
+
+    latencies, lag, wall = await replay(tracker.on_voice_state_update, updates, guild, {})
+    for event_id in list(tracker.tracked_events):
+        await tracker.stop_tracking(event_id)
+    await tracker.shutdown()
+    return latencies, lag, wall
+
+async def run_legacy(meta, updates, guild, db):
+    # The legacy handler imports these lazily on every leave
+    stub_core = types.ModuleType('commands.mining.core')
+    stub_core.current_session = {'active': True, 'event_id': next(iter(meta['events']), None)}
+    sys.modules['commands.mining.core'] = stub_core
+    sys.modules.setdefault('commands.mining', types.ModuleType('commands.mining'))
+
+    import database.operations as operations
+    from handlers import voice_tracking
+
+    operations.save_mining_participation = db.legacy_save
+    voice_tracking.datetime = ReplayClock
+    voice_tracking.active_voice_channels.clear()
+    voice_tracking.member_times.clear()
+    voice_tracking.member_session_data.clear()
+    for channel_ids in meta['events'].values():
+        for channel_id in channel_ids:
+            voice_tracking.active_voice_channels[channel_id] = guild.get_channel(channel_id)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return await replay(voice_tracking._handle_voice_state_update, updates, guild, {})
+
+async def run_target(target, meta, updates, args):
+    guild = StubGuild()
+    for channel_id in [cid for ids in meta['events'].values() for cid in ids] + meta.get('untracked', []):
+        guild.channels[channel_id] = StubVoiceChannel(channel_id, guild)
+    db = DBStandIn(args.db_latency_ms)
+
+    if args.trace_heap:
+        tracemalloc.start()
+    if target == 'tracker':
+        latencies, lag, wall = await run_tracker(meta, updates, guild, db, args.database_url)
+    else:
+        latencies, lag, wall = await run_legacy(meta, updates, guild, db)
+    heap_peak = None
+    if args.trace_heap:
+        heap_peak = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+        tracemalloc.stop()
+
+    return {
+        'wall_s': round(wall, 4),
+        'updates_per_s': round(len(updates) / wall, 1) if wall else 0.0,
+        'handler_latency': summarize_ms(latencies),
+        'event_loop_lag': summarize_ms(lag),
+        'db_round_trips': db.round_trips,
+        'db_round_trips_per_update': round(db.round_trips / len(updates), 5) if updates else 0.0,
+        'db_transactions': db.transactions,
+        'db_connections_opened': db.connections,
+        'heap_peak_mb': heap_peak,
+    }
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+def flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, nested in value.items():
+            flatten(f"{prefix}.{key}" if prefix else key, nested, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+def compare(baseline, current):
+    """Per-metric change versus a previous results file."""
+    old = flatten('', baseline.get('targets', {}), {})
+    new = flatten('', current.get('targets', {}), {})
+    return {
+        key: {
+            'baseline': old[key],
+            'current': new[key],
+            'change_pct': round((new[key] - old[key]) / old[key] * 100, 2) if old[key] else None,
+        }
+        for key in sorted(old.keys() & new.keys())
+    }
+
+async def run(args):
+    if args.replay:
+        meta, updates = load_stream(args.replay)
+        source = args.replay
+    else:
+        records = list(generate_stream(
+            args.updates, args.events, args.channels, args.members, args.toggle_ratio, random.Random(args.seed)
+        ))
+        if args.generate:
+            write_stream(args.generate, records)
+            print(f"Wrote {len(records) - 1} updates to {args.generate}")
+            return 0
+        meta, updates = records[0]['meta'], records[1:]
+        source = f"generated(seed={args.seed})"
+
+    kinds = {}
+    for update in updates:
+        kinds[update.get('kind', 'unknown')] = kinds.get(update.get('kind', 'unknown'), 0) + 1
+
+    results = {
+        'commit': git_commit(),
+        'recorded_at': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'stream': {'source': source, 'updates': len(updates), 'events': len(meta['events']), 'kinds': kinds},
+        'db': 'postgresql' if args.database_url else f"stand-in({args.db_latency_ms}ms)",
+        'targets': {},
+    }
+    for target in args.targets:
+        results['targets'][target] = await run_target(target, meta, updates, args)
+    results['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            results['comparison'] = compare(json.load(f), results)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--replay', help='JSONL stream to replay')
+    source.add_argument('--generate', help='write a synthetic JSONL stream here and exit')
+    parser.add_argument('--updates', type=int, default=50000)
+    parser.add_argument('--events', type=int, default=2)
+    parser.add_argument('--channels', type=int, default=7, help='tracked channels per event')
+    parser.add_argument('--members', type=int, default=300)
+    parser.add_argument('--toggle-ratio', type=float, default=0.7, help='share of mute/deafen/stream toggles')
+    parser.add_argument('--seed', type=int, default=17)
+    parser.add_argument('--targets', nargs='+', choices=['tracker', 'legacy'], default=['tracker', 'legacy'])
+    parser.add_argument('--db-latency-ms', type=float, default=1.0, help='simulated round-trip latency')
+    parser.add_argument('--database-url', help='replay VoiceTracker writes against this PostgreSQL')
+    parser.add_argument('--trace-heap', action='store_true', help='record heap peak (inflates latencies)')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='previous results JSON to diff against')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: VoiceTracker voice-state routing.
+
+Replays synthetic voice state updates (mostly mute/deafen/stream toggles,
+plus joins, leaves and channel switches across tracked and untracked
+channels) through VoiceTracker.on_voice_state_update, and through the
+previous loop-over-every-event routing, with many concurrent events.
+
+Usage:
+    python scripts/benchmarks/voice_routing.py [--updates 100000] [--events 8] [--channels 7]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+# Add src to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from modules.mining.journal import ParticipationJournal
+from modules.mining.participation import VoiceTracker
+
+async def legacy_on_voice_state_update(tracker, member, before, after):
+    """Routing before the channel index: every event, every update."""
+    for event_id, tracking_data in tracker.tracked_events.items():
+        channel_ids = tracking_data['channel_ids']
+        if before.channel and before.channel.id in channel_ids:
+            await tracker._record_participant_leave(event_id, member.id)
+        if after.channel and after.channel.id in channel_ids:
+            await tracker._record_participant_join(event_id, member, after.channel)
+
+async def make_tracker(event_count, channels_per_event):
+    tracker = VoiceTracker(SimpleNamespace(guilds=[], get_channel=lambda channel_id: None))
+    tracker.journal = ParticipationJournal(spill_path=None)
+
+    async def no_flush():
+        pass
+    tracker.journal.start = no_flush
+    tracker.journal.flush = no_flush
+
+    channels = []
+    for e in range(event_count):
+        event_channels = {f"ch-{e}-{c}": str(10_000 + e * 100 + c) for c in range(channels_per_event)}
+        await tracker.start_tracking(f"sm-bench{e}", event_channels)
+        channels.extend(event_channels.values())
+    return tracker, [int(channel_id) for channel_id in channels]
+
+def make_updates(count, tracked_channel_ids, rng):
+    """Synthetic (member, before, after) stream, ~80% same-channel toggles."""
+    guild = SimpleNamespace(get_role=lambda role_id: None)
+    channels = [SimpleNamespace(id=cid, name=f"vc-{cid}") for cid in tracked_channel_ids]
+    channels += [SimpleNamespace(id=90_000 + i, name=f"afk-{i}") for i in range(len(channels))]
+    members = [
+        SimpleNamespace(id=500_000 + i, name=f"m{i}", display_name=f"M{i}", bot=False, roles=[], guild=guild)
+        for i in range(500)
+    ]
+    location = {}
+    updates = []
+    for _ in range(count):
+        member = rng.choice(members)
+        current = location.get(member.id)
+        if current is not None and rng.random() < 0.8:
+            target = current                                    # mute/deafen/stream toggle
+        else:
+            target = rng.choice(channels + [None])              # join, switch or leave
+        updates.append((member, SimpleNamespace(channel=current), SimpleNamespace(channel=target)))
+        location[member.id] = target
+    return updates
+
+async def replay(handler, updates):
+    started = time.perf_counter()
+    for member, before, after in updates:
+        await handler(member, before, after)
+    return time.perf_counter() - started
+
+async def run(args):
+    rng = random.Random(11)
+    results = {'updates': args.updates, 'events': args.events, 'channels_per_event': args.channels}
+
+    tracker, channel_ids = await make_tracker(args.events, args.channels)
+    updates = make_updates(args.updates, channel_ids, rng)
+    results['same_channel_updates'] = sum(1 for _, b, a in updates if b.channel is a.channel)
+
+    elapsed = await replay(tracker.on_voice_state_update, updates)
+    results['indexed_s'] = round(elapsed, 4)
+    results['indexed_us_per_update'] = round(elapsed / args.updates * 1e6, 3)
+    results['indexed_journal_entries'] = tracker.journal.pending_count()
+
+    legacy_tracker, _ = await make_tracker(args.events, args.channels)
+    elapsed = await replay(
+        lambda m, b, a: legacy_on_voice_state_update(legacy_tracker, m, b, a), updates
+    )
+    results['legacy_s'] = round(elapsed, 4)
+    results['legacy_us_per_update'] = round(elapsed / args.updates * 1e6, 3)
+    results['legacy_journal_entries'] = legacy_tracker.journal.pending_count()
+
+    print(json.dumps(results, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=100000)
+    parser.add_argument('--events', type=int, default=8)
+    parser.add_argument('--channels', type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Rebuild member_stats from all closed events.
+
+Normal operation keeps member_stats current incrementally as events close;
+run this once after deploying it (to backfill history) or after editing
+participation data by hand.
+
+Usage:
+    python scripts/rebuild_member_stats.py [--batch-size 500]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config.settings import get_database_url
+from database.connection import initialize_database, initialize_async_database, close_async_database
+from modules.mining.member_stats import rebuild_member_stats, REBUILD_BATCH_SIZE
+
+
+async def main(batch_size: int):
+    initialize_database(get_database_url())
+    await initialize_async_database()
+    try:
+        print("🔄 Rebuilding member_stats from closed events...")
+        result = await rebuild_member_stats(batch_size=batch_size)
+        if result['success']:
+            print(f"✅ Rebuilt {result['members_rebuilt']} members")
+        else:
+            print(f"❌ Rebuild failed: {result['error']}")
+            return 1
+        return 0
+    finally:
+        await close_async_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.batch_size)))
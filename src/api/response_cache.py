@@ -0,0 +1,146 @@
+"""
+Response Cache for Bot API Read Endpoints
+
+Caches the serialized JSON body of polled read endpoints for a short TTL,
+or until a content version changes (e.g. a roster's version), and answers
+conditional GETs:
+
+- ETag is a hash of the response content (excluding its 'timestamp'), so
+  it only changes when the data does, even across TTL rebuilds
+- If-None-Match matching the current ETag gets an empty 304
+- Bodies are serialized once per build with orjson when it is installed
+- Concurrent misses for the same key share one build
+
+Usage:
+    from api.response_cache import get_response_cache
+
+    return await get_response_cache().respond(
+        request, f"participants:{event_id}", build_payload, ttl=60, version=roster.version
+    )
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+
+from services.single_flight import SingleFlight
+from utils.instrumentation import API_CACHE_REQUESTS
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder produces the same JSON
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a response payload to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode()
+
+@dataclass
+class CachedBody:
+    """A serialized response and when it stops being fresh."""
+    body: bytes
+    etag: str
+    expires_at: float
+    version: Optional[Hashable] = None
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+class ResponseCache:
+    """Keyed cache of serialized JSON responses with ETag revalidation."""
+
+    def __init__(self):
+        self._entries: Dict[str, CachedBody] = {}
+        self._flight = SingleFlight()
+
+    async def get(
+        self,
+        key: str,
+        build: Callable[[], Awaitable[Dict]],
+        ttl: float,
+        version: Optional[Hashable] = None
+    ) -> CachedBody:
+        """The cached body for key, rebuilding it when expired or its version changed."""
+        entry = self._entries.get(key)
+        if entry and time.monotonic() < entry.expires_at and entry.version == version:
+            API_CACHE_REQUESTS.inc(key.split(':', 1)[0], 'hit')
+            return entry
+        API_CACHE_REQUESTS.inc(key.split(':', 1)[0], 'miss')
+        return await self._flight.do(key, lambda: self._build(key, build, ttl, version))
+
+    async def _build(self, key: str, build: Callable[[], Awaitable[Dict]], ttl: float, version: Optional[Hashable]) -> CachedBody:
+        payload = await build()
+        timestamp = payload.pop('timestamp', None)
+        content = dumps(payload)
+        etag = '"' + hashlib.blake2b(content, digest_size=12).hexdigest() + '"'
+
+        previous = self._entries.get(key)
+        if previous and previous.etag == etag:
+            # Same content: keep the existing body (and its timestamp) so clients keep getting 304s
+            entry = CachedBody(previous.body, etag, time.monotonic() + ttl, version)
+        else:
+            if timestamp is not None:
+                payload['timestamp'] = timestamp
+                content = dumps(payload)
+            entry = CachedBody(content, etag, time.monotonic() + ttl, version)
+        self._entries[key] = entry
+        return entry
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        build: Callable[[], Awaitable[Dict]],
+        ttl: float,
+        version: Optional[Hashable] = None
+    ) -> Response:
+        """Serve key as JSON, or 304 Not Modified when the client's ETag is current."""
+        entry = await self.get(key, build, ttl, version)
+        headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+        if _etag_matches(request.headers.get('if-none-match'), entry.etag):
+            API_CACHE_REQUESTS.inc(key.split(':', 1)[0], 'not_modified')
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type='application/json', headers=headers)
+
+    def invalidate(self, prefix: str = ''):
+        """Drop cached bodies whose key starts with prefix (all by default)."""
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            'entries': len(self._entries),
+            'fresh': sum(1 for entry in self._entries.values() if now < entry.expires_at),
+            'bytes': sum(len(entry.body) for entry in self._entries.values()),
+            'serializer': 'orjson' if orjson is not None else 'json',
+        }
+
+# Global response cache
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Get the global Bot API response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -5,11 +5,11 @@ FastAPI server that runs alongside the Discord bot to provide API endpoints
 for the Management Portal to control voice tracking and access bot data.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List, Any
-import asyncio
+from typing import Optional, Dict, List
 import logging
 from datetime import datetime
 import sys
@@ -18,13 +18,25 @@ from pathlib import Path
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from modules.mining.events import MiningEventManager
-from modules.mining.participation import VoiceTracker
+from modules.mining.live_stream import get_live_streams
+from modules.payroll.core import PayrollCalculator
 from modules.payroll.processors.mining import MiningProcessor
+from modules.payroll.reports import get_report_service
 from config.settings import get_sunday_mining_channels
+from utils.instrumentation import get_metrics_registry
+from .response_cache import get_response_cache
 
 logger = logging.getLogger(__name__)
 
+# Idle streams send a keepalive so proxies and dead clients are noticed
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Server-side freshness of cached read responses, in seconds
+PRICES_CACHE_TTL = 30
+PARTICIPANTS_CACHE_TTL = 60  # also rebuilt whenever the roster version changes
+CHANNELS_CACHE_TTL = 5
+STATUS_CACHE_TTL = 5
+
 # Pydantic models for API requests
 class StartTrackingRequest(BaseModel):
     event_id: str = Field(..., description="Event ID to start tracking for")
@@ -34,6 +46,15 @@ class StartTrackingRequest(BaseModel):
 class StopTrackingRequest(BaseModel):
     event_id: str = Field(..., description="Event ID to stop tracking for")
 
+class BatchStartItem(BaseModel):
+    event_id: str = Field(..., description="Event ID to start tracking for")
+    guild_id: Optional[int] = Field(None, description="Discord guild ID (used when channels are not given)")
+    channels: Optional[Dict[str, str]] = Field(None, description="Channel configuration override")
+
+class BatchTrackingRequest(BaseModel):
+    start: List[BatchStartItem] = Field(default_factory=list, max_length=50, description="Events to start tracking")
+    stop: List[str] = Field(default_factory=list, max_length=50, description="Event IDs to stop tracking")
+
 class PriceRefreshRequest(BaseModel):
     force_refresh: bool = Field(True, description="Force refresh from UEX API")
 
@@ -75,6 +96,14 @@ class BotAPI:
                 "timestamp": datetime.now().isoformat()
             }
 
+        @self.app.get("/metrics", response_class=PlainTextResponse)
+        async def metrics():
+            """Prometheus metrics (text exposition format)."""
+            return PlainTextResponse(
+                get_metrics_registry().render(),
+                media_type="text/plain; version=0.0.4; charset=utf-8"
+            )
+
         @self.app.post("/events/{event_id}/start-tracking")
         async def start_voice_tracking(event_id: str, request: StartTrackingRequest):
             """Start voice channel tracking for an event."""
@@ -103,6 +132,8 @@ class BotAPI:
                     "message": "Voice tracking started successfully"
                 }
 
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error starting voice tracking for {event_id}: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -114,56 +145,235 @@ class BotAPI:
                 if not voice_tracker:
                     raise HTTPException(status_code=503, detail="Voice tracker not available")
 
-                await voice_tracker.stop_tracking(event_id)
+                summary = await voice_tracker.stop_tracking(event_id)
 
                 return {
                     "success": True,
                     "event_id": event_id,
+                    "summary": summary,
                     "message": "Voice tracking stopped successfully"
                 }
 
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error stopping voice tracking for {event_id}: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
 
-        @self.app.get("/events/{event_id}/participants")
-        async def get_event_participants(event_id: str):
-            """Get current participants for an event."""
+        @self.app.post("/events/tracking/batch")
+        async def batch_voice_tracking(request: BatchTrackingRequest):
+            """
+            Start and stop voice tracking for many events in one request.
+
+            Stops run first so their channels are free for the starts. Each
+            event gets its own result; one failing event does not fail the rest.
+            """
             try:
                 if not voice_tracker:
                     raise HTTPException(status_code=503, detail="Voice tracker not available")
 
-                participants = await voice_tracker.get_current_participants(event_id)
+                stopped = await voice_tracker.stop_tracking_batch(request.stop) if request.stop else {}
+
+                # Resolve channels once per guild
+                guild_channels: Dict[Optional[int], Dict[str, str]] = {}
+                events: Dict[str, Dict[str, str]] = {}
+                started: Dict[str, Dict] = {}
+                for item in request.start:
+                    channels = item.channels
+                    if not channels:
+                        if item.guild_id not in guild_channels:
+                            guild_channels[item.guild_id] = get_sunday_mining_channels(item.guild_id)
+                        channels = guild_channels[item.guild_id]
+                    if channels:
+                        events[item.event_id] = channels
+                    else:
+                        started[item.event_id] = {'success': False, 'error': 'No channels configured for tracking'}
+
+                if events:
+                    started.update(await voice_tracker.start_tracking_batch(events))
 
                 return {
-                    "event_id": event_id,
-                    "participants": participants,
-                    "total_active": len(participants),
+                    "success": all(result['success'] for result in started.values()),
+                    "started": started,
+                    "stopped": stopped,
                     "timestamp": datetime.now().isoformat()
                 }
 
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error in batch voice tracking: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.get("/events/{event_id}/participants")
+        async def get_event_participants(event_id: str, request: Request):
+            """Get current participants for an event from its live roster."""
+            try:
+                if not voice_tracker:
+                    raise HTTPException(status_code=503, detail="Voice tracker not available")
+
+                roster = voice_tracker.get_roster(event_id)
+
+                async def build():
+                    participants = roster.participants() if roster else []
+                    return {
+                        "event_id": event_id,
+                        "participants": participants,
+                        "total_active": len(participants),
+                        "version": roster.version if roster else 0,
+                        "timestamp": datetime.now().isoformat()
+                    }
+
+                # A restarted event gets a new roster, so key on its identity as well
+                version = (id(roster), roster.version) if roster else None
+                return await get_response_cache().respond(
+                    request, f"participants:{event_id}", build, PARTICIPANTS_CACHE_TTL, version
+                )
+
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error getting participants for {event_id}: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
 
+        @self.app.get("/events/{event_id}/concurrency")
+        async def get_event_concurrency(event_id: str, bucket_minutes: int = 5):
+            """Get peak concurrency, per-channel peaks and a concurrency histogram for an event."""
+            try:
+                if not event_manager:
+                    raise HTTPException(status_code=503, detail="Event manager not available")
+                if bucket_minutes <= 0:
+                    raise HTTPException(status_code=400, detail="bucket_minutes must be positive")
+
+                profile = await event_manager.get_concurrency_profile(event_id, bucket_minutes=bucket_minutes)
+                if not profile:
+                    raise HTTPException(status_code=500, detail="Unable to compute concurrency profile")
+
+                return {"event_id": event_id, **profile}
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error getting concurrency for {event_id}: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.get("/events/{event_id}/report")
+        async def get_event_report(event_id: str):
+            """Download the participation report PDF for an event."""
+            try:
+                calculator = PayrollCalculator()
+                event_data = await calculator.get_event_by_id(event_id)
+                if not event_data:
+                    raise HTTPException(status_code=404, detail=f"Event {event_id} not found")
+
+                participants = await calculator.get_event_participants(event_id)
+                report = await get_report_service().render_event_report(event_data, participants)
+                if report is None:
+                    raise HTTPException(status_code=500, detail="Unable to render event report")
+
+                # Serve the cached PDF by path; the File handle is not needed
+                path = report.fp.name
+                report.close()
+                return FileResponse(path, media_type="application/pdf", filename=report.filename)
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error getting report for {event_id}: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.get("/events/{event_id}/participants/stream")
+        async def stream_event_participants(event_id: str, request: Request, since: Optional[int] = None):
+            """
+            Server-Sent Events stream of participant deltas.
+
+            Starts with a snapshot, or resumes after `since` (or Last-Event-ID)
+            while those deltas are still buffered. Events: snapshot, join,
+            leave, switch, end.
+            """
+            stream = get_live_streams().get(event_id)
+            if not stream:
+                raise HTTPException(status_code=404, detail=f"Event {event_id} is not being tracked")
+
+            last_event_id = request.headers.get("last-event-id", "")
+            if since is None and last_event_id.isdigit():
+                since = int(last_event_id)
+
+            subscription = stream.subscribe(since)
+
+            async def event_source():
+                async with subscription:
+                    while True:
+                        try:
+                            message = await subscription.next(STREAM_KEEPALIVE_SECONDS)
+                        except StopAsyncIteration:
+                            yield "event: end\ndata: {}\n\n"
+                            return
+                        if message is None:
+                            yield ": keepalive\n\n"
+                        else:
+                            yield f"id: {message.seq}\nevent: {message.type}\ndata: {message.data}\n\n"
+
+            return StreamingResponse(
+                event_source(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+
+        @self.app.websocket("/events/{event_id}/participants/ws")
+        async def websocket_event_participants(websocket: WebSocket, event_id: str, since: Optional[int] = None):
+            """WebSocket variant of the participant stream; messages are {type, seq, data}."""
+            stream = get_live_streams().get(event_id)
+            if not stream:
+                await websocket.close(code=4404, reason=f"Event {event_id} is not being tracked")
+                return
+
+            await websocket.accept()
+            try:
+                async with stream.subscribe(since) as subscription:
+                    while True:
+                        try:
+                            message = await subscription.next(STREAM_KEEPALIVE_SECONDS)
+                        except StopAsyncIteration:
+                            await websocket.send_text('{"type": "end", "seq": null, "data": {}}')
+                            await websocket.close()
+                            return
+                        if message is None:
+                            await websocket.send_text('{"type": "keepalive", "seq": null, "data": {}}')
+                        else:
+                            await websocket.send_text(
+                                f'{{"type": "{message.type}", "seq": {message.seq}, "data": {message.data}}}'
+                            )
+            except WebSocketDisconnect:
+                pass
+
         @self.app.get("/prices/current")
-        async def get_current_prices(force_refresh: bool = False):
+        async def get_current_prices(request: Request, force_refresh: bool = False):
             """Get current UEX ore prices."""
             try:
-                processor = MiningProcessor()
-                prices = await processor.get_current_prices(refresh=force_refresh)
+                async def build(refresh: bool = False):
+                    processor = MiningProcessor()
+                    prices = await processor.get_current_prices(refresh=refresh)
 
-                if not prices:
-                    raise HTTPException(status_code=503, detail="Unable to fetch ore prices")
+                    if not prices:
+                        raise HTTPException(status_code=503, detail="Unable to fetch ore prices")
 
-                return {
-                    "success": True,
-                    "prices": prices,
-                    "total_ores": len(prices),
-                    "timestamp": datetime.now().isoformat(),
-                    "cached": not force_refresh
-                }
+                    return {
+                        "success": True,
+                        "prices": prices,
+                        "total_ores": len(prices),
+                        "timestamp": datetime.now().isoformat(),
+                        "cached": not refresh
+                    }
+
+                if force_refresh:
+                    # Answer directly: the next normal request rebuilds from the refreshed prices
+                    get_response_cache().invalidate("prices")
+                    return await build(refresh=True)
+                return await get_response_cache().respond(request, "prices", build, PRICES_CACHE_TTL)
 
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error fetching ore prices: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -176,6 +386,7 @@ class BotAPI:
                 async def refresh_task():
                     processor = MiningProcessor()
                     await processor.get_current_prices(refresh=True)
+                    get_response_cache().invalidate("prices")
 
                 background_tasks.add_task(refresh_task)
 
@@ -190,7 +401,7 @@ class BotAPI:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.get("/discord/channels/{guild_id}")
-        async def get_discord_channels(guild_id: int):
+        async def get_discord_channels(guild_id: int, request: Request):
             """Get Discord voice channels for a guild."""
             try:
                 if not bot_instance:
@@ -204,28 +415,31 @@ class BotAPI:
                 if not guild:
                     raise HTTPException(status_code=404, detail=f"Guild {guild_id} not found")
 
-                # Get voice channels
-                voice_channels = []
-                for channel in guild.voice_channels:
-                    voice_channels.append({
-                        "id": str(channel.id),
-                        "name": channel.name,
-                        "type": "voice",
-                        "category": channel.category.name if channel.category else None,
-                        "user_count": len(channel.members),
-                        "position": channel.position
-                    })
-
-                # Sort by position
-                voice_channels.sort(key=lambda x: x["position"])
+                async def build():
+                    # Get voice channels
+                    voice_channels = []
+                    for channel in guild.voice_channels:
+                        voice_channels.append({
+                            "id": str(channel.id),
+                            "name": channel.name,
+                            "type": "voice",
+                            "category": channel.category.name if channel.category else None,
+                            "user_count": len(channel.members),
+                            "position": channel.position
+                        })
 
-                return {
-                    "channels": voice_channels,
-                    "guild_id": guild_id,
-                    "guild_name": guild.name,
-                    "total_channels": len(voice_channels),
-                    "timestamp": datetime.now().isoformat()
-                }
+                    # Sort by position
+                    voice_channels.sort(key=lambda x: x["position"])
+
+                    return {
+                        "channels": voice_channels,
+                        "guild_id": guild_id,
+                        "guild_name": guild.name,
+                        "total_channels": len(voice_channels),
+                        "timestamp": datetime.now().isoformat()
+                    }
+
+                return await get_response_cache().respond(request, f"channels:{guild_id}", build, CHANNELS_CACHE_TTL)
 
             except HTTPException:
                 raise
@@ -234,36 +448,41 @@ class BotAPI:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.get("/bot/status")
-        async def get_bot_status():
+        async def get_bot_status(request: Request):
             """Get detailed bot status information."""
             try:
                 if not bot_instance:
                     return {"connected": False, "error": "Bot instance not available"}
 
-                guild_count = len(bot_instance.guilds)
-                latency = round(bot_instance.latency * 1000, 2)  # Convert to ms
-
-                # Get voice client info
-                voice_connections = []
-                for guild in bot_instance.guilds:
-                    if guild.voice_client:
-                        voice_connections.append({
-                            "guild_id": guild.id,
-                            "guild_name": guild.name,
-                            "channel_id": guild.voice_client.channel.id,
-                            "channel_name": guild.voice_client.channel.name,
-                            "connected": guild.voice_client.is_connected()
-                        })
-
-                return {
-                    "connected": bot_instance.is_ready(),
-                    "latency_ms": latency,
-                    "guild_count": guild_count,
-                    "voice_connections": voice_connections,
-                    "user_id": bot_instance.user.id if bot_instance.user else None,
-                    "username": bot_instance.user.name if bot_instance.user else None
-                }
+                async def build():
+                    guild_count = len(bot_instance.guilds)
+                    latency = round(bot_instance.latency * 1000, 2)  # Convert to ms
+
+                    # Get voice client info
+                    voice_connections = []
+                    for guild in bot_instance.guilds:
+                        if guild.voice_client:
+                            voice_connections.append({
+                                "guild_id": guild.id,
+                                "guild_name": guild.name,
+                                "channel_id": guild.voice_client.channel.id,
+                                "channel_name": guild.voice_client.channel.name,
+                                "connected": guild.voice_client.is_connected()
+                            })
+
+                    return {
+                        "connected": bot_instance.is_ready(),
+                        "latency_ms": latency,
+                        "guild_count": guild_count,
+                        "voice_connections": voice_connections,
+                        "user_id": bot_instance.user.id if bot_instance.user else None,
+                        "username": bot_instance.user.name if bot_instance.user else None
+                    }
+
+                return await get_response_cache().respond(request, "status", build, STATUS_CACHE_TTL)
 
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error getting bot status: {e}")
                 return {"connected": False, "error": str(e)}
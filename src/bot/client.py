@@ -36,6 +36,19 @@ class RedLegionBot(commands.Bot):
     
     async def setup_hook(self):
         """Load extensions and setup the bot."""
+        # Event loop lag ticker for /metrics and heartbeat logs
+        from utils.instrumentation import start_loop_lag_monitor
+        start_loop_lag_monitor()
+        
+        # Start the asyncpg pool on the bot's event loop so hot paths never block it
+        try:
+            print("🗄️ Starting async database pool...")
+            from database.connection import initialize_async_database
+            await initialize_async_database()
+            print("✅ Async database pool started")
+        except Exception as e:
+            print(f"❌ Failed to start async database pool: {e}")
+        
         try:
             # Load new Cog-based slash command modules
             print("🔄 Loading Red Legion slash command extensions...")
@@ -98,13 +111,16 @@ class RedLegionBot(commands.Bot):
         except Exception as e:
             print(f"❌ Failed to sync commands: {e}")
 
-        # Start API server for Management Portal integration
-        try:
-            print("🌐 Starting API server for Management Portal integration...")
-            await self._start_api_server()
-            print("✅ API server started on port 8001")
-        except Exception as e:
-            print(f"❌ Failed to start API server: {e}")
+        # Start API server for Management Portal integration. on_ready runs again
+        # after every gateway reconnect; the voice tracker (journal, flush task,
+        # rosters) and the server must only be created once.
+        if getattr(self, 'voice_tracker', None) is None:
+            try:
+                print("🌐 Starting API server for Management Portal integration...")
+                await self._start_api_server()
+                print("✅ API server started on port 8001")
+            except Exception as e:
+                print(f"❌ Failed to start API server: {e}")
 
     async def on_guild_join(self, guild):
         """Called when the bot joins a new guild."""
@@ -129,6 +145,12 @@ class RedLegionBot(commands.Bot):
         except Exception as e:
             print(f"❌ Failed to sync commands for {guild.name}: {e}")
 
+    async def on_app_command_completion(self, interaction, command):
+        """Record slash command response time (interaction creation to completion)."""
+        from utils.instrumentation import INTERACTION_RESPONSE
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        INTERACTION_RESPONSE.observe(max(0.0, elapsed), command.qualified_name)
+
     async def _start_api_server(self):
         """Initialize and start the API server for Management Portal integration."""
         try:
@@ -138,7 +160,8 @@ class RedLegionBot(commands.Bot):
 
             # Initialize components
             voice_tracker = VoiceTracker(self)
-            event_manager = MiningEventManager()
+            event_manager = MiningEventManager(voice_tracker)
+            self.voice_tracker = voice_tracker  # Kept so close() can flush its journal
 
             # Create API app
             api_app = initialize_api(self, voice_tracker, event_manager)
@@ -161,6 +184,29 @@ class RedLegionBot(commands.Bot):
         except Exception as e:
             print(f"⚠️ Error stopping UEX cache: {e}")
         
+        try:
+            voice_tracker = getattr(self, 'voice_tracker', None)
+            if voice_tracker:
+                print("💾 Flushing participation journal...")
+                await voice_tracker.shutdown()
+        except Exception as e:
+            print(f"⚠️ Error flushing participation journal: {e}")
+        
+        try:
+            from modules.payroll.reports import shutdown_report_service
+            shutdown_report_service()
+        except Exception as e:
+            print(f"⚠️ Error stopping report service: {e}")
+        
+        from utils.instrumentation import stop_loop_lag_monitor
+        stop_loop_lag_monitor()
+        
+        try:
+            from database.connection import close_async_database
+            await close_async_database()
+        except Exception as e:
+            print(f"⚠️ Error closing async database pool: {e}")
+        
         await super().close()
 
     def run_bot(self):
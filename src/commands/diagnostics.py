@@ -76,6 +76,26 @@ class DiagnosticCommands(commands.GroupCog, name="diagnostics", description="Bot
                 inline=False
             )
             
+            # Live rosters of tracked events (from memory, no database query)
+            voice_tracker = getattr(self.bot, 'voice_tracker', None)
+            if voice_tracker and voice_tracker.tracked_events:
+                lines = []
+                for event_id in list(voice_tracker.tracked_events)[:5]:
+                    summary = voice_tracker.get_roster(event_id).summary()
+                    channel_counts = ", ".join(
+                        f"<#{channel_id}> {count}" for channel_id, count in summary['channels'].items()
+                    ) or "no one in voice"
+                    lines.append(
+                        f"`{event_id}`: {summary['active_participants']} active / "
+                        f"{summary['total_participants']} total, {summary['total_minutes']} min "
+                        f"(peak {summary['peak_concurrent']}, v{summary['version']})\n{channel_counts}"
+                    )
+                embed.add_field(
+                    name="📊 Tracked Events",
+                    value="\n".join(lines)[:1024],
+                    inline=False
+                )
+            
             # Quick recommendation
             if not perms_ok:
                 embed.add_field(
@@ -203,6 +223,90 @@ class DiagnosticCommands(commands.GroupCog, name="diagnostics", description="Bot
                 ephemeral=True
             )
 
+    @app_commands.command(name="db", description="Slowest database statements from the query log")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        order="Rank statements by total, mean or max time, or call count",
+        limit="Number of statements to show",
+        plan="Statement id to show the last sampled EXPLAIN plan for",
+        reset="Clear collected statistics after showing them"
+    )
+    @app_commands.choices(order=[
+        app_commands.Choice(name="Total time", value="total"),
+        app_commands.Choice(name="Mean time", value="mean"),
+        app_commands.Choice(name="Max time", value="max"),
+        app_commands.Choice(name="Calls", value="calls"),
+    ])
+    async def db_diagnostic(self, interaction: discord.Interaction, order: str = "total",
+                            limit: app_commands.Range[int, 1, 25] = 10, plan: Optional[str] = None,
+                            reset: bool = False):
+        """Aggregated per-statement timings from the slow query log."""
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            from database.query_log import get_query_log
+            
+            query_log = get_query_log()
+            summary = query_log.get_stats()
+            
+            if plan:
+                stat = query_log.find(plan)
+                if not stat:
+                    await interaction.followup.send(f"❌ No statement with id `{plan}`", ephemeral=True)
+                elif not stat.last_plan:
+                    await interaction.followup.send(f"ℹ️ No plan sampled yet for `{plan}` ({stat.name})", ephemeral=True)
+                else:
+                    await interaction.followup.send(
+                        f"**{stat.name}** `{stat.id}`\n```{stat.last_plan[:1800]}```", ephemeral=True
+                    )
+                return
+            
+            embed = discord.Embed(
+                title="🗄️ Database Statement Diagnostic",
+                description=f"Query log: {'✅ enabled' if summary['enabled'] else '❌ disabled (set DB_QUERY_LOG=1)'}\n"
+                            f"Since <t:{int(summary['since'])}:R> • slow ≥ {summary['slow_ms']:.0f}ms • "
+                            f"EXPLAIN sample {summary['explain_rate']:.0%}",
+                color=discord.Color.blue(),
+                timestamp=datetime.now()
+            )
+            
+            embed.add_field(
+                name="📊 Totals",
+                value=f"Statements: {summary['fingerprints']}\n"
+                      f"Calls: {summary['calls']}\n"
+                      f"Slow: {summary['slow']}\n"
+                      f"Time: {summary['total_ms'] / 1000:.1f}s",
+                inline=False
+            )
+            
+            top = query_log.top(limit, order_by=order)
+            if top:
+                lines = [f"{'id':<10} {'calls':>6} {'mean':>8} {'max':>8} {'total':>8}  name"]
+                for stat in top:
+                    lines.append(
+                        f"{stat.id:<10} {stat.calls:>6} {stat.mean_s * 1000:>7.1f}m {stat.max_s * 1000:>7.0f}m "
+                        f"{stat.total_s:>7.1f}s  {stat.name}{' *' if stat.last_plan else ''}"
+                    )
+                table = "\n".join(lines)
+                if len(table) > 1000:
+                    table = table[:1000].rsplit("\n", 1)[0]
+                embed.add_field(name=f"🐢 Top by {order}", value=f"```{table}```", inline=False)
+                embed.set_footer(text="* has a sampled plan: /diagnostics db plan:<id>")
+            else:
+                embed.add_field(name="🐢 Top Statements", value="No statements recorded yet", inline=False)
+            
+            if reset:
+                query_log.reset()
+                embed.add_field(name="🧹 Reset", value="Statistics cleared", inline=False)
+            
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            await interaction.followup.send(
+                f"❌ Database diagnostic error: {str(e)}",
+                ephemeral=True
+            )
+
 
 async def setup(bot):
     """Setup function for discord.py extension loading."""
@@ -14,11 +14,19 @@ from .channels import (
     get_sunday_mining_channels,
     SUNDAY_MINING_CHANNELS_FALLBACK
 )
+from .guild_cache import (
+    GuildConfig,
+    get_guild_config_cache,
+    invalidate_guild_config
+)
 
 __all__ = [
     'get_database_url',
     'get_sunday_mining_channels',
     'SUNDAY_MINING_CHANNELS_FALLBACK',
+    'GuildConfig',
+    'get_guild_config_cache',
+    'invalidate_guild_config',
     'ORE_TYPES',
     'UEX_API_CONFIG',
     'DISCORD_CONFIG',
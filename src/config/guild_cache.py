@@ -0,0 +1,157 @@
+"""
+Guild configuration cache for Red Legion Discord Bot.
+
+Mining channels and org role IDs per guild, loaded once through the pooled
+DatabaseManager and held in memory until a channel is added or removed.
+Channel-membership checks are a frozenset lookup instead of a database
+round trip (and, before this, a fresh connection plus URL resolution).
+
+Usage:
+    from config.guild_cache import get_guild_config_cache
+
+    cache = get_guild_config_cache()
+    cache.is_mining_channel(channel.id, guild.id)   # O(1)
+    cache.get(guild.id).channels                    # {name: channel_id_str}
+    cache.invalidate(guild.id)                      # after channel changes
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, Optional
+import logging
+
+from .settings import DISCORD_CONFIG, SUNDAY_MINING_CHANNELS_FALLBACK
+
+logger = logging.getLogger(__name__)
+
+# Red Legion server, used when GUILD_ID is not configured
+DEFAULT_GUILD_ID = 814699481912049704
+
+# How long a fallback (database unavailable) config is served before retrying
+FALLBACK_RETRY_SECONDS = 60
+
+@dataclass(frozen=True)
+class GuildConfig:
+    """Immutable per-guild configuration snapshot."""
+    guild_id: int
+    channels: Mapping[str, str]             # channel name -> channel id (str)
+    channel_ids: FrozenSet[int]
+    org_role_id: Optional[int]
+    text_channel_id: Optional[int]
+    from_database: bool
+    loaded_at: float
+
+    def is_mining_channel(self, channel_id) -> bool:
+        return int(channel_id) in self.channel_ids
+
+def _optional_int(value) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+def default_guild_id() -> int:
+    """Configured guild (GUILD_ID) or the Red Legion server."""
+    return _optional_int(DISCORD_CONFIG.get('GUILD_ID')) or DEFAULT_GUILD_ID
+
+class GuildConfigCache:
+    """Process-wide cache of GuildConfig snapshots keyed by guild id."""
+
+    def __init__(self):
+        self._configs: Dict[int, GuildConfig] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "loads": 0, "fallbacks": 0, "invalidations": 0}
+
+    def get(self, guild_id=None) -> GuildConfig:
+        """Get the cached config for a guild, loading it on first use."""
+        guild_id = int(guild_id) if guild_id else default_guild_id()
+
+        config = self._configs.get(guild_id)
+        if config and (config.from_database or time.monotonic() - config.loaded_at < FALLBACK_RETRY_SECONDS):
+            self._stats["hits"] += 1
+            return config
+
+        # One loader per process; late arrivals reuse its result
+        with self._lock:
+            config = self._configs.get(guild_id)
+            if config and (config.from_database or time.monotonic() - config.loaded_at < FALLBACK_RETRY_SECONDS):
+                self._stats["hits"] += 1
+                return config
+            config = self._load(guild_id)
+            self._configs[guild_id] = config
+            return config
+
+    def is_mining_channel(self, channel_id, guild_id=None) -> bool:
+        """O(1) check whether a voice channel is a tracked mining channel."""
+        return self.get(guild_id).is_mining_channel(channel_id)
+
+    def invalidate(self, guild_id=None):
+        """Drop cached config for one guild, or all guilds."""
+        with self._lock:
+            if guild_id is None:
+                self._configs.clear()
+            else:
+                self._configs.pop(int(guild_id), None)
+            self._stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict:
+        """Cache statistics for diagnostics."""
+        return {**self._stats, "guilds_cached": len(self._configs)}
+
+    def _load(self, guild_id: int) -> GuildConfig:
+        channels = self._load_channels(guild_id)
+        from_database = bool(channels)
+        if from_database:
+            self._stats["loads"] += 1
+            print(f"✅ Loaded {len(channels)} mining channels from database for guild {guild_id}")
+        else:
+            self._stats["fallbacks"] += 1
+            channels = dict(SUNDAY_MINING_CHANNELS_FALLBACK)
+            print("Using fallback mining channels")
+
+        return GuildConfig(
+            guild_id=guild_id,
+            channels=MappingProxyType(channels),
+            channel_ids=frozenset(int(channel_id) for channel_id in channels.values()),
+            org_role_id=_optional_int(DISCORD_CONFIG.get('ORG_ROLE_ID')),
+            text_channel_id=_optional_int(DISCORD_CONFIG.get('TEXT_CHANNEL_ID')),
+            from_database=from_database,
+            loaded_at=time.monotonic()
+        )
+
+    def _load_channels(self, guild_id: int) -> Dict[str, str]:
+        """Active mining channels from the pooled connection; {} if unavailable."""
+        try:
+            from database.connection import get_cursor
+
+            with get_cursor(commit=False) as cursor:
+                cursor.execute('''
+                    SELECT channel_name, channel_id
+                    FROM mining_channels
+                    WHERE guild_id = %s AND is_active = TRUE
+                    ORDER BY channel_name
+                ''', (str(guild_id),))
+                rows = cursor.fetchall()
+
+            return {row['channel_name']: str(row['channel_id']) for row in rows}
+
+        except Exception as e:
+            print(f"Warning: Could not get mining channels from database: {e}")
+            return {}
+
+
+# Global guild config cache
+_guild_config_cache: Optional[GuildConfigCache] = None
+
+def get_guild_config_cache() -> GuildConfigCache:
+    """Get the global guild configuration cache."""
+    global _guild_config_cache
+    if _guild_config_cache is None:
+        _guild_config_cache = GuildConfigCache()
+    return _guild_config_cache
+
+def invalidate_guild_config(guild_id=None):
+    """Invalidate cached guild configuration (call after channel changes)."""
+    get_guild_config_cache().invalidate(guild_id)
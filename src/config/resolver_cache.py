@@ -0,0 +1,213 @@
+"""
+Resolver cache for Red Legion Discord Bot.
+
+Memoizes slow startup lookups (Secret Manager secrets, the Cloud SQL
+endpoint) with a TTL, so building a connection no longer repeats them.
+Non-secret endpoint data (the Cloud SQL IP) is also written to an on-disk
+cache file (mode 0600) that is read back on the next start, so a restart
+skips the gcloud lookup while it is fresh. Secrets are kept in memory only
+and are never written to the cache file.
+
+If a refresh fails, the last known good value (from memory or the cache
+file) is returned instead of failing the caller.
+
+Usage:
+    from config.resolver_cache import get_cached_secret, get_resolver_cache
+
+    password = get_cached_secret("db-password")
+    get_resolver_cache().prefetch("secret:...", loader)   # background warm-up
+
+Set RESOLVER_CACHE_FILE to move the cache file, or to "off" to disable it.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+FAILURE_RETRY_SECONDS = 30
+DEFAULT_CACHE_FILE = os.path.join(Path.home(), '.cache', 'redlegion', 'resolver_cache.json')
+DEFAULT_PROJECT_ID = 'rl-prod-471116'
+SECRET_KEY_PREFIX = 'secret:'
+
+class ResolverCache:
+    """
+    Thread-safe TTL cache with per-key single flight and last-known-good.
+
+    Lookups for the same key are serialized, so a background prefetch and a
+    caller that needs the value right away share one resolution.
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        cache_file = cache_file if cache_file is not None else os.getenv('RESOLVER_CACHE_FILE', DEFAULT_CACHE_FILE)
+        self.cache_file = None if cache_file in ('', 'off') else Path(cache_file)
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"hits": 0, "resolved": 0, "fallbacks": 0, "failures": 0}
+
+        self._load_file()
+
+    def get(self, key: str, loader: Callable[[], Any], ttl: int = DEFAULT_TTL_SECONDS, persist: bool = False) -> Any:
+        """
+        Get a value, resolving it with loader() when missing or expired.
+
+        Raises the loader's error only when there is no last known good value.
+        """
+        entry = self._entries.get(key)
+        if entry and self._is_fresh(entry, ttl):
+            self._stats["hits"] += 1
+            return entry['value']
+
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry and self._is_fresh(entry, ttl):
+                self._stats["hits"] += 1
+                return entry['value']
+
+            try:
+                value = loader()
+                if value is None:
+                    raise LookupError(f"{key} resolved to nothing")
+            except Exception as e:
+                self._stats["failures"] += 1
+                if entry is None:
+                    raise
+                # Serve last known good and back off before retrying
+                self._stats["fallbacks"] += 1
+                entry['retry_after'] = time.time() + FAILURE_RETRY_SECONDS
+                logger.warning(f"Could not refresh {key}, using last known good value: {e}")
+                return entry['value']
+
+            self._stats["resolved"] += 1
+            persist = persist and not key.startswith(SECRET_KEY_PREFIX)
+            self._entries[key] = {'value': value, 'resolved_at': time.time(), 'persist': persist}
+            if persist:
+                self._save_file()
+            return value
+
+    def prefetch(self, key: str, loader: Callable[[], Any], ttl: int = DEFAULT_TTL_SECONDS, persist: bool = False) -> Future:
+        """Resolve a key in a background thread; callers of get() wait for it."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='resolver')
+        future = self._executor.submit(self.get, key, loader, ttl, persist)
+        # Prefetch failures surface on the later get(); only debug-log them here
+        future.add_done_callback(
+            lambda f: f.exception() and logger.debug(f"Background resolve of {key} failed: {f.exception()}")
+        )
+        return future
+
+    def invalidate(self, key: Optional[str] = None):
+        """Forget one key or everything (memory and cache file)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+        self._save_file()
+
+    def get_stats(self) -> Dict:
+        """Cache statistics for diagnostics (never includes values)."""
+        return {**self._stats, "keys": sorted(self._entries), "cache_file": str(self.cache_file) if self.cache_file else None}
+
+    def _is_fresh(self, entry: Dict, ttl: int) -> bool:
+        now = time.time()
+        if now < entry.get('retry_after', 0):
+            return True
+        return now - entry['resolved_at'] < ttl
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load_file(self):
+        if not self.cache_file or not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                stored = json.load(f)
+            for key, entry in stored.items():
+                if key.startswith(SECRET_KEY_PREFIX):
+                    continue
+                self._entries[key] = {'value': entry['value'], 'resolved_at': float(entry['resolved_at']), 'persist': True}
+            logger.info(f"Loaded {len(self._entries)} resolver cache entries from {self.cache_file}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable resolver cache file {self.cache_file}: {e}")
+            return
+        if len(self._entries) != len(stored):
+            # Scrub secrets written by older versions of this cache
+            self._save_file()
+
+    def _save_file(self):
+        if not self.cache_file:
+            return
+        with self._lock:
+            stored = {
+                key: {'value': entry['value'], 'resolved_at': entry['resolved_at']}
+                for key, entry in self._entries.items() if entry.get('persist')
+            }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, prefix='.resolver_cache.')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(stored, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Could not write resolver cache file {self.cache_file}: {e}")
+
+
+def fetch_secret(secret_name: str, project_id: Optional[str] = None) -> str:
+    """Read the latest version of a secret from Google Cloud Secret Manager (uncached)."""
+    from google.cloud import secretmanager
+
+    project_id = project_id or os.getenv('GOOGLE_CLOUD_PROJECT', DEFAULT_PROJECT_ID)
+    client = secretmanager.SecretManagerServiceClient()
+    secret_path = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
+    response = client.access_secret_version(request={"name": secret_path})
+    return response.payload.data.decode("UTF-8")
+
+def _secret_key(secret_name: str, project_id: Optional[str]) -> str:
+    return f"{SECRET_KEY_PREFIX}{project_id or os.getenv('GOOGLE_CLOUD_PROJECT', DEFAULT_PROJECT_ID)}/{secret_name}"
+
+def get_cached_secret(secret_name: str, project_id: Optional[str] = None, ttl: int = DEFAULT_TTL_SECONDS) -> str:
+    """Secret Manager value, memoized in memory for ttl seconds."""
+    return get_resolver_cache().get(
+        _secret_key(secret_name, project_id),
+        lambda: fetch_secret(secret_name, project_id),
+        ttl=ttl
+    )
+
+def prefetch_secrets(*secret_names: str, project_id: Optional[str] = None):
+    """Start resolving several secrets concurrently in the background."""
+    cache = get_resolver_cache()
+    for secret_name in secret_names:
+        cache.prefetch(
+            _secret_key(secret_name, project_id),
+            lambda name=secret_name: fetch_secret(name, project_id)
+        )
+
+
+# Global resolver cache
+_resolver_cache: Optional[ResolverCache] = None
+_resolver_cache_lock = threading.Lock()
+
+def get_resolver_cache() -> ResolverCache:
+    """Get the global resolver cache."""
+    global _resolver_cache
+    if _resolver_cache is None:
+        with _resolver_cache_lock:
+            if _resolver_cache is None:
+                _resolver_cache = ResolverCache()
+    return _resolver_cache
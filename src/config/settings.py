@@ -3,17 +3,11 @@ Core settings and configuration for Red Legion Discord Bot.
 """
 
 import os
-from google.cloud import secretmanager
+from .resolver_cache import get_cached_secret, prefetch_secrets
 
 def get_secret(secret_name, project_id=None):
-    """Retrieve secret from Google Cloud Secret Manager."""
-    if project_id is None:
-        project_id = os.getenv('GOOGLE_CLOUD_PROJECT', 'rl-prod-471116')
-    
-    client = secretmanager.SecretManagerServiceClient()
-    secret_path = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-    response = client.access_secret_version(request={"name": secret_path})
-    return response.payload.data.decode("UTF-8")
+    """Retrieve secret from Google Cloud Secret Manager (memoized, see resolver_cache)."""
+    return get_cached_secret(secret_name, project_id)
 
 def get_database_url():
     """Get database URL from environment or secret manager."""
@@ -115,6 +109,17 @@ def get_discord_config():
         'GUILD_ID': os.getenv('GUILD_ID'),  # Optional, for single-guild deployment
     }
 
+def prefetch_startup_secrets():
+    """
+    Resolve the secrets bot startup will need concurrently instead of one by one.
+
+    Called explicitly by main(); importing settings never starts lookups.
+    """
+    secret_names = ["db-password"]
+    if not os.getenv('DATABASE_URL') and not os.path.exists('db_url.txt'):
+        secret_names.append("database-connection-string")
+    prefetch_secrets(*secret_names)
+
 DISCORD_CONFIG = get_discord_config()
 
 # Backward compatibility exports
@@ -174,22 +179,12 @@ SUNDAY_MINING_CHANNELS_FALLBACK = {
 
 def get_sunday_mining_channels(guild_id=None):
     """
-    Get Sunday mining channels from database for a specific guild.
-    Falls back to hardcoded values if database is unavailable.
+    Get Sunday mining channels for a specific guild.
+
+    Served from the guild configuration cache (database, then fallback).
     """
-    try:
-        from database import get_mining_channels_dict
-        db_url = get_database_url()
-        if db_url:
-            channels = get_mining_channels_dict(db_url, guild_id)
-            if channels:
-                return channels
-    except Exception as e:
-        print(f"Warning: Could not get mining channels from database: {e}")
-    
-    # Fallback to hardcoded channels
-    print("Using fallback mining channels")
-    return SUNDAY_MINING_CHANNELS_FALLBACK
+    from .guild_cache import get_guild_config_cache
+    return dict(get_guild_config_cache().get(guild_id).channels)
 
 def get_config():
     """Get complete bot configuration for admin commands."""
@@ -15,7 +15,7 @@ Key Features:
 - Schema: Complete SQL schema with proper relationships and indexes
 """
 
-from .connection import DatabaseManager, get_connection, get_cursor
+from .connection import DatabaseManager, get_connection, get_cursor, get_async_cursor
 from .models import *
 from .operations import *
 from .schemas import init_database
@@ -33,7 +33,7 @@ def add_market_item(db_url, name, price, stock):
     pass
 
 # Import all functions from operations to make them available
-from .connection import DatabaseManager, get_connection, get_cursor, initialize_database
+from .connection import DatabaseManager, get_connection, get_cursor, get_async_cursor, initialize_database
 from .models import *
 from .operations import *
 from .schemas import init_database
@@ -100,6 +100,7 @@ __all__ = [
     'DatabaseManager',
     'get_connection', 
     'get_cursor',
+    'get_async_cursor',
     
     # Models
     'Guild',
@@ -142,7 +143,7 @@ __all__ = [
     'get_open_mining_events',
 ]
 
-from .connection import DatabaseManager, get_connection, get_cursor, initialize_database
+from .connection import DatabaseManager, get_connection, get_cursor, get_async_cursor, initialize_database
 from .models import *
 from .operations import *
 from .schemas import init_database
@@ -151,6 +152,7 @@ __all__ = [
     'DatabaseManager',
     'get_connection',
     'get_cursor', 
+    'get_async_cursor',
     'initialize_database',
     'init_database',
     'GuildOperations',
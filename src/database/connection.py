@@ -7,19 +7,31 @@ Handles database connections, connection pooling, and transaction management.
 import psycopg2
 import psycopg2.extras
 from psycopg2.pool import SimpleConnectionPool
-from contextlib import contextmanager
-from typing import Optional, Generator
+import asyncpg
+from contextlib import contextmanager, asynccontextmanager
+from functools import lru_cache
+from typing import Optional, Generator, AsyncGenerator, Any, Dict, List
+import asyncio
+import json
 import logging
-import os
+import re
 import subprocess
+import time
 from urllib.parse import urlparse, urlunparse
 
+from utils.instrumentation import DB_CHECKOUTS, DB_POOL_WAIT, DB_QUERY_DURATION, statement_name
+from .query_log import explain_async, explain_sync, get_query_log
+
 logger = logging.getLogger(__name__)
 
 def get_cloud_sql_ip(instance_name: str, project_id: str = None) -> Optional[str]:
     """
     Get the private IP address of a Cloud SQL instance using gcloud commands.
     
+    The result is cached (in memory and on disk) for an hour, so only the
+    first call after that pays for the gcloud subprocess; if gcloud fails,
+    the last known IP is returned.
+    
     Args:
         instance_name: Name of the Cloud SQL instance
         project_id: GCP project ID (optional, uses default if not provided)
@@ -27,6 +39,18 @@ def get_cloud_sql_ip(instance_name: str, project_id: str = None) -> Optional[str
     Returns:
         Private IP address of the instance or None if not found
     """
+    from config.resolver_cache import get_resolver_cache
+    try:
+        return get_resolver_cache().get(
+            f"cloudsql-ip:{project_id or 'default'}/{instance_name}",
+            lambda: _describe_cloud_sql_ip(instance_name, project_id),
+            persist=True
+        )
+    except Exception:
+        return None
+
+def _describe_cloud_sql_ip(instance_name: str, project_id: str = None) -> Optional[str]:
+    """Run gcloud to look up a Cloud SQL instance's IP (uncached)."""
     try:
         # Build gcloud command
         cmd = ['gcloud', 'sql', 'instances', 'describe', instance_name]
@@ -53,6 +77,9 @@ def resolve_database_url(database_url: str) -> str:
     """
     Resolve database URL by replacing hostname with Cloud SQL internal IP and correct credentials.
     
+    The password lookup is memoized (see config.resolver_cache), so repeated
+    connection setup (legacy helpers, test data, reconnects) doesn't refetch it.
+    
     Args:
         database_url: Original database URL
         
@@ -114,23 +141,10 @@ def resolve_database_url(database_url: str) -> str:
             return database_url
 
 def _get_db_password_from_secrets() -> str:
-    """Get database password from Google Secrets Manager."""
+    """Get database password from Google Secrets Manager (memoized with last-known-good)."""
     try:
-        from google.cloud import secretmanager
-        
-        # Initialize the client
-        client = secretmanager.SecretManagerServiceClient()
-        
-        # Get project ID from environment or use default
-        project_id = os.getenv('GOOGLE_CLOUD_PROJECT', 'rl-prod-471116')
-        
-        # Use the correct secret name for database password
-        secret_name = "db-password"
-        name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-        
-        # Access the secret version
-        response = client.access_secret_version(request={"name": name})
-        return response.payload.data.decode("UTF-8")
+        from config.resolver_cache import get_cached_secret
+        return get_cached_secret("db-password")
         
     except Exception as e:
         logger.error(f"Error getting database password from secrets: {e}")
@@ -146,6 +160,148 @@ def _is_ip_address(hostname: str) -> bool:
         pass
     return hostname in ['localhost', '127.0.0.1']
 
+_PLACEHOLDER_RE = re.compile(r"%(%|s)")
+_RETURNING_RE = re.compile(r"\bRETURNING\b", re.IGNORECASE)
+_ROW_STATEMENTS = ('SELECT', 'WITH', 'VALUES', 'SHOW', 'TABLE', 'EXPLAIN')
+
+@lru_cache(maxsize=512)
+def _to_asyncpg_sql(query: str) -> str:
+    """Translate psycopg2 '%s' placeholders into asyncpg '$n' placeholders."""
+    counter = iter(range(1, query.count('%s') + 1))
+    return _PLACEHOLDER_RE.sub(
+        lambda match: '%' if match.group(1) == '%' else f"${next(counter)}",
+        query
+    )
+
+@lru_cache(maxsize=512)
+def _returns_rows(query: str) -> bool:
+    """Check whether a statement produces a result set."""
+    head = query.lstrip().split(None, 1)
+    if head and head[0].upper() in _ROW_STATEMENTS:
+        return True
+    return bool(_RETURNING_RE.search(query))
+
+def _rowcount_from_status(status: str) -> int:
+    """Extract the affected row count from an asyncpg status string like 'UPDATE 3'."""
+    try:
+        return int(status.rsplit(' ', 1)[-1])
+    except (ValueError, AttributeError):
+        return -1
+
+async def _init_async_connection(conn: asyncpg.Connection):
+    """Register JSON codecs so dict parameters map to json/jsonb like psycopg2.extras.Json."""
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            type_name,
+            encoder=lambda value: json.dumps(value, default=str),
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+class AsyncCursor:
+    """
+    psycopg2-style cursor facade over an asyncpg connection.
+
+    Accepts the same '%s' SQL used with get_cursor() so call sites only need to
+    await execute(). Rows are fetched eagerly as dicts (like RealDictCursor), so
+    fetchone()/fetchall() stay synchronous.
+    """
+
+    def __init__(self, connection: asyncpg.Connection):
+        self.connection = connection
+        self.rowcount = -1
+        self._rows: List[Dict[str, Any]] = []
+        self._position = 0
+
+    async def execute(self, query: str, params=None):
+        """Execute a statement, buffering any returned rows."""
+        sql = _to_asyncpg_sql(query)
+        args = tuple(params) if params else ()
+        started = time.perf_counter()
+
+        if _returns_rows(query):
+            records = await self.connection.fetch(sql, *args)
+            self._rows = [dict(record) for record in records]
+            self.rowcount = len(self._rows)
+        else:
+            status = await self.connection.execute(sql, *args)
+            self._rows = []
+            self.rowcount = _rowcount_from_status(status)
+        self._position = 0
+        duration = time.perf_counter() - started
+        DB_QUERY_DURATION.observe(duration, statement_name(query))
+
+        query_log = get_query_log()
+        if query_log.enabled:
+            stat = query_log.record(query, duration, self.rowcount)
+            if stat:
+                await explain_async(query_log, stat, self.connection, sql, args)
+
+    async def executemany(self, query: str, params_seq):
+        """Execute a statement once per parameter tuple in a single round trip."""
+        params_list = [tuple(p) for p in params_seq]
+        started = time.perf_counter()
+        await self.connection.executemany(_to_asyncpg_sql(query), params_list)
+        duration = time.perf_counter() - started
+        DB_QUERY_DURATION.observe(duration, statement_name(query))
+
+        query_log = get_query_log()
+        if query_log.enabled:
+            query_log.record(query, duration, len(params_list))
+        self._rows = []
+        self._position = 0
+        self.rowcount = -1
+
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        """Return the next buffered row or None."""
+        if self._position >= len(self._rows):
+            return None
+        row = self._rows[self._position]
+        self._position += 1
+        return row
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        """Return all remaining buffered rows."""
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+class TimedDictCursor(psycopg2.extras.RealDictCursor):
+    """
+    RealDictCursor that records statement durations for /metrics and, when
+    DB_QUERY_LOG is enabled, feeds the slow query log.
+    """
+
+    def execute(self, query, vars=None):
+        text = query if isinstance(query, str) else query.as_string(self.connection)
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        finally:
+            duration = time.perf_counter() - started
+            DB_QUERY_DURATION.observe(duration, statement_name(text))
+
+        query_log = get_query_log()
+        if query_log.enabled:
+            stat = query_log.record(text, duration, self.rowcount)
+            if stat:
+                explain_sync(query_log, stat, self.connection, query, vars)
+        return result
+
+    def executemany(self, query, vars_list):
+        text = query if isinstance(query, str) else query.as_string(self.connection)
+        started = time.perf_counter()
+        try:
+            result = super().executemany(query, vars_list)
+        finally:
+            duration = time.perf_counter() - started
+            DB_QUERY_DURATION.observe(duration, statement_name(text))
+
+        query_log = get_query_log()
+        if query_log.enabled:
+            query_log.record(text, duration, self.rowcount)
+        return result
+
 class DatabaseManager:
     """
     Manages database connections and transactions for the Red Legion Bot.
@@ -155,6 +311,7 @@ class DatabaseManager:
     - Automatic retry logic
     - Transaction context management
     - Health monitoring
+    - Optional asyncpg pool for non-blocking queries on the event loop
     """
     
     def __init__(self, database_url: str, min_connections: int = 1, max_connections: int = 10):
@@ -171,6 +328,8 @@ class DatabaseManager:
         self.min_connections = min_connections
         self.max_connections = max_connections
         self._pool: Optional[SimpleConnectionPool] = None
+        self._async_pool: Optional[asyncpg.Pool] = None
+        self._async_pool_lock: Optional[asyncio.Lock] = None
         self._initialize_pool()
     
     def _initialize_pool(self):
@@ -194,7 +353,7 @@ class DatabaseManager:
                 self.min_connections,
                 self.max_connections,
                 self.database_url,
-                cursor_factory=psycopg2.extras.RealDictCursor
+                cursor_factory=TimedDictCursor
             )
             
             logger.info(f"Database connection pool initialized ({self.min_connections}-{self.max_connections} connections)")
@@ -216,7 +375,10 @@ class DatabaseManager:
         
         conn = None
         try:
+            started = time.perf_counter()
             conn = self._pool.getconn()
+            DB_POOL_WAIT.observe(time.perf_counter() - started, 'sync')
+            DB_CHECKOUTS.inc('sync')
             if conn:
                 yield conn
             else:
@@ -288,6 +450,79 @@ class DatabaseManager:
             logger.error(f"Database health check failed: {e}")
             return False
     
+    async def initialize_async_pool(self) -> asyncpg.Pool:
+        """
+        Create the asyncpg pool on the running event loop.
+
+        Safe to call repeatedly; concurrent callers share one pool.
+
+        Returns:
+            The asyncpg connection pool
+        """
+        if self._async_pool is not None:
+            return self._async_pool
+
+        if self._async_pool_lock is None:
+            self._async_pool_lock = asyncio.Lock()
+
+        async with self._async_pool_lock:
+            if self._async_pool is None:
+                logger.info("Initializing async database connection pool...")
+                self._async_pool = await asyncpg.create_pool(
+                    dsn=self.database_url,
+                    min_size=self.min_connections,
+                    max_size=self.max_connections,
+                    init=_init_async_connection
+                )
+                logger.info(f"Async database connection pool initialized ({self.min_connections}-{self.max_connections} connections)")
+        return self._async_pool
+
+    @asynccontextmanager
+    async def get_async_connection(self) -> AsyncGenerator[asyncpg.Connection, None]:
+        """
+        Get an asyncpg connection from the async pool.
+
+        Yields:
+            asyncpg connection with automatic release
+        """
+        pool = await self.initialize_async_pool()
+        started = time.perf_counter()
+        async with pool.acquire() as conn:
+            DB_POOL_WAIT.observe(time.perf_counter() - started, 'async')
+            DB_CHECKOUTS.inc('async')
+            yield conn
+
+    @asynccontextmanager
+    async def get_async_cursor(self, commit: bool = True) -> AsyncGenerator[AsyncCursor, None]:
+        """
+        Get an async cursor with transaction management.
+
+        Args:
+            commit: Whether to commit the transaction automatically
+
+        Yields:
+            AsyncCursor bound to a pooled asyncpg connection
+        """
+        async with self.get_async_connection() as conn:
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                yield AsyncCursor(conn)
+            except Exception:
+                await transaction.rollback()
+                raise
+            if commit:
+                await transaction.commit()
+            else:
+                await transaction.rollback()
+
+    async def close_async_pool(self):
+        """Close all connections in the async pool."""
+        if self._async_pool is not None:
+            await self._async_pool.close()
+            self._async_pool = None
+            logger.info("Async database connection pool closed")
+
     def close(self):
         """Close all connections in the pool."""
         if self._pool:
@@ -336,6 +571,43 @@ def get_cursor(commit: bool = True):
         raise RuntimeError("Database not initialized. Call initialize_database() first.")
     return _db_manager.get_cursor(commit=commit)
 
+async def initialize_async_database():
+    """
+    Start the asyncpg pool for the global database manager.
+
+    Must be awaited from the bot's event loop (e.g. in setup_hook).
+
+    Returns:
+        asyncpg pool instance
+    """
+    if not _db_manager:
+        raise RuntimeError("Database not initialized. Call initialize_database() first.")
+    return await _db_manager.initialize_async_pool()
+
+def get_async_cursor(commit: bool = True):
+    """
+    Get an async database cursor from the global manager.
+
+    Usage:
+        async with get_async_cursor() as cursor:
+            await cursor.execute("SELECT ...", (value,))
+            row = cursor.fetchone()
+
+    Args:
+        commit: Whether to commit transactions automatically
+
+    Returns:
+        Async cursor context manager
+    """
+    if not _db_manager:
+        raise RuntimeError("Database not initialized. Call initialize_database() first.")
+    return _db_manager.get_async_cursor(commit=commit)
+
+async def close_async_database():
+    """Close the async pool of the global database manager."""
+    if _db_manager:
+        await _db_manager.close_async_pool()
+
 def execute_query(query: str, params=None, fetch: bool = False):
     """
     Execute a query using the global database manager.
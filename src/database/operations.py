@@ -438,6 +438,14 @@ def save_mining_participation(database_url, event_id, user_id, username, channel
         if 'conn' in locals():
             conn.close()
 
+def _invalidate_guild_config(guild_id):
+    """Drop the cached channel config so the next lookup sees the change."""
+    try:
+        from config.guild_cache import invalidate_guild_config
+        invalidate_guild_config(guild_id)
+    except ImportError:
+        pass
+
 def add_mining_channel(database_url, guild_id, channel_id, channel_name, description=None):
     """Add a mining channel to the database."""
     try:
@@ -465,6 +473,7 @@ def add_mining_channel(database_url, guild_id, channel_id, channel_name, descrip
             """, (str(guild_id), str(channel_id), channel_name, description))
             
             conn.commit()
+            _invalidate_guild_config(guild_id)
             print(f"✅ Added mining channel {channel_name} ({channel_id}) for guild {guild_id}")
             return True
             
@@ -508,6 +517,7 @@ def remove_mining_channel(database_url, guild_id, channel_id):
             """, (str(guild_id), str(channel_id)))
             
             conn.commit()
+            _invalidate_guild_config(guild_id)
             print(f"✅ Removed mining channel {channel_name} ({channel_id}) from guild {guild_id}")
             return True
             
@@ -0,0 +1,245 @@
+"""
+Slow Query Log
+
+Opt-in per-statement timing for get_cursor(), execute_query() and
+get_async_cursor(). Each statement is fingerprinted (literals and
+parameters replaced by '?'), its duration and row count are aggregated
+per fingerprint, and statements slower than the threshold are logged.
+A sample of slow statements is also run through EXPLAIN inside a
+savepoint: read-only statements use EXPLAIN (ANALYZE, BUFFERS), and
+writes get a plan only so they are never executed twice.
+
+Enable with environment variables:
+    DB_QUERY_LOG=1               turn the log on (off by default)
+    DB_SLOW_QUERY_MS=250         slow threshold in milliseconds
+    DB_EXPLAIN_SAMPLE_RATE=0.1   share of slow statements to EXPLAIN
+
+Usage:
+    from database.query_log import get_query_log
+
+    get_query_log().top(10, order_by='total')   # aggregated stats
+    get_query_log().enable(slow_ms=100)          # at runtime
+"""
+
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from utils.instrumentation import statement_name
+
+logger = logging.getLogger(__name__)
+
+MAX_FINGERPRINTS = 500
+EXPLAIN_COOLDOWN_SECONDS = 300
+MAX_PLAN_CHARS = 4000
+
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'(?<![\w$])-?\d+(?:\.\d+)?\b')
+_PARAMS = re.compile(r'%s|\$\d+')
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_READ_ONLY = re.compile(r'^\s*(SELECT|WITH|VALUES|TABLE)\b', re.IGNORECASE)
+_WRITES = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE)\b', re.IGNORECASE)
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Normalized statement text: no comments, literals or parameters."""
+    text = _COMMENTS.sub(' ', query)
+    text = _STRINGS.sub('?', text)
+    text = _PARAMS.sub('?', text)
+    text = _NUMBERS.sub('?', text)
+    text = _IN_LISTS.sub('(...)', text)
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+def is_read_only(query: str) -> bool:
+    """Safe to EXPLAIN ANALYZE (executing it again changes nothing)."""
+    return bool(_READ_ONLY.match(query)) and not _WRITES.search(_STRINGS.sub('', query))
+
+@dataclass
+class QueryStat:
+    """Aggregated timings for one statement fingerprint."""
+    fingerprint: str
+    name: str
+    calls: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    rows: int = 0
+    slow: int = 0
+    last_plan: Optional[str] = None
+    last_explained: float = 0.0
+    last_seen: float = field(default_factory=time.time)
+
+    @property
+    def id(self) -> str:
+        return hashlib.sha1(self.fingerprint.encode()).hexdigest()[:10]
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'calls': self.calls,
+            'total_ms': round(self.total_s * 1000, 2),
+            'mean_ms': round(self.mean_s * 1000, 3),
+            'max_ms': round(self.max_s * 1000, 2),
+            'rows': self.rows,
+            'slow': self.slow,
+            'fingerprint': self.fingerprint,
+            'has_plan': self.last_plan is not None,
+        }
+
+class QueryLog:
+    """Per-fingerprint statement statistics with slow-query logging."""
+
+    ORDERINGS = {
+        'total': lambda stat: stat.total_s,
+        'mean': lambda stat: stat.mean_s,
+        'max': lambda stat: stat.max_s,
+        'calls': lambda stat: stat.calls,
+    }
+
+    def __init__(self, enabled: Optional[bool] = None, slow_ms: Optional[float] = None, explain_rate: Optional[float] = None):
+        if enabled is None:
+            enabled = os.getenv('DB_QUERY_LOG', '').lower() in ('1', 'true', 'yes', 'on')
+        self.enabled = enabled
+        self.slow_s = (slow_ms if slow_ms is not None else float(os.getenv('DB_SLOW_QUERY_MS', '250'))) / 1000
+        self.explain_rate = explain_rate if explain_rate is not None else float(os.getenv('DB_EXPLAIN_SAMPLE_RATE', '0.1'))
+        self.started_at = time.time()
+        self._stats: Dict[str, QueryStat] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, slow_ms: Optional[float] = None, explain_rate: Optional[float] = None):
+        """Turn the log on at runtime, optionally changing its thresholds."""
+        if slow_ms is not None:
+            self.slow_s = slow_ms / 1000
+        if explain_rate is not None:
+            self.explain_rate = explain_rate
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Drop all aggregated statistics."""
+        with self._lock:
+            self._stats.clear()
+        self.started_at = time.time()
+
+    def record(self, query: str, duration: float, rowcount: int) -> Optional[QueryStat]:
+        """
+        Aggregate one execution.
+
+        Returns the stat when the statement was slow and should be EXPLAINed
+        (sampled and not explained recently), otherwise None.
+        """
+        key = fingerprint(query)
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                if len(self._stats) >= MAX_FINGERPRINTS:
+                    del self._stats[min(self._stats, key=lambda k: self._stats[k].total_s)]
+                stat = self._stats[key] = QueryStat(key, statement_name(query))
+            stat.calls += 1
+            stat.total_s += duration
+            stat.max_s = max(stat.max_s, duration)
+            stat.rows += max(rowcount, 0)
+            stat.last_seen = time.time()
+
+            if duration < self.slow_s:
+                return None
+            stat.slow += 1
+
+        logger.warning(f"Slow query {duration * 1000:.1f}ms [{stat.name} {stat.id}] rows={rowcount}: {key[:500]}")
+        now = time.time()
+        if random.random() < self.explain_rate and now - stat.last_explained > EXPLAIN_COOLDOWN_SECONDS:
+            stat.last_explained = now
+            return stat
+        return None
+
+    def store_plan(self, stat: QueryStat, plan_lines: List[str]):
+        plan = '\n'.join(plan_lines)[:MAX_PLAN_CHARS]
+        stat.last_plan = plan
+        logger.warning(f"Plan for slow query [{stat.name} {stat.id}]:\n{plan}")
+
+    def top(self, n: int = 10, order_by: str = 'total') -> List[QueryStat]:
+        """The n heaviest fingerprints by total, mean or max time, or calls."""
+        key = self.ORDERINGS.get(order_by, self.ORDERINGS['total'])
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=key, reverse=True)[:n]
+
+    def find(self, stat_id: str) -> Optional[QueryStat]:
+        with self._lock:
+            return next((stat for stat in self._stats.values() if stat.id == stat_id), None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = list(self._stats.values())
+        return {
+            'enabled': self.enabled,
+            'slow_ms': self.slow_s * 1000,
+            'explain_rate': self.explain_rate,
+            'since': self.started_at,
+            'fingerprints': len(stats),
+            'calls': sum(stat.calls for stat in stats),
+            'slow': sum(stat.slow for stat in stats),
+            'total_ms': round(sum(stat.total_s for stat in stats) * 1000, 2),
+        }
+
+
+def explain_statement(query: str) -> str:
+    prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if is_read_only(query) else 'EXPLAIN '
+    return prefix + query
+
+def explain_sync(log: QueryLog, stat: QueryStat, connection, query, params):
+    """EXPLAIN on the caller's psycopg2 connection, isolated by a savepoint."""
+    from psycopg2.extensions import cursor as plain_cursor
+
+    try:
+        # A plain cursor, so the EXPLAIN itself is not timed or logged
+        with connection.cursor(cursor_factory=plain_cursor) as cursor:
+            cursor.execute('SAVEPOINT query_log_explain')
+            try:
+                cursor.execute(explain_statement(query), params)
+                plan_lines = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute('ROLLBACK TO SAVEPOINT query_log_explain')
+        log.store_plan(stat, plan_lines)
+    except Exception as e:
+        logger.debug(f"EXPLAIN failed for [{stat.name} {stat.id}]: {e}")
+
+class _RollbackExplain(Exception):
+    """Raised to roll back the EXPLAIN savepoint after reading the plan."""
+
+async def explain_async(log: QueryLog, stat: QueryStat, connection, sql: str, args):
+    """EXPLAIN on the caller's asyncpg connection, isolated by a savepoint."""
+    try:
+        async with connection.transaction():   # nested: a savepoint
+            records = await connection.fetch(explain_statement(sql), *args)
+            plan_lines = [record[0] for record in records]
+            raise _RollbackExplain
+    except _RollbackExplain:
+        log.store_plan(stat, plan_lines)
+    except Exception as e:
+        logger.debug(f"EXPLAIN failed for [{stat.name} {stat.id}]: {e}")
+
+# Global query log
+_query_log: Optional[QueryLog] = None
+
+def get_query_log() -> QueryLog:
+    """Get the global query log (disabled unless DB_QUERY_LOG is set)."""
+    global _query_log
+    if _query_log is None:
+        _query_log = QueryLog()
+    return _query_log
@@ -0,0 +1,153 @@
+"""
+Named Statement Registry
+
+The hot SQL of the participation, event and payroll paths, defined once
+under stable names. asyncpg prepares a statement on first use per pooled
+connection and caches it by exact text. Keeping these statements
+byte-identical on every call (no per-call f-strings or variable-length
+VALUES lists) means each is parsed and planned once per connection, and
+never pushed out of the cache by one-off variants.
+
+Statement is a str subclass, so constants work unchanged with both
+get_cursor() and get_async_cursor(); the name labels query metrics and
+the slow query log.
+
+Usage:
+    from database.statements import EVENT_BY_ID
+
+    async with get_async_cursor() as cursor:
+        await cursor.execute(EVENT_BY_ID, (event_id,))
+
+Modules can register their own SQL constants with register().
+"""
+
+from typing import Dict, List
+
+class Statement(str):
+    """SQL text carrying a registry name."""
+    name: str
+
+    def __new__(cls, name: str, sql: str):
+        statement = super().__new__(cls, sql)
+        statement.name = name
+        return statement
+
+_registry: Dict[str, Statement] = {}
+
+def register(name: str, sql: str) -> Statement:
+    """Register a named statement; re-registering a name must not change its SQL."""
+    existing = _registry.get(name)
+    if existing is not None:
+        if existing != sql:
+            raise ValueError(f"Statement {name} is already registered with different SQL")
+        return existing
+    statement = _registry[name] = Statement(name, sql)
+    return statement
+
+def get_statement(name: str) -> Statement:
+    return _registry[name]
+
+def registered_statements() -> List[Statement]:
+    return list(_registry.values())
+
+
+# ----------------------------------------------------------------------
+# Participation
+# ----------------------------------------------------------------------
+
+# One statement for every batch size: rows are passed as parallel arrays
+INSERT_PARTICIPATION_BATCH = register('participation.insert_batch', """
+    INSERT INTO participation (
+        event_id, user_id, username, display_name,
+        channel_id, channel_name, joined_at, left_at,
+        duration_minutes, is_org_member
+    )
+    SELECT * FROM UNNEST(
+        %s::text[], %s::bigint[], %s::text[], %s::text[],
+        %s::bigint[], %s::text[], %s::timestamp[], %s::timestamp[],
+        %s::integer[], %s::boolean[]
+    )
+    ON CONFLICT (event_id, user_id) WHERE left_at IS NULL DO NOTHING
+""")
+
+CLOSE_PARTICIPATION_BATCH = register('participation.close_batch', """
+    UPDATE participation p
+    SET left_at = v.left_at,
+        duration_minutes = EXTRACT(EPOCH FROM (v.left_at - p.joined_at))/60,
+        updated_at = v.left_at
+    FROM UNNEST(%s::text[], %s::bigint[], %s::timestamp[]) AS v(event_id, user_id, left_at)
+    WHERE p.event_id = v.event_id
+    AND p.user_id = v.user_id
+    AND p.left_at IS NULL
+""")
+
+PARTICIPANT_COUNT = register('participation.count', """
+    SELECT COUNT(DISTINCT user_id) as participant_count
+    FROM participation
+    WHERE event_id = %s
+""")
+
+PARTICIPATION_STATS = register('participation.stats', """
+    SELECT
+        COUNT(DISTINCT user_id) as current_participants,
+        COUNT(DISTINCT CASE WHEN left_at IS NULL THEN user_id END) as active_participants
+    FROM participation
+    WHERE event_id = %s
+""")
+
+PARTICIPATION_INTERVALS = register('participation.intervals', """
+    SELECT joined_at, left_at, channel_id
+    FROM participation
+    WHERE event_id = %s
+""")
+
+# ----------------------------------------------------------------------
+# Events
+# ----------------------------------------------------------------------
+
+EVENT_BY_ID = register('events.by_id', """
+    SELECT * FROM events WHERE event_id = %s
+""")
+
+ACTIVE_MINING_EVENT = register('events.active_mining', """
+    SELECT * FROM events
+    WHERE guild_id = %s
+    AND event_type = 'mining'
+    AND status = 'open'
+    ORDER BY started_at DESC
+    LIMIT 1
+""")
+
+INSERT_EVENT = register('events.insert', """
+    INSERT INTO events (
+        event_id, guild_id, event_type, event_name,
+        organizer_id, organizer_name, started_at, status,
+        system_location, planet_moon, location_notes, description
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+    ) RETURNING *
+""")
+
+CLOSE_EVENT = register('events.close', """
+    UPDATE events
+    SET status = 'closed',
+        ended_at = %s,
+        updated_at = %s
+    WHERE event_id = %s
+    AND status = 'open'
+    RETURNING *
+""")
+
+EVENT_TIMES = register('events.times', """
+    SELECT started_at, ended_at, total_participants, total_duration_minutes
+    FROM events
+    WHERE event_id = %s
+""")
+
+FINALIZE_EVENT_STATS = register('events.finalize_stats', """
+    UPDATE events
+    SET total_participants = %s,
+        total_duration_minutes = %s,
+        max_concurrent = %s
+    WHERE event_id = %s
+""")
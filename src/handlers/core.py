@@ -135,10 +135,14 @@ async def setup_core_handlers(bot):
             print("✅ Bot startup sequence completed - bot should remain running")
             
             # Start a simple heartbeat task to verify bot is still alive
+            from utils.instrumentation import get_loop_lag, start_loop_lag_monitor
+            start_loop_lag_monitor()
+            
             async def heartbeat():
                 while True:
                     await asyncio.sleep(300)  # Every 5 minutes
-                    print(f"💓 Heartbeat: Bot is still running at {datetime.now()}")
+                    lag = get_loop_lag()
+                    print(f"💓 Heartbeat: Bot is still running at {datetime.now()} (loop lag {lag['last_ms']}ms, p99 {lag['p99_ms']}ms)")
             
             # Start heartbeat task
             bot.heartbeat_task = asyncio.create_task(heartbeat())  # Store reference to prevent GC
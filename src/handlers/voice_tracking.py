@@ -7,8 +7,11 @@ This module handles voice state updates and member tracking for events.
 import discord
 from discord.ext import tasks
 import asyncio
+import time
 from datetime import datetime, timedelta
 
+from utils.instrumentation import VOICE_HANDLER_DURATION
+
 
 # Global variables for tracking voice state
 active_voice_channels = {}
@@ -427,7 +430,11 @@ async def setup(bot):
     # Register the voice state update handler
     @bot.event
     async def on_voice_state_update(member, before, after):
-        await _handle_voice_state_update(member, before, after)
+        started = time.perf_counter()
+        try:
+            await _handle_voice_state_update(member, before, after)
+        finally:
+            VOICE_HANDLER_DURATION.observe(time.perf_counter() - started, 'legacy')
     
     # Start the logging task
     if not log_members.is_running():
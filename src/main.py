@@ -12,7 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from bot import RedLegionBot
 from database_init import init_database_for_deployment
-from config.settings import get_database_url
+from config.settings import get_database_url, prefetch_startup_secrets
 
 def setup_logging():
     """Set up logging to both console and file."""
@@ -75,6 +75,9 @@ def main():
     # Create PID file for monitoring
     create_pid_file()
     
+    # Start Secret Manager lookups while the rest of startup runs
+    prefetch_startup_secrets()
+    
     # Initialize database
     try:
         db_url = get_database_url()
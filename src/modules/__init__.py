@@ -7,10 +7,12 @@ Each module handles a complete domain (mining, payroll, etc.) with all related f
 
 from . import mining
 from . import payroll
+from . import lottery
 
 __all__ = [
     'mining',
     'payroll',
+    'lottery',
 ]
 
 __version__ = '2.0.0'
\ No newline at end of file
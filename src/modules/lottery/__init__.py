@@ -0,0 +1,18 @@
+"""
+Lottery Module for Red Legion Bot
+
+Org member rewards drawn from event participation:
+- Set-based eligibility from participation and member_stats
+- Ticket-weighted drawing without replacement (Fenwick tree, O(k log n))
+- Seeded, reproducible drawings with an audit digest
+"""
+
+from .core import LotteryManager
+from .drawing import TicketTree, DrawResult, draw_winners
+
+__all__ = [
+    'LotteryManager',
+    'TicketTree',
+    'DrawResult',
+    'draw_winners',
+]
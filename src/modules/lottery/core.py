@@ -0,0 +1,192 @@
+"""
+Lottery Manager
+
+Builds lottery entries from participation and member_stats and draws
+winners for the lottery_events / lottery_entries tables.
+
+Eligibility is one set-based query per lottery; tickets are one per
+qualifying event ("more events = more tickets").
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from database.connection import get_async_cursor
+from .drawing import draw_winners
+
+logger = logging.getLogger(__name__)
+
+# Replace a lottery's entries with everyone who currently qualifies.
+# Rules come from lottery_events: event types, date range, org-only,
+# minimum qualifying events and minimum org tenure. Nothing records an org
+# join date yet, so tenure falls back to the member's first event as an org
+# member (member_stats, then participation, then first org event).
+BUILD_ENTRIES_SQL = """
+    WITH lottery AS (
+        SELECT *
+        FROM lottery_events
+        WHERE lottery_id = %s
+    ),
+    qualifying AS (
+        SELECT p.user_id,
+               (ARRAY_AGG(p.username ORDER BY p.joined_at DESC))[1] AS username,
+               COUNT(DISTINCT p.event_id) AS events_qualifying,
+               MIN(p.org_join_date) AS org_join_date,
+               BOOL_OR(COALESCE(p.is_org_member, false)) AS was_org_member
+        FROM lottery l
+        JOIN events e
+          ON e.guild_id = l.guild_id
+         AND e.status = 'closed'
+         AND (l.eligible_event_types IS NULL OR e.event_type = ANY(l.eligible_event_types))
+         AND (l.date_range_start IS NULL OR e.started_at >= l.date_range_start)
+         AND (l.date_range_end IS NULL OR e.started_at < l.date_range_end + 1)
+        JOIN participation p
+          ON p.event_id = e.event_id
+         AND (NOT COALESCE(l.org_members_only, true) OR COALESCE(p.is_org_member, false))
+        GROUP BY p.user_id
+    ),
+    first_org_event AS (
+        SELECT p.user_id, MIN(p.joined_at)::date AS first_org_event
+        FROM participation p
+        JOIN qualifying q ON q.user_id = p.user_id
+        WHERE COALESCE(p.is_org_member, false)
+        GROUP BY p.user_id
+    )
+    INSERT INTO lottery_entries (lottery_id, user_id, username, ticket_count, events_qualifying)
+    SELECT l.lottery_id, q.user_id, COALESCE(ms.username, q.username),
+           q.events_qualifying, q.events_qualifying
+    FROM qualifying q
+    CROSS JOIN lottery l
+    LEFT JOIN member_stats ms ON ms.user_id = q.user_id
+    LEFT JOIN first_org_event f ON f.user_id = q.user_id
+    WHERE q.events_qualifying >= COALESCE(l.min_events_required, 1)
+      AND (NOT COALESCE(l.org_members_only, true)
+           OR COALESCE(ms.is_current_org_member, q.was_org_member))
+      AND (COALESCE(l.min_org_tenure_days, 0) <= 0
+           OR COALESCE(ms.org_join_date, q.org_join_date, f.first_org_event)
+              <= COALESCE(l.drawing_date::date, CURRENT_DATE) - l.min_org_tenure_days)
+    ORDER BY q.user_id
+    RETURNING user_id
+"""
+
+class LotteryManager:
+    """
+    Manages lottery entries and drawings.
+
+    Usage:
+        manager = LotteryManager()
+        await manager.build_entries('lot-x7k2m9')
+        result = await manager.draw('lot-x7k2m9', winner_count=3)
+    """
+
+    async def build_entries(self, lottery_id: str) -> Dict:
+        """Recompute a lottery's entries from its eligibility rules."""
+        try:
+            async with get_async_cursor() as cursor:
+                await cursor.execute("""
+                    SELECT status FROM lottery_events WHERE lottery_id = %s
+                """, (lottery_id,))
+                lottery = cursor.fetchone()
+                if not lottery:
+                    return {'success': False, 'error': 'Lottery not found'}
+                if lottery['status'] == 'drawn':
+                    return {'success': False, 'error': 'Lottery has already been drawn'}
+
+                await cursor.execute("DELETE FROM lottery_entries WHERE lottery_id = %s", (lottery_id,))
+                await cursor.execute(BUILD_ENTRIES_SQL, (lottery_id,))
+                entrants = cursor.rowcount
+
+            logger.info(f"Built {entrants} entries for lottery {lottery_id}")
+            return {
+                'success': True,
+                'entrants': entrants
+            }
+
+        except Exception as e:
+            logger.error(f"Error building lottery entries for {lottery_id}: {e}")
+            return {'success': False, 'error': str(e)}
+
+    async def draw(
+        self,
+        lottery_id: str,
+        winner_count: int = 1,
+        seed: Optional[str] = None
+    ) -> Dict:
+        """
+        Draw winners from a lottery's entries and mark it drawn.
+
+        The returned seed and entries digest reproduce the drawing with
+        drawing.draw_winners() against the same entry list.
+        """
+        try:
+            async with get_async_cursor() as cursor:
+                # Lock the lottery row so two officers can't draw at once
+                await cursor.execute("""
+                    SELECT lottery_id, status FROM lottery_events
+                    WHERE lottery_id = %s
+                    FOR UPDATE
+                """, (lottery_id,))
+                lottery = cursor.fetchone()
+                if not lottery:
+                    return {'success': False, 'error': 'Lottery not found'}
+                if lottery['status'] == 'drawn':
+                    return {'success': False, 'error': 'Lottery has already been drawn'}
+
+                await cursor.execute("""
+                    SELECT user_id, username, ticket_count
+                    FROM lottery_entries
+                    WHERE lottery_id = %s AND ticket_count > 0
+                    ORDER BY user_id
+                """, (lottery_id,))
+                entries = cursor.fetchall()
+                if not entries:
+                    return {'success': False, 'error': 'Lottery has no eligible entries'}
+
+                result = draw_winners(
+                    lottery_id,
+                    [entry['user_id'] for entry in entries],
+                    [entry['ticket_count'] for entry in entries],
+                    winner_count=winner_count,
+                    seed=seed
+                )
+                winners = [
+                    {
+                        'user_id': entries[index]['user_id'],
+                        'username': entries[index]['username'],
+                        'ticket_count': entries[index]['ticket_count']
+                    }
+                    for index in result.winners
+                ]
+
+                # lottery_events holds the first-drawn (grand prize) winner
+                await cursor.execute("""
+                    UPDATE lottery_events
+                    SET status = 'drawn',
+                        drawing_date = %s,
+                        winner_user_id = %s,
+                        winner_username = %s
+                    WHERE lottery_id = %s
+                """, (datetime.now(), winners[0]['user_id'], winners[0]['username'], lottery_id))
+
+            logger.info(
+                f"Drew lottery {lottery_id}: winners={[w['user_id'] for w in winners]} "
+                f"seed={result.seed} entries_digest={result.entries_digest}"
+            )
+            return {
+                'success': True,
+                'winners': winners,
+                'seed': result.seed,
+                'entries_digest': result.entries_digest,
+                'entrants': len(entries),
+                'total_tickets': result.total_tickets
+            }
+
+        except Exception as e:
+            logger.error(f"Error drawing lottery {lottery_id}: {e}")
+            return {'success': False, 'error': str(e)}
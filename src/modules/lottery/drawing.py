@@ -0,0 +1,127 @@
+"""
+Weighted Lottery Drawing
+
+Draws winners without replacement, weighted by ticket count. Tickets are
+held in a Fenwick (binary indexed) tree of cumulative counts, so each draw
+is a prefix-sum search plus one removal: O(n) to build and O(k log n) for
+k winners, instead of rebuilding a cumulative list after every winner.
+
+Draws are reproducible: the RNG is seeded from the lottery id, a digest
+of the entry list and a drawing seed, all of which are returned for audit.
+"""
+
+import hashlib
+import itertools
+import random
+import secrets
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+@dataclass
+class DrawResult:
+    """Winners of a drawing plus everything needed to re-run it."""
+    winners: List[int]                      # Indices into the entry list, in draw order
+    seed: str                               # Drawing seed (hex)
+    entries_digest: str                     # sha256 of (user_id, tickets) in entry order
+    total_tickets: int
+    ticket_snapshots: List[int] = field(default_factory=list)  # Tickets left before each draw
+
+class TicketTree:
+    """Fenwick tree over ticket counts with weighted sampling."""
+
+    __slots__ = ('_size', '_tree', '_tickets', '_top')
+
+    def __init__(self, tickets: Sequence[int]):
+        self._size = len(tickets)
+        self._tickets = [max(0, int(t)) for t in tickets]
+
+        # O(n) build: node i covers (i - lowbit(i), i], i.e. a difference of
+        # two plain prefix sums
+        prefix = [0, *itertools.accumulate(self._tickets)]
+        self._tree = [prefix[i] - prefix[i - (i & -i)] for i in range(self._size + 1)]
+
+        self._top = 1 << self._size.bit_length() if self._size else 0
+
+    @property
+    def total(self) -> int:
+        """Tickets still in the drum."""
+        return self.prefix(self._size)
+
+    def prefix(self, count: int) -> int:
+        """Sum of tickets for the first `count` entries."""
+        total = 0
+        while count > 0:
+            total += self._tree[count]
+            count -= count & -count
+        return total
+
+    def find(self, ticket: int) -> int:
+        """Index of the entry holding the given 0-based ticket number."""
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and self._tree[nxt] <= ticket:
+                pos = nxt
+                ticket -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+    def remove(self, index: int) -> int:
+        """Take all of an entry's tickets out of the drum; returns how many."""
+        count = self._tickets[index]
+        if not count:
+            return 0
+        self._tickets[index] = 0
+        i = index + 1
+        while i <= self._size:
+            self._tree[i] -= count
+            i += i & -i
+        return count
+
+def entries_digest(user_ids: Sequence[int], tickets: Sequence[int]) -> str:
+    """Stable fingerprint of the entry list a drawing ran against."""
+    canonical = ";".join(f"{int(user_id)}:{int(count)}" for user_id, count in zip(user_ids, tickets))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def seeded_rng(lottery_id: str, digest: str, seed: str) -> random.Random:
+    """RNG derived from the lottery, its entries and the drawing seed."""
+    material = hashlib.sha256(f"{lottery_id}|{digest}|{seed}".encode()).digest()
+    return random.Random(int.from_bytes(material, 'big'))
+
+def draw_winners(
+    lottery_id: str,
+    user_ids: Sequence[int],
+    tickets: Sequence[int],
+    winner_count: int = 1,
+    seed: Optional[str] = None
+) -> DrawResult:
+    """
+    Draw distinct winners weighted by tickets.
+
+    Args:
+        lottery_id: Lottery being drawn (part of the RNG seed)
+        user_ids: Entrant user ids, in a stable order (e.g. sorted)
+        tickets: Ticket count per entrant
+        winner_count: Number of distinct winners to draw
+        seed: Drawing seed; a random one is generated and returned if omitted
+
+    Returns:
+        DrawResult; the same inputs and seed always give the same winners
+    """
+    seed = seed or secrets.token_hex(16)
+    digest = entries_digest(user_ids, tickets)
+    rng = seeded_rng(lottery_id, digest, seed)
+
+    tree = TicketTree(tickets)
+    total = tree.total
+    result = DrawResult(winners=[], seed=seed, entries_digest=digest, total_tickets=total)
+
+    remaining = total
+    while remaining > 0 and len(result.winners) < winner_count:
+        result.ticket_snapshots.append(remaining)
+        index = tree.find(rng.randrange(remaining))
+        result.winners.append(index)
+        remaining -= tree.remove(index)
+
+    return result
@@ -12,8 +12,10 @@ Core voice tracking functionality remains active.
 
 from .events import MiningEventManager
 from .participation import VoiceTracker
+from .member_stats import rebuild_member_stats
 
 __all__ = [
     'MiningEventManager',
     'VoiceTracker',
+    'rebuild_member_stats',
 ]
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Participation Concurrency Engine
+
+Sweep-line computation of how many members were in tracked voice channels
+at the same time. Join and leave boundaries are sorted once, so peak
+concurrency, a concurrency-over-time histogram and per-channel peaks all
+come out of a single O(n log n) pass.
+
+The same sweep is available as window-function SQL for callers that only
+need the peak and should not pull every participation row.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database.statements import register
+
+# Leaves sort before joins at the same instant, so a channel switch
+# (leave + join at one timestamp) never counts a member twice.
+LEAVE = -1
+JOIN = 1
+
+# Window-function form of the sweep. Open rows (left_at IS NULL) contribute
+# a join boundary only, which is all the peak needs.
+MAX_CONCURRENT_SQL = register('events.max_concurrent', """
+    WITH boundaries AS (
+        SELECT joined_at AS t, 1 AS delta
+        FROM participation
+        WHERE event_id = %s AND joined_at IS NOT NULL
+        UNION ALL
+        SELECT left_at AS t, -1 AS delta
+        FROM participation
+        WHERE event_id = %s AND joined_at IS NOT NULL AND left_at IS NOT NULL
+    )
+    SELECT COALESCE(MAX(concurrent), 0) AS max_concurrent
+    FROM (
+        SELECT SUM(delta) OVER (ORDER BY t, delta ROWS UNBOUNDED PRECEDING) AS concurrent
+        FROM boundaries
+    ) running
+""")
+
+@dataclass
+class ConcurrencyStats:
+    """Result of a concurrency sweep over one event's participation."""
+    max_concurrent: int = 0
+    peak_at: Optional[datetime] = None
+    channel_peaks: Dict[int, int] = field(default_factory=dict)
+    histogram: List[Tuple[datetime, int]] = field(default_factory=list)  # [(bucket_start, peak in bucket)]
+
+def _boundaries(rows: Iterable, now: datetime) -> List[Tuple[datetime, int, Optional[int]]]:
+    """Expand participation rows into (time, delta, channel_id) boundaries."""
+    points = []
+    for row in rows:
+        joined_at = row['joined_at']
+        if joined_at is None:
+            continue
+        left_at = row.get('left_at') or now
+        channel_id = row.get('channel_id')
+        points.append((joined_at, JOIN, channel_id))
+        points.append((left_at, LEAVE, channel_id))
+    points.sort(key=lambda point: (point[0], point[1]))
+    return points
+
+def compute_concurrency(
+    rows: Iterable,
+    now: Optional[datetime] = None,
+    bucket_minutes: int = 5
+) -> ConcurrencyStats:
+    """
+    Run the sweep line over participation rows.
+
+    Args:
+        rows: Mappings with 'joined_at', 'left_at' and optional 'channel_id'
+        now: End time used for still-open rows (defaults to datetime.now())
+        bucket_minutes: Histogram bucket width; 0 disables the histogram
+
+    Returns:
+        ConcurrencyStats with peak, peak time, per-channel peaks and histogram
+    """
+    now = now or datetime.now()
+    points = _boundaries(rows, now)
+    stats = ConcurrencyStats()
+    if not points:
+        return stats
+
+    bucket = timedelta(minutes=bucket_minutes) if bucket_minutes > 0 else None
+    bucket_start = points[0][0]
+    bucket_peak = 0
+
+    running = 0
+    prev_t = points[0][0]
+    channel_running: Dict[Optional[int], int] = {}
+
+    for t, delta, channel_id in points:
+        if bucket and t > prev_t:
+            # `running` held over [prev_t, t); credit every bucket it overlaps
+            bucket_peak = max(bucket_peak, running)
+            while t >= bucket_start + bucket:
+                stats.histogram.append((bucket_start, bucket_peak))
+                bucket_start += bucket
+                bucket_peak = running if t > bucket_start else 0
+        prev_t = t
+
+        running += delta
+        channel_count = channel_running.get(channel_id, 0) + delta
+        channel_running[channel_id] = channel_count
+
+        if running > stats.max_concurrent:
+            stats.max_concurrent = running
+            stats.peak_at = t
+        if channel_id is not None and channel_count > stats.channel_peaks.get(channel_id, 0):
+            stats.channel_peaks[channel_id] = channel_count
+
+    # The final bucket only counts if some interval actually fell inside it
+    if bucket and prev_t > bucket_start:
+        stats.histogram.append((bucket_start, bucket_peak))
+
+    return stats
@@ -15,7 +15,13 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from config.settings import get_database_url
-from database.connection import get_cursor
+from database.connection import get_async_cursor
+from database.statements import (
+    ACTIVE_MINING_EVENT, CLOSE_EVENT, EVENT_TIMES, FINALIZE_EVENT_STATS, INSERT_EVENT,
+    PARTICIPANT_COUNT, PARTICIPATION_INTERVALS, PARTICIPATION_STATS
+)
+from .concurrency import MAX_CONCURRENT_SQL, compute_concurrency
+from .member_stats import fold_event_into_member_stats
 
 logger = logging.getLogger(__name__)
 
@@ -27,10 +33,14 @@ class MiningEventManager:
     - event_id: Prefixed ID like 'sm-a7k2m9' 
     - event_type: 'mining'
     - status: 'open' or 'closed'
+    
+    With a voice_tracker, closing an event first stops its tracking and
+    flushes the participation journal, so the close sees every row.
     """
     
-    def __init__(self):
+    def __init__(self, voice_tracker=None):
         self.db_url = get_database_url()
+        self.voice_tracker = voice_tracker
     
     async def create_event(
         self,
@@ -68,17 +78,9 @@ class MiningEventManager:
                 else:
                     planet_moon = location
             
-            with get_cursor() as cursor:
+            async with get_async_cursor() as cursor:
                 # Insert into unified events table
-                cursor.execute("""
-                    INSERT INTO events (
-                        event_id, guild_id, event_type, event_name,
-                        organizer_id, organizer_name, started_at, status,
-                        system_location, planet_moon, location_notes, description
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    ) RETURNING *
-                """, (
+                await cursor.execute(INSERT_EVENT, (
                     event_id,
                     guild_id,
                     'mining',
@@ -121,15 +123,8 @@ class MiningEventManager:
     async def get_active_event(self, guild_id: int) -> Optional[Dict]:
         """Get the currently active mining event for a guild."""
         try:
-            with get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM events 
-                    WHERE guild_id = %s 
-                    AND event_type = 'mining' 
-                    AND status = 'open'
-                    ORDER BY started_at DESC
-                    LIMIT 1
-                """, (guild_id,))
+            async with get_async_cursor() as cursor:
+                await cursor.execute(ACTIVE_MINING_EVENT, (guild_id,))
                 
                 row = cursor.fetchone()
                 return dict(row) if row else None
@@ -146,17 +141,22 @@ class MiningEventManager:
     ) -> Dict:
         """Close a mining event and calculate final stats."""
         try:
-            with get_cursor() as cursor:
+            # Participation may still be buffered in the write-behind journal;
+            # persist it before the final stats and member_stats fold read it
+            if self.voice_tracker:
+                if self.voice_tracker.get_roster(event_id) is not None:
+                    await self.voice_tracker.stop_tracking(event_id)
+                else:
+                    await self.voice_tracker.journal.flush()
+                if self.voice_tracker.journal.pending_count():
+                    return {
+                        'success': False,
+                        'error': 'Participation could not be saved yet, please try closing the event again'
+                    }
+            
+            async with get_async_cursor() as cursor:
                 # Update event status and end time
-                cursor.execute("""
-                    UPDATE events 
-                    SET status = 'closed',
-                        ended_at = %s,
-                        updated_at = %s
-                    WHERE event_id = %s 
-                    AND status = 'open'
-                    RETURNING *
-                """, (datetime.now(), datetime.now(), event_id))
+                await cursor.execute(CLOSE_EVENT, (datetime.now(), datetime.now(), event_id))
                 
                 updated_event = cursor.fetchone()
                 
@@ -167,41 +167,34 @@ class MiningEventManager:
                     }
                 
                 # Calculate final participation metrics
-                cursor.execute("""
-                    SELECT COUNT(DISTINCT user_id) as total_participants
-                    FROM participation 
-                    WHERE event_id = %s
-                """, (event_id,))
+                await cursor.execute(PARTICIPANT_COUNT, (event_id,))
                 
                 participation_stats = cursor.fetchone()
-                total_participants = participation_stats['total_participants'] if participation_stats else 0
-                
-                # Calculate event duration based on actual start/end times
-                cursor.execute("""
-                    SELECT started_at, ended_at
-                    FROM events
-                    WHERE event_id = %s
-                """, (event_id,))
+                total_participants = participation_stats['participant_count'] if participation_stats else 0
                 
-                event_times = cursor.fetchone()
+                # Calculate event duration from the start/end times RETURNING gave us
                 total_duration_minutes = 0
                 
-                if event_times and event_times['started_at'] and event_times['ended_at']:
-                    duration_seconds = (event_times['ended_at'] - event_times['started_at']).total_seconds()
+                if updated_event['started_at'] and updated_event['ended_at']:
+                    duration_seconds = (updated_event['ended_at'] - updated_event['started_at']).total_seconds()
                     total_duration_minutes = int(duration_seconds / 60)
                 
+                # Peak concurrency via sweep line over join/leave boundaries
+                await cursor.execute(MAX_CONCURRENT_SQL, (event_id, event_id))
+                concurrency_row = cursor.fetchone()
+                max_concurrent = concurrency_row['max_concurrent'] if concurrency_row else 0
+                
                 # Update the event with final stats
-                cursor.execute("""
-                    UPDATE events 
-                    SET total_participants = %s,
-                        total_duration_minutes = %s
-                    WHERE event_id = %s
-                """, (
+                await cursor.execute(FINALIZE_EVENT_STATS, (
                     total_participants,
                     total_duration_minutes,
+                    max_concurrent,
                     event_id
                 ))
                 
+                # Fold this event into member_stats in the same transaction
+                await fold_event_into_member_stats(cursor, event_id, updated_event['ended_at'].date())
+                
                 logger.info(f"Closed mining event {event_id} by {closed_by_name}")
                 
                 return {
@@ -219,36 +212,22 @@ class MiningEventManager:
     async def get_event_stats(self, event_id: str) -> Dict:
         """Get current statistics for a mining event."""
         try:
-            with get_cursor() as cursor:
+            async with get_async_cursor() as cursor:
                 # Get basic event info
-                cursor.execute("""
-                    SELECT started_at, ended_at, total_participants, total_duration_minutes
-                    FROM events 
-                    WHERE event_id = %s
-                """, (event_id,))
+                await cursor.execute(EVENT_TIMES, (event_id,))
                 
                 event_data = cursor.fetchone()
                 if not event_data:
                     return {}
                 
                 # Calculate current stats from participation table
-                cursor.execute("""
-                    SELECT 
-                        COUNT(DISTINCT user_id) as current_participants,
-                        COUNT(DISTINCT CASE WHEN left_at IS NULL THEN user_id END) as active_participants,
-                        COALESCE(MAX(
-                            SELECT COUNT(*)
-                            FROM participation p2 
-                            WHERE p2.event_id = %s 
-                            AND p2.joined_at <= p1.joined_at 
-                            AND (p2.left_at IS NULL OR p2.left_at >= p1.joined_at)
-                        ), 0) as max_concurrent
-                    FROM participation p1
-                    WHERE p1.event_id = %s
-                """, (event_id, event_id))
+                await cursor.execute(PARTICIPATION_STATS, (event_id,))
                 
                 participation_stats = cursor.fetchone()
                 
+                await cursor.execute(MAX_CONCURRENT_SQL, (event_id, event_id))
+                concurrency_row = cursor.fetchone()
+                
                 # Calculate duration
                 start_time = event_data['started_at']
                 end_time = event_data['ended_at'] or datetime.now()
@@ -257,7 +236,7 @@ class MiningEventManager:
                 return {
                     'total_participants': participation_stats['current_participants'] or 0,
                     'active_participants': participation_stats['active_participants'] or 0, 
-                    'max_concurrent': participation_stats['max_concurrent'] or 0,
+                    'max_concurrent': concurrency_row['max_concurrent'] if concurrency_row else 0,
                     'duration_minutes': duration_minutes,
                     'started_at': start_time.isoformat(),
                     'ended_at': end_time.isoformat() if event_data['ended_at'] else None
@@ -267,11 +246,39 @@ class MiningEventManager:
             logger.error(f"Error getting stats for event {event_id}: {e}")
             return {}
     
+    async def get_concurrency_profile(self, event_id: str, bucket_minutes: int = 5) -> Dict:
+        """
+        Get peak concurrency, per-channel peaks and a concurrency-over-time
+        histogram for an event.
+        
+        Participation rows are fetched once and swept in Python; for open
+        events, members still in channel are counted up to now.
+        """
+        try:
+            async with get_async_cursor(commit=False) as cursor:
+                await cursor.execute(PARTICIPATION_INTERVALS, (event_id,))
+                
+                stats = compute_concurrency(cursor.fetchall(), bucket_minutes=bucket_minutes)
+                
+                return {
+                    'max_concurrent': stats.max_concurrent,
+                    'peak_at': stats.peak_at.isoformat() if stats.peak_at else None,
+                    'channel_peaks': stats.channel_peaks,
+                    'histogram': [
+                        {'bucket_start': bucket_start.isoformat(), 'concurrent': count}
+                        for bucket_start, count in stats.histogram
+                    ]
+                }
+                
+        except Exception as e:
+            logger.error(f"Error getting concurrency profile for event {event_id}: {e}")
+            return {}
+    
     async def get_completed_events(self, guild_id: int, limit: int = 10) -> List[Dict]:
         """Get recently completed mining events for payroll processing."""
         try:
-            with get_cursor() as cursor:
-                cursor.execute("""
+            async with get_async_cursor() as cursor:
+                await cursor.execute("""
                     SELECT event_id, event_name, organizer_name, started_at, ended_at,
                            total_participants, total_duration_minutes, location_notes,
                            payroll_calculated
@@ -293,7 +300,7 @@ class MiningEventManager:
         """Fix duration calculations for events that have zero duration but should have duration."""
         try:
             fixed_count = 0
-            with get_cursor() as cursor:
+            async with get_async_cursor() as cursor:
                 # Find events with zero duration but valid start/end times
                 where_clause = "WHERE ended_at IS NOT NULL AND started_at IS NOT NULL AND (total_duration_minutes = 0 OR total_duration_minutes IS NULL)"
                 params = []
@@ -302,7 +309,7 @@ class MiningEventManager:
                     where_clause += " AND guild_id = %s"
                     params.append(guild_id)
                 
-                cursor.execute(f"""
+                await cursor.execute(f"""
                     SELECT event_id, started_at, ended_at
                     FROM events 
                     {where_clause}
@@ -316,7 +323,7 @@ class MiningEventManager:
                     duration_minutes = int(duration_seconds / 60)
                     
                     # Update the event
-                    cursor.execute("""
+                    await cursor.execute("""
                         UPDATE events 
                         SET total_duration_minutes = %s
                         WHERE event_id = %s
@@ -0,0 +1,509 @@
+"""
+Write-Behind Participation Journal
+
+Buffers voice join/leave events in memory and flushes them to the
+'participation' table in batches from a background task, so database
+latency never sits on the voice state update path.
+
+Every entry is also appended to a local spill file. If the bot crashes
+before a flush commits, the spill file is replayed on the next start.
+
+A batch that keeps failing on its data (e.g. an unknown event_id) is
+retried a few times, then written row group by row group inside
+savepoints; rows that still fail alone go to a dead-letter file so the
+rest of the batch commits.
+"""
+
+import sys
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+
+import asyncpg
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from database.connection import get_async_cursor
+from database.statements import CLOSE_PARTICIPATION_BATCH, INSERT_PARTICIPATION_BATCH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_PATH = os.getenv('PARTICIPATION_JOURNAL_PATH', '/app/participation_journal.jsonl')
+DEFAULT_DEAD_LETTER_PATH = os.getenv('PARTICIPATION_DEAD_LETTER_PATH', '/app/participation_dead_letter.jsonl')
+
+# Failed flushes of the same batch before its bad rows are isolated
+MAX_BATCH_FAILURES = 3
+
+# Rows per multi-row statement, keeps bind parameters well under PostgreSQL's 32767 limit
+STATEMENT_ROW_LIMIT = 1000
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _is_row_error(error: Exception) -> bool:
+    """
+    Whether an error comes from the rows themselves (constraint, type or
+    value errors) rather than the connection or server availability.
+    """
+    if isinstance(error, (
+        asyncpg.exceptions.PostgresConnectionError,
+        asyncpg.exceptions.InsufficientResourcesError,
+        asyncpg.exceptions.OperatorInterventionError
+    )):
+        return False
+    return isinstance(error, (asyncpg.PostgresError, TypeError, ValueError))
+
+@dataclass
+class JournalEntry:
+    """A single join or leave event waiting to be flushed."""
+    seq: int
+    kind: str  # 'join' or 'leave'
+    event_id: str
+    user_id: int
+    at: datetime
+    username: Optional[str] = None
+    display_name: Optional[str] = None
+    channel_id: Optional[int] = None
+    channel_name: Optional[str] = None
+    is_org_member: bool = False
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data['at'] = self.at.isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, line: str) -> 'JournalEntry':
+        data = json.loads(line)
+        data['at'] = datetime.fromisoformat(data['at'])
+        return cls(**data)
+
+class ParticipationJournal:
+    """
+    Append-only journal of participation changes with batched persistence.
+
+    Features:
+    - O(1) in-memory append on the voice event path
+    - Background flush at a bounded interval or when the batch fills up
+    - Multi-row INSERT for joins and UPDATE ... FROM (VALUES ...) for leaves
+    - Flush on shutdown and crash recovery from an on-disk spill file
+    - Bad rows isolated to a dead-letter file instead of blocking every flush
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 2.0,
+        max_batch: int = 500,
+        spill_path: Optional[str] = DEFAULT_SPILL_PATH,
+        dead_letter_path: Optional[str] = DEFAULT_DEAD_LETTER_PATH
+    ):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        self.batch_failures = 0  # Consecutive flushes of the pending batch that failed on its data
+        self.dead_lettered = 0
+
+        self._entries: List[JournalEntry] = []
+        self._open: set = set()  # {(event_id, user_id)} currently active
+        self._seq = 0
+        self._committed_seq = 0
+        self._spill_file = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # Voice event path (no I/O besides a local append)
+    # ------------------------------------------------------------------
+
+    def is_active(self, event_id: str, user_id: int) -> bool:
+        """Check whether a user has an open participation row for an event."""
+        return (event_id, user_id) in self._open
+
+    def record_join(
+        self,
+        event_id: str,
+        user_id: int,
+        username: str,
+        display_name: str,
+        channel_id: int,
+        channel_name: str,
+        joined_at: datetime,
+        is_org_member: bool
+    ) -> bool:
+        """
+        Journal a participant joining a tracked channel.
+
+        Returns:
+            False if the user already has an active row for this event
+        """
+        key = (event_id, user_id)
+        if key in self._open:
+            return False
+
+        self._open.add(key)
+        self._append(JournalEntry(
+            seq=self._next_seq(),
+            kind='join',
+            event_id=event_id,
+            user_id=user_id,
+            at=joined_at,
+            username=username,
+            display_name=display_name,
+            channel_id=channel_id,
+            channel_name=channel_name,
+            is_org_member=is_org_member
+        ))
+        return True
+
+    def record_joins(self, joins: List[Dict]) -> int:
+        """
+        Journal many joins at once (tracking start seeding).
+
+        Each dict takes record_join's arguments. Entries are appended with a
+        single spill file write, and the next flush inserts them all with one
+        statement.
+
+        Returns:
+            Number of joins journaled (users already active are skipped)
+        """
+        entries = []
+        for join in joins:
+            key = (join['event_id'], join['user_id'])
+            if key in self._open:
+                continue
+            self._open.add(key)
+            entries.append(JournalEntry(
+                seq=self._next_seq(),
+                kind='join',
+                event_id=join['event_id'],
+                user_id=join['user_id'],
+                at=join['joined_at'],
+                username=join['username'],
+                display_name=join['display_name'],
+                channel_id=join['channel_id'],
+                channel_name=join['channel_name'],
+                is_org_member=join['is_org_member']
+            ))
+        self._append_many(entries)
+        return len(entries)
+
+    def record_leave(self, event_id: str, user_id: int, left_at: datetime):
+        """Journal a participant leaving a tracked channel."""
+        self._open.discard((event_id, user_id))
+        self._append(JournalEntry(
+            seq=self._next_seq(),
+            kind='leave',
+            event_id=event_id,
+            user_id=user_id,
+            at=left_at
+        ))
+
+    def pending_count(self) -> int:
+        """Number of entries not yet flushed to the database."""
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Replay any spilled entries and start the background flush task."""
+        if self._running:
+            return
+
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._replay_spill_file()
+        self._open_spill_file()
+
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Participation journal started (interval: {self.flush_interval}s, batch: {self.max_batch})")
+
+    async def stop(self):
+        """Stop the background task and flush everything still pending."""
+        self._running = False
+        if self._task and not self._task.done():
+            # Let an in-flight flush finish rather than cancelling it mid-transaction
+            self._wakeup.set()
+            await self._task
+        self._task = None
+
+        await self.flush()
+
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+        logger.info("Participation journal stopped")
+
+    async def _flush_loop(self):
+        """Flush at most every flush_interval seconds, sooner if the batch fills."""
+        try:
+            while self._running:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Participation journal flush loop stopped: {e}")
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """
+        Write all pending entries to the database in one transaction.
+
+        Returns:
+            Number of journal entries flushed
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._entries:
+                return 0
+
+            batch, self._entries = self._entries, []
+            inserts, leaves = self._coalesce(batch)
+
+            isolate = self.batch_failures >= MAX_BATCH_FAILURES
+            failed_rows: List[Tuple[str, Any, Exception]] = []
+            try:
+                async with get_async_cursor() as cursor:
+                    # Close rows flushed by earlier batches before inserting new open rows
+                    for chunk in _chunks(leaves, STATEMENT_ROW_LIMIT):
+                        if isolate:
+                            failed_rows += await self._apply_isolating(cursor, 'leave', chunk, self._apply_leaves)
+                        else:
+                            await self._apply_leaves(cursor, chunk)
+                    for chunk in _chunks(inserts, STATEMENT_ROW_LIMIT):
+                        if isolate:
+                            failed_rows += await self._apply_isolating(cursor, 'insert', chunk, self._apply_inserts)
+                        else:
+                            await self._apply_inserts(cursor, chunk)
+            except Exception as e:
+                # Keep order: failed batch goes back in front of anything appended meanwhile
+                self._entries = batch + self._entries
+                if _is_row_error(e):
+                    self.batch_failures += 1
+                logger.error(
+                    f"Participation journal flush failed ({len(batch)} entries kept, "
+                    f"{self.batch_failures} data failures): {e}"
+                )
+                return 0
+
+            self.batch_failures = 0
+            if failed_rows:
+                self._dead_letter(failed_rows)
+            self._committed_seq = batch[-1].seq
+            self._compact_spill_file()
+            logger.debug(f"Flushed {len(batch)} journal entries ({len(inserts)} inserts, {len(leaves)} leaves)")
+            return len(batch)
+
+    def _coalesce(self, batch: List[JournalEntry]) -> Tuple[List[Dict], List[Tuple]]:
+        """
+        Fold a batch into final row states.
+
+        A join followed by a leave inside the same batch becomes one closed
+        INSERT. Leaves for rows written by earlier flushes become UPDATEs.
+        """
+        inserts: List[Dict] = []
+        pending: Dict[Tuple[str, int], Dict] = {}
+        leaves: Dict[Tuple[str, int], datetime] = {}
+
+        for entry in batch:
+            key = (entry.event_id, entry.user_id)
+            if entry.kind == 'join':
+                row = {
+                    'event_id': entry.event_id,
+                    'user_id': entry.user_id,
+                    'username': entry.username,
+                    'display_name': entry.display_name,
+                    'channel_id': entry.channel_id,
+                    'channel_name': entry.channel_name,
+                    'joined_at': entry.at,
+                    'left_at': None,
+                    'duration_minutes': None,
+                    'is_org_member': entry.is_org_member
+                }
+                pending[key] = row
+                inserts.append(row)
+            elif key in pending:
+                row = pending.pop(key)
+                row['left_at'] = entry.at
+                row['duration_minutes'] = int(round((entry.at - row['joined_at']).total_seconds() / 60))
+            elif key not in leaves:
+                leaves[key] = entry.at
+
+        return inserts, [(event_id, user_id, left_at) for (event_id, user_id), left_at in leaves.items()]
+
+    async def _apply_inserts(self, cursor, rows: List[Dict]):
+        """Insert all join rows with a single UNNEST INSERT (one prepared statement for any batch size)."""
+        columns = (
+            'event_id', 'user_id', 'username', 'display_name', 'channel_id',
+            'channel_name', 'joined_at', 'left_at', 'duration_minutes', 'is_org_member'
+        )
+        await cursor.execute(
+            INSERT_PARTICIPATION_BATCH,
+            [[row[column] for row in rows] for column in columns]
+        )
+
+    async def _apply_leaves(self, cursor, leaves: List[Tuple]):
+        """Close open rows with a single UPDATE ... FROM UNNEST(...)."""
+        await cursor.execute(CLOSE_PARTICIPATION_BATCH, [list(column) for column in zip(*leaves)])
+
+    async def _apply_isolating(self, cursor, kind: str, rows: List, apply: Callable) -> List[Tuple[str, Any, Exception]]:
+        """
+        Apply rows inside a savepoint, halving any group that fails on its
+        data until the bad rows are isolated.
+
+        Returns:
+            (kind, row, error) for each row that failed on its own
+        """
+        try:
+            async with cursor.connection.transaction():  # nested: a savepoint
+                await apply(cursor, rows)
+            return []
+        except Exception as e:
+            if not _is_row_error(e):
+                raise
+            if len(rows) == 1:
+                return [(kind, rows[0], e)]
+            middle = len(rows) // 2
+            return (
+                await self._apply_isolating(cursor, kind, rows[:middle], apply)
+                + await self._apply_isolating(cursor, kind, rows[middle:], apply)
+            )
+
+    def _dead_letter(self, failed_rows: List[Tuple[str, Any, Exception]]):
+        """Log rows that could not be written and append them to the dead-letter file."""
+        self.dead_lettered += len(failed_rows)
+        logger.error(f"Participation journal dead-lettered {len(failed_rows)} rows, e.g. {failed_rows[0][2]}")
+        if not self.dead_letter_path:
+            return
+        failed_at = datetime.now().isoformat()
+        try:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                for kind, row, error in failed_rows:
+                    if kind == 'leave':
+                        row = dict(zip(('event_id', 'user_id', 'left_at'), row))
+                    f.write(json.dumps(
+                        {'kind': kind, 'row': row, 'error': str(error), 'failed_at': failed_at},
+                        default=str
+                    ) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write participation dead-letter file: {e}")
+
+    # ------------------------------------------------------------------
+    # Spill file
+    # ------------------------------------------------------------------
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _append(self, entry: JournalEntry):
+        self._append_many([entry])
+
+    def _append_many(self, entries: List[JournalEntry]):
+        if not entries:
+            return
+        self._entries.extend(entries)
+        if self._spill_file:
+            try:
+                self._spill_file.write(''.join(entry.to_json() + '\n' for entry in entries))
+                self._spill_file.flush()
+            except OSError as e:
+                logger.warning(f"Could not write participation spill file: {e}")
+        if self._wakeup and len(self._entries) >= self.max_batch:
+            self._wakeup.set()
+
+    def _open_spill_file(self):
+        if not self.spill_path:
+            return
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Participation spill file unavailable, journal is memory-only: {e}")
+            self._spill_file = None
+
+    def _replay_spill_file(self):
+        """Load entries left by a crash, skipping those already committed."""
+        if not self.spill_path or not self.spill_path.exists():
+            return
+
+        committed = 0
+        replayed: List[JournalEntry] = []
+        try:
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                        if 'committed_seq' in data:
+                            committed = max(committed, data['committed_seq'])
+                            continue
+                        replayed.append(JournalEntry.from_json(line))
+                    except (ValueError, TypeError, KeyError) as e:
+                        logger.warning(f"Skipping corrupt participation spill line: {e}")
+        except OSError as e:
+            logger.warning(f"Could not read participation spill file: {e}")
+            return
+
+        # Replayed joins are not marked open: their events are not tracked by this
+        # process, and a re-started event seeds its members from voice again
+        replayed = [entry for entry in replayed if entry.seq > committed]
+
+        self._entries = replayed + self._entries
+        self._seq = max([self._seq, committed] + [entry.seq for entry in replayed])
+        self._committed_seq = committed
+
+        # Rewrite so the file only holds what is still pending
+        try:
+            self._rewrite_spill_file()
+        except OSError as e:
+            logger.warning(f"Could not rewrite participation spill file: {e}")
+        if replayed:
+            logger.info(f"Replayed {len(replayed)} participation journal entries from {self.spill_path}")
+
+    def _compact_spill_file(self):
+        """Record the commit point, then drop flushed entries from the spill file."""
+        if not self._spill_file:
+            return
+        try:
+            self._spill_file.write(json.dumps({'committed_seq': self._committed_seq}) + '\n')
+            self._spill_file.flush()
+            self._spill_file.close()
+            self._rewrite_spill_file()
+            self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Could not compact participation spill file: {e}")
+            self._spill_file = None
+
+    def _rewrite_spill_file(self):
+        tmp_path = self.spill_path.with_suffix(self.spill_path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'committed_seq': self._committed_seq}) + '\n')
+            for entry in self._entries:
+                f.write(entry.to_json() + '\n')
+        os.replace(tmp_path, self.spill_path)
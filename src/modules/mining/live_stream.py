@@ -0,0 +1,210 @@
+"""
+Live Participant Stream
+
+Sequenced join/leave/switch deltas for a tracked event, fanned out to
+any number of subscribers (the Management Portal's SSE and WebSocket
+clients). Snapshots are taken from the event's LiveRoster.
+
+- Each delta is serialized once and shared by every subscriber
+- New subscribers get a snapshot; reconnecting subscribers resume from
+  their last sequence number while it is still in the backlog
+- A subscriber that falls behind is resynced with a fresh snapshot
+  instead of slowing down the voice handler
+
+Usage:
+    from modules.mining.live_stream import get_live_streams
+
+    stream = get_live_streams().open(event_id, roster)
+    stream.publish('join', {**entry.to_dict(), 'at': joined_at})
+
+    async with stream.subscribe(since=last_seq) as subscription:
+        async for message in subscription:
+            send(message.seq, message.type, message.data)   # data is JSON text
+"""
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+import logging
+
+from .roster import LiveRoster
+
+logger = logging.getLogger(__name__)
+
+BACKLOG_SIZE = 1000         # deltas kept for resume
+SUBSCRIBER_QUEUE_SIZE = 256 # messages buffered per subscriber before resync
+
+@dataclass(frozen=True)
+class StreamMessage:
+    """One message as sent to subscribers; data is pre-serialized JSON."""
+    seq: int
+    type: str
+    data: str
+
+_END = StreamMessage(-1, 'end', '{}')
+
+def _dumps(payload: Dict) -> str:
+    return json.dumps(payload, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value))
+
+
+class Subscription:
+    """A subscriber's bounded queue; iterate it to receive messages."""
+
+    def __init__(self, stream: 'EventStream'):
+        self.stream = stream
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.resyncs = 0
+
+    def push(self, message: StreamMessage):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind: drop what is queued and start over from a snapshot
+            self.resyncs += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.stream.snapshot())
+            if message is _END:
+                self.queue.put_nowait(_END)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[StreamMessage]:
+        """Next message, or None after timeout seconds; raises StopAsyncIteration at the end."""
+        try:
+            return await asyncio.wait_for(self.__anext__(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def __aiter__(self) -> AsyncIterator[StreamMessage]:
+        return self
+
+    async def __anext__(self) -> StreamMessage:
+        message = await self.queue.get()
+        if message is _END:
+            raise StopAsyncIteration
+        return message
+
+    async def __aenter__(self) -> 'Subscription':
+        return self
+
+    async def __aexit__(self, *exc):
+        self.stream.unsubscribe(self)
+
+
+class EventStream:
+    """Roster, delta backlog and subscribers for one tracked event."""
+
+    def __init__(self, event_id: str, roster: LiveRoster, backlog_size: int = BACKLOG_SIZE):
+        self.event_id = event_id
+        self.roster = roster
+        self.seq = 0
+        self.backlog: Deque[StreamMessage] = deque(maxlen=backlog_size)
+        self.subscribers: Set[Subscription] = set()
+        self.closed = False
+
+    def publish(self, kind: str, payload: Dict) -> StreamMessage:
+        """
+        Fan out a 'join', 'leave' or 'switch' delta.
+
+        Call right after the roster change it describes, so snapshots and
+        sequence numbers stay consistent.
+        """
+        self.seq += 1
+        message = StreamMessage(self.seq, kind, _dumps({'event_id': self.event_id, 'seq': self.seq, **payload}))
+        self.backlog.append(message)
+        for subscription in tuple(self.subscribers):
+            subscription.push(message)
+        return message
+
+    def snapshot(self) -> StreamMessage:
+        """Full roster at the current sequence number."""
+        return StreamMessage(self.seq, 'snapshot', _dumps({
+            'event_id': self.event_id,
+            'seq': self.seq,
+            'version': self.roster.version,
+            'participants': self.roster.participants(),
+            'total_active': len(self.roster),
+        }))
+
+    def subscribe(self, since: Optional[int] = None) -> Subscription:
+        """
+        Register a subscriber.
+
+        Resumes with the deltas after `since` when they are all still in the
+        backlog; otherwise starts with a snapshot.
+        """
+        subscription = Subscription(self)
+        for message in self._initial_messages(since):
+            subscription.push(message)
+        if self.closed:
+            subscription.push(_END)
+        else:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def close(self):
+        """End the stream; subscribers finish after the queued messages."""
+        self.closed = True
+        for subscription in tuple(self.subscribers):
+            subscription.push(_END)
+        self.subscribers.clear()
+
+    def _initial_messages(self, since: Optional[int]) -> List[StreamMessage]:
+        if since is not None and 0 <= since <= self.seq:
+            oldest = self.backlog[0].seq if self.backlog else self.seq + 1
+            if since >= oldest - 1:
+                return [message for message in self.backlog if message.seq > since]
+        return [self.snapshot()]
+
+    def get_stats(self) -> Dict:
+        return {
+            'event_id': self.event_id,
+            'seq': self.seq,
+            'participants': len(self.roster),
+            'subscribers': len(self.subscribers),
+            'backlog': len(self.backlog),
+        }
+
+
+class LiveStreamHub:
+    """Event streams keyed by event ID."""
+
+    def __init__(self):
+        self._streams: Dict[str, EventStream] = {}
+
+    def open(self, event_id: str, roster: LiveRoster) -> EventStream:
+        """Get or create the stream for a tracked event's roster (replacing a stale one)."""
+        stream = self._streams.get(event_id)
+        if stream is None or stream.closed or stream.roster is not roster:
+            if stream is not None:
+                stream.close()
+            stream = self._streams[event_id] = EventStream(event_id, roster)
+        return stream
+
+    def get(self, event_id: str) -> Optional[EventStream]:
+        return self._streams.get(event_id)
+
+    def close(self, event_id: str):
+        """End an event's stream and forget it."""
+        stream = self._streams.pop(event_id, None)
+        if stream:
+            stream.close()
+
+    def get_stats(self) -> List[Dict]:
+        return [stream.get_stats() for stream in self._streams.values()]
+
+
+# Global stream hub
+_live_streams: Optional[LiveStreamHub] = None
+
+def get_live_streams() -> LiveStreamHub:
+    """Get the global live participant stream hub."""
+    global _live_streams
+    if _live_streams is None:
+        _live_streams = LiveStreamHub()
+    return _live_streams
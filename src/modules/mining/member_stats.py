@@ -0,0 +1,271 @@
+"""
+Member Statistics Aggregator
+
+Keeps the member_stats table (leaderboards, streaks, lottery tickets) up to
+date incrementally: when an event closes, only that event's participation
+rows are folded into member_stats with one bulk upsert, so reads become
+O(members) instead of scanning all of participation.
+
+A full rebuild recomputes member_stats from every closed event in batches
+of users, for backfills or after manual data fixes.
+"""
+
+import sys
+from pathlib import Path
+from datetime import date, datetime
+from typing import Dict, Optional
+import logging
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from database.connection import get_async_cursor
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+
+# Minutes for a participation row; open rows count up to the event's end
+PARTICIPATION_MINUTES_SQL = """
+    COALESCE(
+        p.duration_minutes,
+        GREATEST(0, EXTRACT(EPOCH FROM (COALESCE(p.left_at, e.ended_at, NOW()) - p.joined_at)) / 60)::int
+    )
+"""
+
+# Zero monthly counters for members whose last event was before the month of
+# the event being folded. Only touches rows that actually need resetting.
+MONTHLY_ROLLOVER_SQL = """
+    UPDATE member_stats
+    SET current_month_events = 0,
+        current_month_minutes = 0,
+        monthly_events_as_org_member = 0,
+        current_lottery_tickets = 0,
+        updated_at = NOW()
+    WHERE last_event_date < date_trunc('month', %s::date)
+      AND (current_month_events <> 0 OR current_month_minutes <> 0
+           OR monthly_events_as_org_member <> 0 OR current_lottery_tickets <> 0)
+"""
+
+# Fold one closed event into member_stats. Each participant counts as one
+# event; streaks extend when the previous event was the day before.
+FOLD_EVENT_SQL = f"""
+    WITH per_user AS (
+        SELECT p.user_id,
+               (ARRAY_AGG(p.username ORDER BY p.joined_at DESC))[1] AS username,
+               SUM({PARTICIPATION_MINUTES_SQL})::int AS minutes,
+               BOOL_OR(COALESCE(p.is_org_member, false)) AS is_org_member,
+               MIN(p.org_join_date) AS org_join_date,
+               COALESCE(e.ended_at, NOW())::date AS event_date
+        FROM participation p
+        JOIN events e ON e.event_id = p.event_id
+        WHERE p.event_id = %s
+        GROUP BY p.user_id, e.ended_at
+    )
+    INSERT INTO member_stats AS ms (
+        user_id, username,
+        current_month_events, current_month_minutes,
+        total_events_all_time, total_minutes_all_time,
+        is_current_org_member, org_join_date,
+        monthly_events_as_org_member, total_org_events,
+        current_streak_days, longest_streak_days, last_event_date,
+        current_lottery_tickets, updated_at
+    )
+    SELECT user_id, username,
+           1, minutes,
+           1, minutes,
+           is_org_member, org_join_date,
+           is_org_member::int, is_org_member::int,
+           1, 1, event_date,
+           is_org_member::int, NOW()
+    FROM per_user
+    ON CONFLICT (user_id) DO UPDATE SET
+        username = EXCLUDED.username,
+        current_month_events = ms.current_month_events + 1,
+        current_month_minutes = ms.current_month_minutes + EXCLUDED.current_month_minutes,
+        total_events_all_time = ms.total_events_all_time + 1,
+        total_minutes_all_time = ms.total_minutes_all_time + EXCLUDED.total_minutes_all_time,
+        is_current_org_member = EXCLUDED.is_current_org_member,
+        org_join_date = COALESCE(ms.org_join_date, EXCLUDED.org_join_date),
+        monthly_events_as_org_member = ms.monthly_events_as_org_member + EXCLUDED.monthly_events_as_org_member,
+        total_org_events = ms.total_org_events + EXCLUDED.total_org_events,
+        current_streak_days = CASE
+            WHEN ms.last_event_date = EXCLUDED.last_event_date THEN ms.current_streak_days
+            WHEN ms.last_event_date = EXCLUDED.last_event_date - 1 THEN ms.current_streak_days + 1
+            ELSE 1
+        END,
+        longest_streak_days = GREATEST(ms.longest_streak_days, CASE
+            WHEN ms.last_event_date = EXCLUDED.last_event_date THEN ms.current_streak_days
+            WHEN ms.last_event_date = EXCLUDED.last_event_date - 1 THEN ms.current_streak_days + 1
+            ELSE 1
+        END),
+        last_event_date = GREATEST(ms.last_event_date, EXCLUDED.last_event_date),
+        current_lottery_tickets = ms.monthly_events_as_org_member + EXCLUDED.monthly_events_as_org_member,
+        updated_at = NOW()
+    RETURNING user_id
+"""
+
+# Recompute member_stats for a batch of users from all closed events.
+# Streaks use gaps-and-islands over distinct event dates per user.
+# total_rewards_received is owned by the lottery and left untouched.
+REBUILD_MEMBERS_SQL = f"""
+    WITH params AS (
+        SELECT date_trunc('month', %s::date)::date AS month_start
+    ),
+    user_events AS (
+        SELECT p.user_id,
+               p.event_id,
+               COALESCE(e.ended_at, e.started_at)::date AS event_date,
+               (ARRAY_AGG(p.username ORDER BY p.joined_at DESC))[1] AS username,
+               MAX(p.joined_at) AS last_joined,
+               SUM({PARTICIPATION_MINUTES_SQL})::int AS minutes,
+               BOOL_OR(COALESCE(p.is_org_member, false)) AS is_org_member,
+               MIN(p.org_join_date) AS org_join_date
+        FROM participation p
+        JOIN events e ON e.event_id = p.event_id
+        WHERE e.status = 'closed'
+          AND p.user_id = ANY(%s::bigint[])
+        GROUP BY p.user_id, p.event_id, e.ended_at, e.started_at
+    ),
+    islands AS (
+        SELECT user_id,
+               event_date,
+               event_date - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY event_date))::int AS island
+        FROM (SELECT DISTINCT user_id, event_date FROM user_events) days
+    ),
+    streaks AS (
+        SELECT user_id,
+               MAX(run_length) AS longest_streak_days,
+               (ARRAY_AGG(run_length ORDER BY streak_end DESC))[1] AS current_streak_days
+        FROM (
+            SELECT user_id, island, COUNT(*) AS run_length, MAX(event_date) AS streak_end
+            FROM islands
+            GROUP BY user_id, island
+        ) runs
+        GROUP BY user_id
+    ),
+    totals AS (
+        SELECT ue.user_id,
+               (ARRAY_AGG(ue.username ORDER BY ue.event_date DESC, ue.last_joined DESC))[1] AS username,
+               COUNT(*) FILTER (WHERE ue.event_date >= params.month_start) AS current_month_events,
+               COALESCE(SUM(ue.minutes) FILTER (WHERE ue.event_date >= params.month_start), 0) AS current_month_minutes,
+               COUNT(*) AS total_events_all_time,
+               COALESCE(SUM(ue.minutes), 0) AS total_minutes_all_time,
+               (ARRAY_AGG(ue.is_org_member ORDER BY ue.event_date DESC, ue.last_joined DESC))[1] AS is_current_org_member,
+               MIN(ue.org_join_date) AS org_join_date,
+               COUNT(*) FILTER (WHERE ue.is_org_member AND ue.event_date >= params.month_start) AS monthly_events_as_org_member,
+               COUNT(*) FILTER (WHERE ue.is_org_member) AS total_org_events,
+               MAX(ue.event_date) AS last_event_date
+        FROM user_events ue
+        CROSS JOIN params
+        GROUP BY ue.user_id
+    )
+    INSERT INTO member_stats AS ms (
+        user_id, username,
+        current_month_events, current_month_minutes,
+        total_events_all_time, total_minutes_all_time,
+        is_current_org_member, org_join_date,
+        monthly_events_as_org_member, total_org_events,
+        current_streak_days, longest_streak_days, last_event_date,
+        current_lottery_tickets, updated_at
+    )
+    SELECT t.user_id, t.username,
+           t.current_month_events, t.current_month_minutes,
+           t.total_events_all_time, t.total_minutes_all_time,
+           t.is_current_org_member, t.org_join_date,
+           t.monthly_events_as_org_member, t.total_org_events,
+           s.current_streak_days, s.longest_streak_days, t.last_event_date,
+           t.monthly_events_as_org_member, NOW()
+    FROM totals t
+    JOIN streaks s ON s.user_id = t.user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        username = EXCLUDED.username,
+        current_month_events = EXCLUDED.current_month_events,
+        current_month_minutes = EXCLUDED.current_month_minutes,
+        total_events_all_time = EXCLUDED.total_events_all_time,
+        total_minutes_all_time = EXCLUDED.total_minutes_all_time,
+        is_current_org_member = EXCLUDED.is_current_org_member,
+        org_join_date = EXCLUDED.org_join_date,
+        monthly_events_as_org_member = EXCLUDED.monthly_events_as_org_member,
+        total_org_events = EXCLUDED.total_org_events,
+        current_streak_days = EXCLUDED.current_streak_days,
+        longest_streak_days = EXCLUDED.longest_streak_days,
+        last_event_date = EXCLUDED.last_event_date,
+        current_lottery_tickets = EXCLUDED.current_lottery_tickets,
+        updated_at = NOW()
+    RETURNING user_id
+"""
+
+
+async def fold_event_into_member_stats(cursor, event_id: str, event_date: Optional[date] = None) -> int:
+    """
+    Fold one closed event's participation into member_stats.
+
+    Runs on the caller's cursor so it commits atomically with the event
+    close; an event is folded exactly once because close_event only
+    succeeds for open events.
+
+    Args:
+        cursor: Open async cursor (inside the close_event transaction)
+        event_id: Event that was just closed
+        event_date: Date the event ended (defaults to today)
+
+    Returns:
+        Number of member_stats rows inserted or updated
+    """
+    await cursor.execute(MONTHLY_ROLLOVER_SQL, (event_date or datetime.now().date(),))
+    await cursor.execute(FOLD_EVENT_SQL, (event_id,))
+    return cursor.rowcount
+
+
+async def rebuild_member_stats(
+    batch_size: int = REBUILD_BATCH_SIZE,
+    as_of: Optional[date] = None
+) -> Dict:
+    """
+    Recompute member_stats from every closed event.
+
+    Users are processed in batches, each in its own transaction, so a
+    backfill over a large participation table never holds one huge
+    transaction or locks every member_stats row at once.
+
+    Args:
+        batch_size: Users per batch
+        as_of: Date whose month counts as "current" (defaults to today)
+
+    Returns:
+        Dict with success status and number of members rebuilt
+    """
+    try:
+        as_of = as_of or datetime.now().date()
+
+        async with get_async_cursor(commit=False) as cursor:
+            await cursor.execute("""
+                SELECT DISTINCT p.user_id
+                FROM participation p
+                JOIN events e ON e.event_id = p.event_id
+                WHERE e.status = 'closed'
+                ORDER BY p.user_id
+            """)
+            user_ids = [row['user_id'] for row in cursor.fetchall()]
+
+        rebuilt = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            async with get_async_cursor() as cursor:
+                await cursor.execute(REBUILD_MEMBERS_SQL, (as_of, batch))
+                rebuilt += cursor.rowcount
+
+        logger.info(f"Rebuilt member_stats for {rebuilt} members in batches of {batch_size}")
+
+        return {
+            'success': True,
+            'members_rebuilt': rebuilt
+        }
+
+    except Exception as e:
+        logger.error(f"Error rebuilding member_stats: {e}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
@@ -6,6 +6,8 @@ Integrates with the unified database schema using the 'participation' table.
 """
 
 import sys
+import time
+import asyncio
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -16,10 +18,17 @@ import discord
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from config.settings import get_database_url
-from database.connection import get_cursor
+from config.guild_cache import get_guild_config_cache
+from utils.instrumentation import VOICE_HANDLER_DURATION
+from .journal import ParticipationJournal
+from .live_stream import get_live_streams
+from .roster import LiveRoster
 
 logger = logging.getLogger(__name__)
 
+# How often rosters are checked against Discord's channel membership
+ROSTER_RECONCILE_INTERVAL = 60
+
 class VoiceTracker:
     """
     Manages voice channel participation tracking for mining events.
@@ -35,8 +44,11 @@ class VoiceTracker:
     def __init__(self, bot):
         self.bot = bot
         self.db_url = get_database_url()
-        self.tracked_events = {}  # {event_id: {channel_ids, participants}}
+        self.tracked_events = {}  # {event_id: {channel_ids, channels, roster}}
+        self.channel_events: Dict[int, str] = {}  # Reverse index {channel_id: event_id}
         self.bot_voice_connections = {}  # Track bot's voice connections
+        self.journal = ParticipationJournal()  # Write-behind buffer for participation rows
+        self._reconcile_task: Optional[asyncio.Task] = None
     
     async def start_tracking(self, event_id: str, channels: Dict[str, str]) -> Dict:
         """
@@ -49,220 +61,429 @@ class VoiceTracker:
         Returns:
             Dict with 'success' and 'error' keys
         """
-        try:
-            # Convert channel IDs to integers
-            channel_ids = []
-            for name, channel_id in channels.items():
-                try:
-                    channel_ids.append(int(channel_id))
-                except ValueError:
-                    logger.warning(f"Invalid channel ID for {name}: {channel_id}")
-            
-            if not channel_ids:
-                return {
+        results = await self.start_tracking_batch({event_id: channels})
+        return results[event_id]
+    
+    async def start_tracking_batch(self, events: Dict[str, Dict[str, str]]) -> Dict[str, Dict]:
+        """
+        Start voice tracking for several events at once.
+        
+        Every event is registered first, then members already in voice are
+        seeded for all of them in one pass over the guilds' voice channels,
+        and their initial participation rows are written by one journal flush.
+        
+        Args:
+            events: {event_id: {channel_name: channel_id}}
+        
+        Returns:
+            {event_id: Dict with 'success' and 'error' keys}
+        """
+        results = {}
+        started = []
+        for event_id, channels in events.items():
+            try:
+                results[event_id] = self._register_event(event_id, channels)
+                if results[event_id]['success']:
+                    started.append(event_id)
+            except Exception as e:
+                logger.error(f"Error starting voice tracking for {event_id}: {e}")
+                results[event_id] = {
                     'success': False,
-                    'error': 'No valid voice channels found for tracking'
+                    'error': f'Failed to start voice tracking: {str(e)}'
                 }
+        
+        if not started:
+            return results
+        
+        try:
+            # Make sure the write-behind journal is flushing before recording joins
+            await self.journal.start()
+            if self._reconcile_task is None or self._reconcile_task.done():
+                self._reconcile_task = asyncio.create_task(self._reconcile_loop())
             
-            # Store tracking info
-            self.tracked_events[event_id] = {
-                'channel_ids': set(channel_ids),
-                'channels': channels,
-                'participants': {}  # {user_id: participation_data}
-            }
-            
-            # Check for members already in voice channels
-            await self._check_existing_participants(event_id)
-            
-            logger.info(f"Started voice tracking for event {event_id} with {len(channel_ids)} channels")
-            
-            return {'success': True}
+            # Check for members already in voice channels, then persist them together
+            await self._check_existing_participants(started)
+            await self.journal.flush()
             
+            for event_id in started:
+                logger.info(
+                    f"Started voice tracking for event {event_id} with "
+                    f"{len(self.tracked_events[event_id]['channel_ids'])} channels"
+                )
         except Exception as e:
-            logger.error(f"Error starting voice tracking for {event_id}: {e}")
+            logger.error(f"Error seeding voice tracking for {', '.join(started)}: {e}")
+            for event_id in started:
+                results[event_id] = {
+                    'success': False,
+                    'error': f'Failed to start voice tracking: {str(e)}'
+                }
+        
+        return results
+    
+    def _register_event(self, event_id: str, channels: Dict[str, str]) -> Dict:
+        """Index an event's channels and set up its roster and live stream."""
+        # Convert channel IDs to integers
+        channel_ids = []
+        for name, channel_id in channels.items():
+            try:
+                channel_ids.append(int(channel_id))
+            except ValueError:
+                logger.warning(f"Invalid channel ID for {name}: {channel_id}")
+        
+        if not channel_ids:
             return {
                 'success': False,
-                'error': f'Failed to start voice tracking: {str(e)}'
+                'error': 'No valid voice channels found for tracking'
             }
+        
+        # Restarting an event replaces its channel set but keeps its roster
+        self._unindex_channels(event_id)
+        previous_tracking = self.tracked_events.get(event_id)
+        if previous_tracking:
+            roster = previous_tracking['roster']
+            roster.channel_ids.clear()
+            roster.channel_ids.update(channel_ids)
+        else:
+            roster = LiveRoster(event_id, channel_ids)
+        
+        # Store tracking info
+        self.tracked_events[event_id] = {
+            'channel_ids': roster.channel_ids,
+            'channels': channels,
+            'roster': roster
+        }
+        
+        # A channel routes to exactly one event; the newest event claims it
+        for channel_id in channel_ids:
+            previous = self.channel_events.get(channel_id)
+            if previous and previous != event_id:
+                logger.warning(f"Channel {channel_id} moved from event {previous} to {event_id}")
+                self.tracked_events[previous]['channel_ids'].discard(channel_id)
+            self.channel_events[channel_id] = event_id
+        
+        # Live roster stream for the portal
+        get_live_streams().open(event_id, roster)
+        
+        return {'success': True}
     
-    async def stop_tracking(self, event_id: str):
-        """Stop voice tracking for an event and finalize all participation records."""
-        try:
-            if event_id not in self.tracked_events:
-                logger.warning(f"Attempted to stop tracking for unknown event: {event_id}")
-                return
-            
-            tracking_data = self.tracked_events[event_id]
-            
-            # Finalize all active participants
-            for user_id, participant in tracking_data['participants'].items():
-                if not participant.get('left_at'):
+    async def stop_tracking(self, event_id: str) -> Optional[Dict]:
+        """
+        Stop voice tracking for an event and finalize all participation records.
+        
+        Returns:
+            The roster summary (participants, minutes, peak), or None if the
+            event was not tracked
+        """
+        summaries = await self.stop_tracking_batch([event_id])
+        return summaries[event_id]
+    
+    async def stop_tracking_batch(self, event_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Stop voice tracking for several events, persisting all final leaves in one flush.
+        
+        Returns:
+            {event_id: roster summary, or None if the event was not tracked}
+        """
+        summaries = {}
+        for event_id in event_ids:
+            try:
+                if event_id not in self.tracked_events:
+                    logger.warning(f"Attempted to stop tracking for unknown event: {event_id}")
+                    summaries[event_id] = None
+                    continue
+                
+                roster = self.tracked_events[event_id]['roster']
+                
+                # Finalize all active participants
+                for user_id in list(roster.active):
                     await self._record_participant_leave(event_id, user_id)
-            
-            # Remove from tracking
-            del self.tracked_events[event_id]
-            
-            logger.info(f"Stopped voice tracking for event {event_id}")
-            
+                summaries[event_id] = roster.summary()
+                
+                # Remove from tracking
+                self._unindex_channels(event_id)
+                del self.tracked_events[event_id]
+                get_live_streams().close(event_id)
+                
+            except Exception as e:
+                logger.error(f"Error stopping voice tracking for {event_id}: {e}")
+                summaries[event_id] = None
+        
+        try:
+            # Persist the final leaves before reporting the events as stopped
+            await self.journal.flush()
         except Exception as e:
-            logger.error(f"Error stopping voice tracking for {event_id}: {e}")
+            logger.error(f"Error flushing final leaves for {', '.join(event_ids)}: {e}")
+        
+        for event_id, summary in summaries.items():
+            if summary:
+                logger.info(
+                    f"Stopped voice tracking for event {event_id}: {summary['total_participants']} participants, "
+                    f"{summary['total_minutes']} minutes"
+                )
+        return summaries
     
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         """Handle voice state changes for tracked events."""
+        started = time.perf_counter()
         try:
-            # Check each tracked event to see if this affects them
-            for event_id, tracking_data in self.tracked_events.items():
-                channel_ids = tracking_data['channel_ids']
-                
-                # Member left a tracked channel
-                if before.channel and before.channel.id in channel_ids:
-                    await self._record_participant_leave(event_id, member.id)
-                
-                # Member joined a tracked channel  
-                if after.channel and after.channel.id in channel_ids:
-                    await self._record_participant_join(event_id, member, after.channel)
+            before_id = before.channel.id if before.channel else None
+            after_id = after.channel.id if after.channel else None
+            
+            # Mute/deafen/stream toggles don't move the member
+            if before_id == after_id:
+                return
+            
+            left_event = self.channel_events.get(before_id)
+            joined_event = self.channel_events.get(after_id)
+            
+            # Switch between two channels of the same event: new row, one stream delta
+            if left_event and left_event == joined_event:
+                await self._record_participant_leave(left_event, member.id, stream=False)
+                await self._record_participant_join(joined_event, member, after.channel, kind='switch', from_channel_id=before_id)
+                return
+            
+            # Member left a tracked channel
+            if left_event:
+                await self._record_participant_leave(left_event, member.id)
+            
+            # Member joined a tracked channel
+            if joined_event:
+                await self._record_participant_join(joined_event, member, after.channel)
                     
         except Exception as e:
             logger.error(f"Error handling voice state update: {e}")
+        finally:
+            VOICE_HANDLER_DURATION.observe(time.perf_counter() - started, 'tracker')
+    
+    def _unindex_channels(self, event_id: str):
+        """Drop an event's channels from the channel -> event index."""
+        tracking_data = self.tracked_events.get(event_id)
+        if not tracking_data:
+            return
+        for channel_id in tracking_data['channel_ids']:
+            if self.channel_events.get(channel_id) == event_id:
+                del self.channel_events[channel_id]
+    
+    def get_roster(self, event_id: str) -> Optional[LiveRoster]:
+        """The live roster of a tracked event."""
+        tracking_data = self.tracked_events.get(event_id)
+        return tracking_data['roster'] if tracking_data else None
     
     async def get_current_participants(self, event_id: str) -> List[Dict]:
-        """Get currently active participants for an event."""
-        try:
-            if event_id not in self.tracked_events:
-                return []
-            
-            with get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT user_id, username, display_name, channel_name, joined_at
-                    FROM participation 
-                    WHERE event_id = %s 
-                    AND left_at IS NULL
-                    ORDER BY joined_at
-                """, (event_id,))
-                
-                return [dict(row) for row in cursor.fetchall()]
-                
-        except Exception as e:
-            logger.error(f"Error getting current participants for {event_id}: {e}")
-            return []
+        """Get currently active participants for an event, from the live roster."""
+        roster = self.get_roster(event_id)
+        return roster.participants() if roster else []
+    
+    async def reconcile(self, event_id: str) -> Dict:
+        """
+        Repair an event's roster from Discord's view of its channels.
+        
+        Records joins for members the roster missed, leaves for members no
+        longer in a tracked channel, and switches for members in another one.
+        
+        Returns:
+            Dict with 'joined', 'left' and 'moved' counts
+        """
+        result = {'joined': 0, 'left': 0, 'moved': 0}
+        roster = self.get_roster(event_id)
+        if not roster or not self.bot:
+            return result
+        
+        channels = {}
+        members = {}
+        observed = {}
+        for channel_id in roster.channel_ids:
+            channel = self.bot.get_channel(channel_id)
+            if not isinstance(channel, discord.VoiceChannel):
+                continue
+            channels[channel_id] = channel
+            for member in channel.members:
+                if not member.bot:
+                    members[member.id] = member
+                    observed[member.id] = channel_id
+        
+        missing, stale, moved = roster.diff(observed, set(channels))
+        for user_id in stale:
+            await self._record_participant_leave(event_id, user_id)
+        for user_id in moved:
+            previous = await self._record_participant_leave(event_id, user_id, stream=False)
+            await self._record_participant_join(
+                event_id, members[user_id], channels[observed[user_id]],
+                kind='switch', from_channel_id=previous.channel_id if previous else None
+            )
+        for user_id in missing:
+            await self._record_participant_join(event_id, members[user_id], channels[observed[user_id]])
+        
+        result.update(joined=len(missing), left=len(stale), moved=len(moved))
+        if missing or stale or moved:
+            logger.warning(f"Reconciled roster for event {event_id}: {result}")
+        return result
+    
+    async def _reconcile_loop(self):
+        """Periodically reconcile every tracked event's roster."""
+        while True:
+            await asyncio.sleep(ROSTER_RECONCILE_INTERVAL)
+            if self.bot and not self.bot.is_ready():
+                continue
+            for event_id in list(self.tracked_events):
+                try:
+                    await self.reconcile(event_id)
+                except Exception as e:
+                    logger.error(f"Error reconciling roster for {event_id}: {e}")
     
-    async def _check_existing_participants(self, event_id: str):
-        """Check for members already in voice channels when tracking starts."""
+    async def _check_existing_participants(self, event_ids: List[str]):
+        """
+        Seed members already in voice when tracking starts.
+        
+        Channels are resolved with bot.get_channel, org roles are checked in
+        memory, and every initial row is journaled in one bulk append, so the
+        following flush writes them all with a single INSERT ... ON CONFLICT.
+        """
         try:
-            tracking_data = self.tracked_events[event_id]
-            channel_ids = tracking_data['channel_ids']
+            is_org_member = self._org_member_check()
+            joined_at = datetime.now()
+            joins = []
+            seeded = []
+            
+            for event_id in event_ids:
+                roster = self.tracked_events[event_id]['roster']
+                for channel_id in roster.channel_ids:
+                    # Skip channels a later event in the batch claimed
+                    if self.channel_events.get(channel_id) != event_id:
+                        continue
+                    channel = self.bot.get_channel(channel_id)
+                    if not isinstance(channel, discord.VoiceChannel):
+                        continue
+                    for member in channel.members:
+                        if member.bot:  # Skip bots
+                            continue
+                        org_member = is_org_member(member)
+                        entry = roster.join(
+                            member.id, member.name, member.display_name,
+                            channel.id, channel.name, joined_at, org_member
+                        )
+                        if entry is None:
+                            continue
+                        seeded.append((event_id, entry))
+                        joins.append({
+                            'event_id': event_id,
+                            'user_id': member.id,
+                            'username': member.name,
+                            'display_name': member.display_name,
+                            'channel_id': channel.id,
+                            'channel_name': channel.name,
+                            'joined_at': joined_at,
+                            'is_org_member': org_member
+                        })
             
-            # Get all guilds the bot is in
-            for guild in self.bot.guilds:
-                for channel_id in channel_ids:
-                    channel = guild.get_channel(channel_id)
-                    if channel and isinstance(channel, discord.VoiceChannel):
-                        # Record all current members as joining
-                        for member in channel.members:
-                            if not member.bot:  # Skip bots
-                                await self._record_participant_join(event_id, member, channel)
+            self.journal.record_joins(joins)
+            
+            for event_id, entry in seeded:
+                stream = get_live_streams().get(event_id)
+                if stream:
+                    stream.publish('join', {**entry.to_dict(), 'at': joined_at})
+            
+            if seeded:
+                logger.info(f"Seeded {len(seeded)} members already in voice for {len(event_ids)} event(s)")
                                 
         except Exception as e:
             logger.error(f"Error checking existing participants: {e}")
     
-    async def _record_participant_join(self, event_id: str, member: discord.Member, channel: discord.VoiceChannel):
-        """Record a participant joining a voice channel."""
+    async def _record_participant_join(self, event_id: str, member: discord.Member, channel: discord.VoiceChannel,
+                                       kind: str = 'join', from_channel_id: Optional[int] = None):
+        """Record a participant joining a voice channel (kind 'switch' for a move within the event)."""
         try:
             # Check if already active in this event
-            with get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT id FROM participation 
-                    WHERE event_id = %s AND user_id = %s AND left_at IS NULL
-                """, (event_id, member.id))
-                
-                if cursor.fetchone():
-                    logger.debug(f"Member {member.display_name} already active in event {event_id}")
-                    return
-                
-                # Check org member status
-                is_org_member = await self._check_org_member_status(member)
-                
-                # Insert participation record
-                cursor.execute("""
-                    INSERT INTO participation (
-                        event_id, user_id, username, display_name,
-                        channel_id, channel_name, joined_at, is_org_member
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                """, (
-                    event_id,
-                    member.id,
-                    member.name,
-                    member.display_name,
-                    channel.id,
-                    channel.name,
-                    datetime.now(),
-                    is_org_member
-                ))
-                
-                # Update tracking data
-                tracking_data = self.tracked_events[event_id]
-                tracking_data['participants'][member.id] = {
-                    'joined_at': datetime.now(),
-                    'channel_name': channel.name,
-                    'left_at': None
-                }
-                
-                logger.info(f"Recorded {member.display_name} joining {channel.name} for event {event_id}")
+            roster = self.tracked_events[event_id]['roster']
+            if roster.is_active(member.id):
+                logger.debug(f"Member {member.display_name} already active in event {event_id}")
+                return
+            
+            # Check org member status
+            is_org_member = await self._check_org_member_status(member)
+            joined_at = datetime.now()
+            
+            # Journal the participation record; the background flush writes it
+            self.journal.record_join(
+                event_id=event_id,
+                user_id=member.id,
+                username=member.name,
+                display_name=member.display_name,
+                channel_id=channel.id,
+                channel_name=channel.name,
+                joined_at=joined_at,
+                is_org_member=is_org_member
+            )
+            
+            entry = roster.join(
+                member.id, member.name, member.display_name,
+                channel.id, channel.name, joined_at, is_org_member
+            )
+            
+            stream = get_live_streams().get(event_id)
+            if stream:
+                payload = {**entry.to_dict(), 'at': joined_at}
+                if kind == 'switch':
+                    payload['from_channel_id'] = from_channel_id
+                stream.publish(kind, payload)
+            
+            logger.info(f"Recorded {member.display_name} joining {channel.name} for event {event_id}")
                 
         except Exception as e:
             logger.error(f"Error recording participant join: {e}")
     
-    async def _record_participant_leave(self, event_id: str, user_id: int):
-        """Record a participant leaving a voice channel.""" 
+    async def _record_participant_leave(self, event_id: str, user_id: int, stream: bool = True):
+        """Record a participant leaving a voice channel; returns their closed roster entry."""
         try:
             leave_time = datetime.now()
+            self.journal.record_leave(event_id, user_id, leave_time)
             
-            with get_cursor() as cursor:
-                # Update the most recent participation record
-                cursor.execute("""
-                    UPDATE participation 
-                    SET left_at = %s,
-                        duration_minutes = EXTRACT(EPOCH FROM (%s - joined_at))/60,
-                        updated_at = %s
-                    WHERE event_id = %s 
-                    AND user_id = %s 
-                    AND left_at IS NULL
-                    RETURNING username
-                """, (leave_time, leave_time, leave_time, event_id, user_id))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    # Update tracking data
-                    if event_id in self.tracked_events:
-                        tracking_data = self.tracked_events[event_id]
-                        if user_id in tracking_data['participants']:
-                            tracking_data['participants'][user_id]['left_at'] = leave_time
-                    
-                    logger.info(f"Recorded {result['username']} leaving voice channel for event {event_id}")
+            roster = self.get_roster(event_id)
+            entry = roster.leave(user_id, leave_time) if roster else None
+            
+            live_stream = get_live_streams().get(event_id) if stream else None
+            if live_stream and entry:
+                live_stream.publish('leave', {
+                    'user_id': user_id, 'channel_id': entry.channel_id, 'at': leave_time
+                })
+            
+            logger.info(f"Recorded user {user_id} leaving voice channel for event {event_id}")
+            return entry
                     
         except Exception as e:
             logger.error(f"Error recording participant leave: {e}")
+            return None
+    
+    def _org_member_check(self):
+        """
+        In-memory org member test for bulk use: the org role ID comes from the
+        member's cached guild config, and each check is a lookup in the
+        member's role IDs.
+        """
+        guild_configs = get_guild_config_cache()
+        
+        def is_org_member(member: discord.Member) -> bool:
+            org_role_id = guild_configs.get(member.guild.id).org_role_id
+            return org_role_id is not None and member.get_role(org_role_id) is not None
+        
+        return is_org_member
     
     async def _check_org_member_status(self, member: discord.Member) -> bool:
         """Check if a member has org member role for lottery eligibility."""
         try:
-            from config.settings import DISCORD_CONFIG
-            org_role_id = DISCORD_CONFIG.get('ORG_ROLE_ID')
-            
-            if not org_role_id:
-                return False
-            
-            # Check if member has the org role
-            org_role = member.guild.get_role(int(org_role_id))
-            return org_role in member.roles if org_role else False
+            return self._org_member_check()(member)
             
         except Exception as e:
             logger.error(f"Error checking org member status for {member.display_name}: {e}")
             return False
     
+    async def shutdown(self):
+        """Stop roster reconciliation, flush pending participation and stop the journal."""
+        if self._reconcile_task:
+            self._reconcile_task.cancel()
+            self._reconcile_task = None
+        await self.journal.stop()
+    
     async def join_voice_channel(self, channel_id: int) -> bool:
         """Join a voice channel to indicate active tracking."""
         print(f"🎤 Attempting to join voice channel {channel_id}")
@@ -0,0 +1,151 @@
+"""
+Live Participant Roster
+
+Authoritative in-memory state of who is in a tracked event's voice
+channels. VoiceTracker updates it on every join/leave next to the
+journal, and reads are served from it instead of Postgres:
+
+- active participants in join order, counts per channel in O(1)
+- running minute accumulator (finished stints + open stints so far)
+- a version that increases on every change, for cheap change detection
+
+The database stays the durable record; reconcile() compares the roster
+with Discord's channel.members to repair missed gateway events.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+class RosterEntry:
+    """One participant's current stint in a tracked channel."""
+    __slots__ = ('user_id', 'username', 'display_name', 'channel_id', 'channel_name', 'joined_at', 'is_org_member')
+
+    def __init__(self, user_id: int, username: str, display_name: str, channel_id: int,
+                 channel_name: str, joined_at: datetime, is_org_member: bool = False):
+        self.user_id = user_id
+        self.username = username
+        self.display_name = display_name
+        self.channel_id = channel_id
+        self.channel_name = channel_name
+        self.joined_at = joined_at
+        self.is_org_member = is_org_member
+
+    def minutes(self, now: datetime) -> float:
+        return max((now - self.joined_at).total_seconds(), 0) / 60
+
+    def to_dict(self) -> Dict:
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'display_name': self.display_name,
+            'channel_id': self.channel_id,
+            'channel_name': self.channel_name,
+            'joined_at': self.joined_at,
+            'is_org_member': self.is_org_member,
+        }
+
+class LiveRoster:
+    """Active participants, channel membership and accrued minutes for one event."""
+
+    def __init__(self, event_id: str, channel_ids: Iterable[int]):
+        self.event_id = event_id
+        self.channel_ids: Set[int] = set(channel_ids)
+        self.active: Dict[int, RosterEntry] = {}    # {user_id: entry}, in join order
+        self.channels: Dict[int, Set[int]] = {}     # {channel_id: {user_id}}
+        self.seen: Set[int] = set()                 # everyone who joined during the event
+        self.org_members: Set[int] = set()
+        self.closed_minutes = 0.0                   # minutes from finished stints
+        self.peak_concurrent = 0
+        self.version = 0
+        self.started_at = datetime.now()
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+    def is_active(self, user_id: int) -> bool:
+        return user_id in self.active
+
+    def get(self, user_id: int) -> Optional[RosterEntry]:
+        return self.active.get(user_id)
+
+    def join(self, user_id: int, username: str, display_name: str, channel_id: int,
+             channel_name: str, joined_at: datetime, is_org_member: bool = False) -> Optional[RosterEntry]:
+        """Add a participant; returns None if they are already active."""
+        if user_id in self.active:
+            return None
+        entry = self.active[user_id] = RosterEntry(
+            user_id, username, display_name, channel_id, channel_name, joined_at, is_org_member
+        )
+        self.channels.setdefault(channel_id, set()).add(user_id)
+        self.seen.add(user_id)
+        if is_org_member:
+            self.org_members.add(user_id)
+        self.peak_concurrent = max(self.peak_concurrent, len(self.active))
+        self.version += 1
+        return entry
+
+    def leave(self, user_id: int, left_at: datetime) -> Optional[RosterEntry]:
+        """Remove a participant and accrue their stint; returns None if not active."""
+        entry = self.active.pop(user_id, None)
+        if entry is None:
+            return None
+        members = self.channels.get(entry.channel_id)
+        if members is not None:
+            members.discard(user_id)
+            if not members:
+                del self.channels[entry.channel_id]
+        self.closed_minutes += entry.minutes(left_at)
+        self.version += 1
+        return entry
+
+    def participants(self) -> List[Dict]:
+        """Active participants ordered by join time."""
+        return [entry.to_dict() for entry in self.active.values()]
+
+    def channel_counts(self) -> Dict[int, int]:
+        return {channel_id: len(members) for channel_id, members in self.channels.items()}
+
+    def total_minutes(self, now: Optional[datetime] = None) -> float:
+        """Minutes accrued by all participants, counting open stints up to now."""
+        now = now or datetime.now()
+        return self.closed_minutes + sum(entry.minutes(now) for entry in self.active.values())
+
+    def diff(self, observed: Dict[int, int], checked_channels: Set[int]) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Compare the roster with observed voice membership.
+
+        Args:
+            observed: {user_id: channel_id} of members actually in the tracked channels
+            checked_channels: channels whose members were observed; entries in
+                other tracked channels are left alone (e.g. channel not cached)
+
+        Returns:
+            (missing, stale, moved) user IDs: in voice but not in the roster,
+            in the roster but not in voice, and in a different channel
+        """
+        missing = [user_id for user_id in observed if user_id not in self.active]
+        stale = [
+            user_id for user_id, entry in self.active.items()
+            if user_id not in observed
+            and (entry.channel_id in checked_channels or entry.channel_id not in self.channel_ids)
+        ]
+        moved = [
+            user_id for user_id, channel_id in observed.items()
+            if user_id in self.active and self.active[user_id].channel_id != channel_id
+        ]
+        return missing, stale, moved
+
+    def summary(self, now: Optional[datetime] = None) -> Dict:
+        """Event totals from memory, as reported when tracking stops."""
+        now = now or datetime.now()
+        return {
+            'event_id': self.event_id,
+            'total_participants': len(self.seen),
+            'org_participants': len(self.org_members),
+            'active_participants': len(self.active),
+            'peak_concurrent': self.peak_concurrent,
+            'total_minutes': int(self.total_minutes(now)),
+            'tracked_minutes': int((now - self.started_at).total_seconds() / 60),
+            'channels': self.channel_counts(),
+            'version': self.version,
+        }
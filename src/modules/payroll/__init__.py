@@ -15,12 +15,16 @@ Discord commands have been deprecated in favor of the Management Portal.
 Core calculation and processor functionality remains active.
 """
 
-from .core import PayrollCalculator
+from .core import PayrollCalculator, ParticipantSummary
 from .processors import MiningProcessor, SalvageProcessor, CombatProcessor
+from .reports import ReportService, get_report_service
 
 __all__ = [
     'PayrollCalculator',
+    'ParticipantSummary',
     'MiningProcessor',
     'SalvageProcessor',
     'CombatProcessor',
+    'ReportService',
+    'get_report_service',
 ]
\ No newline at end of file
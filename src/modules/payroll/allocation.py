@@ -0,0 +1,163 @@
+"""
+Payroll Allocation Engine
+
+Splits a payroll total across participants in integer centi-aUEC (1/100 aUEC)
+using largest-remainder rounding, so shares always sum to the exact total.
+
+All shares are computed in one pass with Python integers, which are exact
+at any size.
+"""
+
+from dataclasses import dataclass
+from decimal import Context, Decimal, MAX_EMAX, MAX_PREC, MIN_EMIN, ROUND_HALF_UP
+from typing import List, Optional, Sequence
+
+# Unbounded context so rescaling a Decimal never rounds
+_EXACT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+
+@dataclass
+class Allocation:
+    """Result of allocate_payroll, all amounts in centi-aUEC."""
+    base_centi: List[int]       # Share before donations (sums to the total)
+    final_centi: List[int]      # What each participant receives
+    donated_centi: int = 0      # Total given up by donors
+    retained_centi: int = 0     # Donations not redistributed (no non-donors)
+
+def to_centi(amount) -> int:
+    """Convert an aUEC amount to integer centi-aUEC, rounding half up."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def from_centi(centi: int) -> Decimal:
+    """Convert integer centi-aUEC back to a 2-decimal aUEC Decimal."""
+    return Decimal(int(centi)).scaleb(-2)
+
+def _as_decimal(value) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value or 0))
+
+def _exact_integers(values: Sequence[Decimal]) -> List[int]:
+    """
+    Scale decimals by a shared power of ten into exact integers.
+    
+    Minutes from participation come back with many fractional digits, so a
+    fixed scale would shift shares by whole aUEC on large payrolls.
+    """
+    places = max(0, max((-value.as_tuple().exponent for value in values), default=0))
+    if places == 0:
+        return [int(value) for value in values]
+    return [int(value.scaleb(places, context=_EXACT)) for value in values]
+
+def participation_weights(
+    minutes: Sequence,
+    multipliers: Optional[Sequence] = None,
+    cap_minutes: Optional[float] = None
+) -> List[int]:
+    """
+    Build exact integer weights from participation minutes.
+
+    Args:
+        minutes: Participation minutes per participant (int, float or Decimal)
+        multipliers: Optional per-participant multiplier (e.g. role bonus 1.25)
+        cap_minutes: Optional ceiling on counted minutes per participant
+    """
+    if multipliers is not None and len(multipliers) != len(minutes):
+        raise ValueError("multipliers must have one entry per participant")
+
+    values = [max(_as_decimal(value), Decimal(0)) for value in minutes]
+    if cap_minutes is not None:
+        cap = _as_decimal(cap_minutes)
+        values = [min(value, cap) for value in values]
+    weights = _exact_integers(values)
+
+    if multipliers is not None:
+        factors = _exact_integers([max(_as_decimal(m), Decimal(0)) for m in multipliers])
+        weights = [weight * factor for weight, factor in zip(weights, factors)]
+    return weights
+
+def largest_remainder(total: int, weights: Sequence[int]) -> List[int]:
+    """
+    Split an integer total proportionally to integer weights.
+
+    Each share is floor(total * w / W); the leftover units go one each to the
+    largest remainders (ties to the earlier participant), so the shares sum
+    to exactly `total`.
+
+    Args:
+        total: Amount to split (non-negative integer)
+        weights: Non-negative integer weights
+    """
+    n = len(weights)
+    if n == 0:
+        return []
+    weight_total = sum(int(w) for w in weights)
+    if weight_total <= 0:
+        raise ValueError("weights must sum to a positive value")
+    if total < 0:
+        raise ValueError("total must be non-negative")
+
+    products = [total * int(w) for w in weights]
+    shares = [product // weight_total for product in products]
+    leftover = total - sum(shares)
+    if leftover:
+        remainders = [product % weight_total for product in products]
+        # Stable sort keeps earlier participants first among equal remainders
+        for i in sorted(range(n), key=remainders.__getitem__, reverse=True)[:leftover]:
+            shares[i] += 1
+    return shares
+
+def allocate_payroll(
+    total_centi: int,
+    weights: Sequence[int],
+    donation_percentage: int = 0,
+    donors: Optional[Sequence[bool]] = None
+) -> Allocation:
+    """
+    Allocate a payroll total with optional donations.
+
+    Donors give donation_percentage of their base share. The donated pool is
+    split evenly across non-donors; if everyone donated it is retained.
+    Every amount is an exact integer, so
+    sum(final_centi) + retained_centi == total_centi.
+
+    Args:
+        total_centi: Payroll total in centi-aUEC
+        weights: Integer weights (see participation_weights)
+        donation_percentage: Percentage of a donor's base share donated (0-100)
+        donors: Per-participant donor flags; defaults to everyone when
+            donation_percentage > 0, matching the calculator's behaviour
+    """
+    base = largest_remainder(total_centi, weights)
+    final = list(base)
+    if donation_percentage <= 0 or not base:
+        return Allocation(base_centi=base, final_centi=final)
+
+    if donors is None:
+        donors = [True] * len(base)
+    donor_index = [i for i, is_donor in enumerate(donors) if is_donor]
+    recipient_index = [i for i, is_donor in enumerate(donors) if not is_donor]
+
+    donor_base = [base[i] for i in donor_index]
+    donated = int(
+        (Decimal(sum(donor_base)) * Decimal(donation_percentage) / 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+    )
+    if donated <= 0:
+        return Allocation(base_centi=base, final_centi=final)
+
+    # Take the pool from donors proportionally to their base share
+    for i, amount in zip(donor_index, largest_remainder(donated, donor_base)):
+        final[i] -= amount
+
+    retained = donated
+    if recipient_index:
+        bonuses = largest_remainder(donated, [1] * len(recipient_index))
+        for i, amount in zip(recipient_index, bonuses):
+            final[i] += amount
+        retained = 0
+
+    return Allocation(
+        base_centi=base,
+        final_centi=final,
+        donated_centi=donated,
+        retained_centi=retained
+    )
@@ -7,19 +7,106 @@ Handles participation-based distribution, donations, and payout generation.
 
 import sys
 from pathlib import Path
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Tuple
+from decimal import Decimal
 import logging
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from config.settings import get_database_url
-from database.connection import get_cursor
+from database.connection import get_async_cursor
+from database.statements import EVENT_BY_ID, PARTICIPANT_COUNT, register
+from .allocation import participation_weights, allocate_payroll, to_centi, from_centi
 
 logger = logging.getLogger(__name__)
 
+# Per-session minutes are computed once in the CTE; the outer query filters
+# and sorts on the aggregate instead of repeating the duration expression.
+# A stored generated column can't be used here because open sessions are
+# measured against NOW().
+PARTICIPANT_TOTALS_SQL = register('payroll.participant_totals', """
+    WITH sessions AS (
+        SELECT
+            event_id, user_id, username, display_name, is_org_member,
+            joined_at, left_at,
+            COALESCE(
+                duration_minutes,
+                CASE 
+                    WHEN left_at IS NOT NULL AND joined_at IS NOT NULL THEN 
+                        EXTRACT(EPOCH FROM (left_at - joined_at))/60
+                    WHEN joined_at IS NOT NULL THEN 
+                        EXTRACT(EPOCH FROM (NOW() - joined_at))/60
+                    ELSE 0
+                END
+            ) AS minutes
+        FROM participation
+        WHERE event_id = ANY(%s)
+    ), totals AS (
+        SELECT
+            event_id, user_id,
+            (ARRAY_AGG(username ORDER BY joined_at DESC))[1] AS username,
+            (ARRAY_AGG(display_name ORDER BY joined_at DESC))[1] AS display_name,
+            SUM(minutes) AS total_minutes,
+            COUNT(*) AS session_count,
+            BOOL_OR(is_org_member) AS is_org_member,
+            MIN(joined_at) AS first_joined,
+            MAX(COALESCE(left_at, joined_at)) AS last_active
+        FROM sessions
+        GROUP BY event_id, user_id
+    )
+    SELECT *
+    FROM totals
+    WHERE total_minutes > 0
+    ORDER BY event_id, total_minutes DESC
+""")
+
+@dataclass
+class ParticipantSummary:
+    """
+    Aggregated participation for one user in one event.
+    
+    Supports read-only dict access (participant['total_minutes'],
+    participant.get('display_name')) so existing payroll UI code keeps working.
+    """
+    # Hand-written: dataclass(slots=True) needs Python 3.10
+    __slots__ = (
+        'event_id', 'user_id', 'username', 'display_name', 'total_minutes',
+        'session_count', 'is_org_member', 'first_joined', 'last_active'
+    )
+    
+    event_id: str
+    user_id: int
+    username: str
+    display_name: Optional[str]
+    total_minutes: Decimal
+    session_count: int
+    is_org_member: bool
+    first_joined: Optional[datetime]
+    last_active: Optional[datetime]
+    
+    def __getitem__(self, key: str):
+        if key not in PARTICIPANT_SUMMARY_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in PARTICIPANT_SUMMARY_FIELDS
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in PARTICIPANT_SUMMARY_FIELDS else default
+    
+    def keys(self) -> Tuple[str, ...]:
+        return PARTICIPANT_SUMMARY_KEYS
+    
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in PARTICIPANT_SUMMARY_KEYS}
+
+PARTICIPANT_SUMMARY_KEYS = tuple(f.name for f in fields(ParticipantSummary))
+PARTICIPANT_SUMMARY_FIELDS = frozenset(PARTICIPANT_SUMMARY_KEYS)
+
 class PayrollCalculator:
     """
     Universal payroll calculator for all event types.
@@ -44,7 +131,7 @@ class PayrollCalculator:
     ) -> List[Dict]:
         """Get completed events of a specific type for payroll calculation."""
         try:
-            with get_cursor() as cursor:
+            async with get_async_cursor() as cursor:
                 # Base query for completed events
                 where_clause = """
                     WHERE guild_id = %s 
@@ -57,7 +144,7 @@ class PayrollCalculator:
                 if not include_calculated:
                     where_clause += " AND (payroll_calculated = FALSE OR payroll_calculated IS NULL)"
                 
-                cursor.execute(f"""
+                await cursor.execute(f"""
                     SELECT 
                         event_id, event_name, organizer_name, 
                         started_at, ended_at, location_notes,
@@ -74,11 +161,7 @@ class PayrollCalculator:
                     event_data = dict(row)
                     
                     # Get participant count for display
-                    cursor.execute("""
-                        SELECT COUNT(DISTINCT user_id) as participant_count
-                        FROM participation 
-                        WHERE event_id = %s
-                    """, (event_data['event_id'],))
+                    await cursor.execute(PARTICIPANT_COUNT, (event_data['event_id'],))
                     
                     participant_result = cursor.fetchone()
                     event_data['participant_count'] = participant_result['participant_count'] if participant_result else 0
@@ -94,10 +177,8 @@ class PayrollCalculator:
     async def get_event_by_id(self, event_id: str) -> Optional[Dict]:
         """Get specific event by ID."""
         try:
-            with get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM events WHERE event_id = %s
-                """, (event_id,))
+            async with get_async_cursor() as cursor:
+                await cursor.execute(EVENT_BY_ID, (event_id,))
                 
                 row = cursor.fetchone()
                 return dict(row) if row else None
@@ -106,77 +187,43 @@ class PayrollCalculator:
             logger.error(f"Error getting event by ID {event_id}: {e}")
             return None
     
-    async def get_event_participants(self, event_id: str) -> List[Dict]:
+    async def get_event_participants(self, event_id: str) -> List[ParticipantSummary]:
         """Get all participants for an event with their participation time."""
+        participants_by_event = await self.get_participants_for_events([event_id])
+        participants = participants_by_event.get(event_id, [])
+        logger.info(f"Returning {len(participants)} participants for event {event_id}")
+        return participants
+    
+    async def get_participants_for_events(
+        self,
+        event_ids: Iterable[str]
+    ) -> Dict[str, List[ParticipantSummary]]:
+        """
+        Get participants for one or more events in a single query.
+        
+        Returns:
+            Dict mapping event_id to participants sorted by total_minutes desc.
+            Events without participation map to an empty list.
+        """
+        event_ids = list(dict.fromkeys(event_ids))
+        participants_by_event: Dict[str, List[ParticipantSummary]] = {
+            event_id: [] for event_id in event_ids
+        }
+        if not event_ids:
+            return participants_by_event
+        
         try:
-            with get_cursor() as cursor:
-                # First, check if there are any participation records at all
-                cursor.execute("""
-                    SELECT COUNT(*) as total_records
-                    FROM participation 
-                    WHERE event_id = %s
-                """, (event_id,))
+            async with get_async_cursor(commit=False) as cursor:
+                await cursor.execute(PARTICIPANT_TOTALS_SQL, (event_ids,))
                 
-                record_check = cursor.fetchone()
-                logger.info(f"Found {record_check['total_records']} participation records for event {event_id}")
-                
-                # Debug: Show sample records
-                cursor.execute("""
-                    SELECT user_id, username, duration_minutes, joined_at, left_at
-                    FROM participation 
-                    WHERE event_id = %s
-                    LIMIT 3
-                """, (event_id,))
-                sample_records = cursor.fetchall()
-                for record in sample_records:
-                    logger.info(f"Sample participation: {record['username']} - {record['duration_minutes']} mins")
-                
-                # Get participants with their participation time
-                cursor.execute("""
-                    SELECT 
-                        user_id, username, display_name,
-                        SUM(
-                            COALESCE(
-                                duration_minutes,
-                                CASE 
-                                    WHEN left_at IS NOT NULL AND joined_at IS NOT NULL THEN 
-                                        EXTRACT(EPOCH FROM (left_at - joined_at))/60
-                                    WHEN joined_at IS NOT NULL THEN 
-                                        EXTRACT(EPOCH FROM (NOW() - joined_at))/60
-                                    ELSE 0
-                                END
-                            )
-                        ) as total_minutes,
-                        COUNT(*) as session_count,
-                        BOOL_OR(is_org_member) as is_org_member,
-                        MIN(joined_at) as first_joined,
-                        MAX(COALESCE(left_at, joined_at)) as last_active
-                    FROM participation 
-                    WHERE event_id = %s
-                    GROUP BY user_id, username, display_name
-                    HAVING SUM(
-                        COALESCE(
-                            duration_minutes,
-                            CASE 
-                                WHEN left_at IS NOT NULL AND joined_at IS NOT NULL THEN 
-                                    EXTRACT(EPOCH FROM (left_at - joined_at))/60
-                                WHEN joined_at IS NOT NULL THEN 
-                                    EXTRACT(EPOCH FROM (NOW() - joined_at))/60
-                                ELSE 0
-                            END
-                        )
-                    ) > 0
-                    ORDER BY total_minutes DESC
-                """, (event_id,))
-                
-                participants = [dict(row) for row in cursor.fetchall()]
-                logger.info(f"Returning {len(participants)} participants for event {event_id}")
+                for row in cursor.fetchall():
+                    participants_by_event[row['event_id']].append(ParticipantSummary(**row))
                 
-                return participants
+                return participants_by_event
                 
         except Exception as e:
-            logger.error(f"Error getting participants for event {event_id}: {e}")
-            return []
+            logger.error(f"Error getting participants for events {event_ids}: {e}")
+            return participants_by_event
     
     async def calculate_payroll(
         self,
@@ -222,50 +269,30 @@ class PayrollCalculator:
             # Generate payroll ID
             payroll_id = self._generate_payroll_id(event_id)
             
-            # Calculate individual payouts
-            payouts = []
-            total_donated_auec = Decimal('0')
+            # Calculate individual payouts in exact integer centi-aUEC
+            weights = participation_weights([p['total_minutes'] for p in participants])
+            weight_total = sum(weights)
+            allocation = allocate_payroll(
+                to_centi(total_value_auec),
+                weights,
+                donation_percentage=donation_percentage
+            )
+            total_donated_auec = from_centi(allocation.donated_centi)
             
-            for participant in participants:
-                participation_minutes = participant['total_minutes']
-                participation_percentage = Decimal(participation_minutes) / Decimal(total_minutes)
-                base_payout = total_value_auec * participation_percentage
-                
-                # Apply donation if specified
-                if donation_percentage > 0:
-                    donation_amount = base_payout * Decimal(donation_percentage) / Decimal('100')
-                    final_payout = base_payout - donation_amount
-                    total_donated_auec += donation_amount
-                    is_donor = True
-                else:
-                    final_payout = base_payout
-                    is_donor = False
-                
-                # Round to 2 decimal places
-                base_payout = base_payout.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                final_payout = final_payout.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                
+            payouts = []
+            for participant, weight, base_centi, final_centi in zip(
+                participants, weights, allocation.base_centi, allocation.final_centi
+            ):
                 payouts.append({
                     'user_id': participant['user_id'],
                     'username': participant['username'],
-                    'participation_minutes': participation_minutes,
-                    'participation_percentage': float(participation_percentage * 100),
-                    'base_payout_auec': base_payout,
-                    'final_payout_auec': final_payout,
-                    'is_donor': is_donor
+                    'participation_minutes': participant['total_minutes'],
+                    'participation_percentage': weight * 100 / weight_total if weight_total else 0.0,
+                    'base_payout_auec': from_centi(base_centi),
+                    'final_payout_auec': from_centi(final_centi),
+                    'is_donor': donation_percentage > 0
                 })
             
-            # Redistribute donated amounts
-            if total_donated_auec > 0:
-                non_donors = [p for p in payouts if not p['is_donor']]
-                if non_donors:
-                    bonus_per_person = total_donated_auec / len(non_donors)
-                    bonus_per_person = bonus_per_person.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                    
-                    for payout in payouts:
-                        if not payout['is_donor']:
-                            payout['final_payout_auec'] += bonus_per_person
-            
             # Store payroll in database
             success = await self._store_payroll(
                 payroll_id=payroll_id,
@@ -301,8 +328,8 @@ class PayrollCalculator:
     async def get_recent_payrolls(self, guild_id: int, limit: int = 10) -> List[Dict]:
         """Get recently calculated payrolls for status display."""
         try:
-            with get_cursor() as cursor:
-                cursor.execute("""
+            async with get_async_cursor() as cursor:
+                await cursor.execute("""
                     SELECT 
                         p.payroll_id, p.event_id, p.total_value_auec,
                         p.calculated_by_name, p.calculated_at,
@@ -332,11 +359,17 @@ class PayrollCalculator:
         calculated_by_id: int,
         calculated_by_name: str
     ) -> bool:
-        """Store payroll calculation in database."""
+        """
+        Store payroll calculation in database.
+        
+        Header, payouts and the events UPDATE commit in one transaction.
+        payroll_id is the idempotency key: storing the same payroll again
+        replaces the previous calculation instead of failing or duplicating.
+        """
         try:
-            with get_cursor() as cursor:
-                # Insert payroll master record
-                cursor.execute("""
+            async with get_async_cursor() as cursor:
+                # Upsert payroll master record
+                await cursor.execute("""
                     INSERT INTO payrolls (
                         payroll_id, event_id, total_scu_collected, total_value_auec,
                         ore_prices_used, mining_yields, total_donated_auec,
@@ -344,6 +377,15 @@ class PayrollCalculator:
                     ) VALUES (
                         %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
                     )
+                    ON CONFLICT (payroll_id) DO UPDATE SET
+                        total_scu_collected = EXCLUDED.total_scu_collected,
+                        total_value_auec = EXCLUDED.total_value_auec,
+                        ore_prices_used = EXCLUDED.ore_prices_used,
+                        mining_yields = EXCLUDED.mining_yields,
+                        total_donated_auec = EXCLUDED.total_donated_auec,
+                        calculated_by_id = EXCLUDED.calculated_by_id,
+                        calculated_by_name = EXCLUDED.calculated_by_name,
+                        calculated_at = EXCLUDED.calculated_at
                 """, (
                     payroll_id,
                     event_id,
@@ -357,27 +399,44 @@ class PayrollCalculator:
                     datetime.now()
                 ))
                 
-                # Insert individual payouts
-                for payout in payouts:
-                    cursor.execute("""
+                user_ids = [payout['user_id'] for payout in payouts]
+                
+                # Drop payouts from a previous run for users no longer in this one
+                await cursor.execute("""
+                    DELETE FROM payouts
+                    WHERE payroll_id = %s
+                    AND NOT (user_id = ANY(%s::bigint[]))
+                """, (payroll_id, user_ids))
+                
+                # Bulk upsert all payouts in a single statement
+                if payouts:
+                    await cursor.execute("""
                         INSERT INTO payouts (
                             payroll_id, user_id, username, participation_minutes,
                             base_payout_auec, final_payout_auec, is_donor
-                        ) VALUES (
-                            %s, %s, %s, %s, %s, %s, %s
                         )
+                        SELECT %s::text, * FROM UNNEST(
+                            %s::bigint[], %s::text[], %s::integer[],
+                            %s::numeric[], %s::numeric[], %s::boolean[]
+                        )
+                        ON CONFLICT (payroll_id, user_id) DO UPDATE SET
+                            username = EXCLUDED.username,
+                            participation_minutes = EXCLUDED.participation_minutes,
+                            base_payout_auec = EXCLUDED.base_payout_auec,
+                            final_payout_auec = EXCLUDED.final_payout_auec,
+                            is_donor = EXCLUDED.is_donor
                     """, (
                         payroll_id,
-                        payout['user_id'],
-                        payout['username'], 
-                        payout['participation_minutes'],
-                        payout['base_payout_auec'],
-                        payout['final_payout_auec'],
-                        payout['is_donor']
+                        user_ids,
+                        [payout['username'] for payout in payouts],
+                        [int(round(payout['participation_minutes'])) for payout in payouts],
+                        [payout['base_payout_auec'] for payout in payouts],
+                        [payout['final_payout_auec'] for payout in payouts],
+                        [payout['is_donor'] for payout in payouts]
                     ))
                 
                 # Mark event as payroll calculated
-                cursor.execute("""
+                await cursor.execute("""
                     UPDATE events 
                     SET payroll_calculated = TRUE,
                         payroll_calculated_at = %s,
@@ -391,7 +450,7 @@ class PayrollCalculator:
                     event_id
                 ))
                 
-                logger.info(f"Stored payroll {payroll_id} for event {event_id}")
+                logger.info(f"Stored payroll {payroll_id} for event {event_id} ({len(payouts)} payouts)")
                 return True
                 
         except Exception as e:
@@ -0,0 +1,244 @@
+"""
+Payroll Report Rendering Service
+
+Renders payroll and event PDF reports with reportlab in a worker process so
+large reports never block the event loop (voice tracking, interactions).
+
+- Rendering runs in a ProcessPoolExecutor; only a JSON payload crosses the
+  process boundary.
+- The worker builds the document into a SpooledTemporaryFile (memory for
+  typical reports, disk beyond SPOOL_MAX_BYTES) and streams it into the
+  report cache directory with an atomic rename.
+- Results are cached on disk by (report id, content hash), so re-sending an
+  unchanged payroll is a file open.
+- Callers get a discord.File that streams from disk.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+import discord
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'redlegion_reports'))
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+COPY_CHUNK_BYTES = 64 * 1024
+
+
+def _render_report(kind: str, payload_json: str, path: str) -> int:
+    """
+    Worker-process entry point: render one report to `path`.
+
+    Returns:
+        Size of the written PDF in bytes
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    payload = json.loads(payload_json)
+    styles = getSampleStyleSheet()
+    story = []
+
+    if kind == 'payroll':
+        event = payload.get('event_data') or {}
+        story.append(Paragraph(f"Payroll Report - {payload['payroll_id']}", styles['Title']))
+        story.append(Spacer(1, 20))
+        story.append(Paragraph(
+            f"<b>Payroll Summary:</b><br/>"
+            f"• Event: {event.get('event_name', 'Unknown')} ({payload['event_id']})<br/>"
+            f"• Organizer: {event.get('organizer_name', 'Unknown')}<br/>"
+            f"• Total Value: {float(payload['total_value_auec']):,.2f} aUEC<br/>"
+            f"• Total Donated: {float(payload.get('total_donated_auec') or 0):,.2f} aUEC<br/>"
+            f"• Participants: {len(payload['rows'])}<br/>"
+            f"• Calculated: {payload.get('calculated_at', '')}<br/>",
+            styles['Normal']
+        ))
+        header = ['Participant', 'Minutes', 'Share %', 'Base aUEC', 'Final aUEC', 'Donor']
+        rows = [
+            [
+                str(row['username'])[:24],
+                f"{float(row['participation_minutes']):.0f}",
+                f"{float(row['participation_percentage']):.2f}%",
+                f"{float(row['base_payout_auec']):,.2f}",
+                f"{float(row['final_payout_auec']):,.2f}",
+                "Yes" if row['is_donor'] else "No"
+            ]
+            for row in payload['rows']
+        ]
+    else:
+        story.append(Paragraph(f"Event Report - {payload['event_id']}", styles['Title']))
+        story.append(Spacer(1, 20))
+        total_minutes = sum(float(row['total_minutes']) for row in payload['rows'])
+        story.append(Paragraph(
+            f"<b>Event Summary:</b><br/>"
+            f"• Event: {payload.get('event_name', 'Unknown')}<br/>"
+            f"• Total Participants: {len(payload['rows'])}<br/>"
+            f"• Total Time: {total_minutes / 60:.1f} hours<br/>",
+            styles['Normal']
+        ))
+        header = ['Participant', 'Time (Hours)', 'Sessions', 'Org Member', 'Share %']
+        rows = [
+            [
+                str(row.get('display_name') or row['username'])[:24],
+                f"{float(row['total_minutes']) / 60:.1f}",
+                str(row.get('session_count', 1)),
+                "Yes" if row.get('is_org_member') else "No",
+                f"{float(row['total_minutes']) / total_minutes * 100 if total_minutes else 0:.1f}%"
+            ]
+            for row in payload['rows']
+        ]
+
+    story.append(Spacer(1, 20))
+    table = Table([header] + rows, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    story.append(table)
+    story.append(Spacer(1, 12))
+    story.append(Paragraph(f"Report generated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Italic']))
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+        SimpleDocTemplate(spool, pagesize=letter).build(story)
+        size = spool.tell()
+        spool.seek(0)
+
+        partial_path = f"{path}.{os.getpid()}.tmp"
+        with open(partial_path, 'wb') as out:
+            shutil.copyfileobj(spool, out, COPY_CHUNK_BYTES)
+        os.replace(partial_path, path)
+
+    return size
+
+
+class ReportService:
+    """
+    Renders payroll/event PDF reports off the event loop with an on-disk cache.
+
+    Usage:
+        file = await get_report_service().render_payroll_report(payroll_result)
+        await interaction.followup.send(file=file)
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_workers: int = 1, max_cached: int = 64):
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self.max_cached = max_cached
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._flight = SingleFlight()
+        self.stats = {"rendered": 0, "cache_hits": 0, "errors": 0}
+
+    async def render_payroll_report(self, payroll: Dict) -> Optional[discord.File]:
+        """
+        Render a payroll report from a calculate_payroll() result.
+
+        Returns:
+            discord.File streaming the PDF, or None if rendering failed
+        """
+        payload = {
+            'payroll_id': payroll['payroll_id'],
+            'event_id': (payroll.get('event_data') or {}).get('event_id', payroll.get('event_id')),
+            'event_data': payroll.get('event_data') or {},
+            'total_value_auec': payroll['total_value_auec'],
+            'total_donated_auec': payroll.get('total_donated_auec', 0),
+            'calculated_at': payroll.get('calculated_at'),
+            'rows': payroll['payouts'],
+        }
+        return await self._render('payroll', payroll['payroll_id'], payload)
+
+    async def render_event_report(self, event_data: Dict, participants: List) -> Optional[discord.File]:
+        """Render an event participation report (participants from get_event_participants)."""
+        payload = {
+            'event_id': event_data['event_id'],
+            'event_name': event_data.get('event_name'),
+            'rows': [dict(participant) for participant in participants],
+        }
+        return await self._render('event', event_data['event_id'], payload)
+
+    async def _render(self, kind: str, report_id: str, payload: Dict) -> Optional[discord.File]:
+        try:
+            payload_json = json.dumps(payload, default=str, sort_keys=True)
+            content_hash = hashlib.sha256(payload_json.encode()).hexdigest()[:16]
+            filename = f"{kind}_{report_id}_{content_hash}.pdf"
+            path = self.cache_dir / filename
+
+            if path.exists():
+                self.stats["cache_hits"] += 1
+            else:
+                await self._flight.do(filename, lambda: self._render_in_worker(kind, payload_json, path))
+                self.stats["rendered"] += 1
+                self._prune_cache()
+
+            return discord.File(str(path), filename=f"{kind}_{report_id}.pdf")
+
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error rendering {kind} report {report_id}: {e}")
+            return None
+
+    async def _render_in_worker(self, kind: str, payload_json: str, path: Path) -> int:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(self._executor, _render_report, kind, payload_json, str(path))
+        logger.info(f"Rendered {kind} report {path.name} ({size} bytes)")
+        return size
+
+    def _prune_cache(self):
+        """Keep only the most recently written reports."""
+        try:
+            reports = sorted(self.cache_dir.glob('*.pdf'), key=lambda p: p.stat().st_mtime, reverse=True)
+            for stale in reports[self.max_cached:]:
+                stale.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not prune report cache: {e}")
+
+    def shutdown(self):
+        """Stop the worker process pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global report service instance
+_report_service: Optional[ReportService] = None
+
+def get_report_service() -> ReportService:
+    """Get the global report rendering service."""
+    global _report_service
+    if _report_service is None:
+        _report_service = ReportService()
+    return _report_service
+
+def shutdown_report_service():
+    """Stop the global report service's worker pool."""
+    global _report_service
+    if _report_service is not None:
+        _report_service.shutdown()
+        _report_service = None
@@ -2757,9 +2757,10 @@ class DirectOreQuantityModal(ui.Modal):
                 )
                 return
             
-            # Get cached prices from database (no API calls during user interaction)
-            ore_prices = await self.processor._get_cached_prices()
-            if not ore_prices:
+            # Shared price snapshot (served from the tiered UEX cache)
+            ore_prices = await self.processor.get_current_prices()
+            using_fallback_prices = not ore_prices
+            if using_fallback_prices:
                 # Use fallback prices if no cache available
                 ore_prices = {
                     'QUAN': {'price': 9000}, 'LARA': {'price': 2500}, 'AGRI': {'price': 2300},
@@ -2830,7 +2831,7 @@ class DirectOreQuantityModal(ui.Modal):
             
             embed.add_field(
                 name="📊 Price Source",
-                value="Using cached database prices" + (" (fallback)" if not await self.processor._get_cached_prices() else " (from UEX)"),
+                value="Using cached database prices" + (" (fallback)" if using_fallback_prices else " (from UEX)"),
                 inline=False
             )
             
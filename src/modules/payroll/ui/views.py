@@ -10,6 +10,8 @@ from typing import Dict, List
 from decimal import Decimal
 from datetime import datetime
 
+from ..reports import get_report_service
+
 
 def format_event_date(date_value) -> str:
     """Format event date to year-month-day hour:minute."""
@@ -509,10 +511,12 @@ class ConfirmPayrollButton(ui.Button):
             inline=False
         )
         
-        if len(result['payouts']) > 5:
+        # Full payout table as a PDF, rendered in the report worker process
+        report = await get_report_service().render_payroll_report(result)
+        if report:
             embed.add_field(
                 name="📋 Full Report",
-                value=f"See complete payout details for all {len(result['payouts'])} participants.",
+                value=f"Complete payout details for all {len(result['payouts'])} participants are attached.",
                 inline=False
             )
         
@@ -523,6 +527,8 @@ class ConfirmPayrollButton(ui.Button):
             item.disabled = True
         
         await interaction.edit_original_response(embed=embed, view=self.view)
+        if report:
+            await interaction.followup.send(file=report)
 
 
 class EditPricesButton(ui.Button):
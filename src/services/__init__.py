@@ -5,9 +5,14 @@ This module contains various services that provide functionality
 across multiple bot components.
 """
 
+from .single_flight import SingleFlight
+from .uex_client import UEXClient, get_uex_client
 from .uex_cache import UEXCache, get_uex_cache, initialize_uex_cache, shutdown_uex_cache
 
 __all__ = [
+    'SingleFlight',
+    'UEXClient',
+    'get_uex_client',
     'UEXCache',
     'get_uex_cache',
     'initialize_uex_cache', 
@@ -0,0 +1,60 @@
+"""
+Single-Flight Request Coalescing for Red Legion Discord Bot
+
+Collapses concurrent calls for the same key into one in-flight task, so a
+burst of cache misses (e.g. several officers opening payroll at once)
+triggers a single upstream fetch that every caller awaits.
+
+Usage:
+    from services.single_flight import SingleFlight
+
+    flight = SingleFlight()
+    prices = await flight.do("ores", fetch_ore_prices)   # Await shared fetch
+    flight.start("ores", fetch_ore_prices)               # Fire-and-forget refresh
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Per-key in-flight task registry.
+
+    The shared task is shielded, so a caller that is cancelled (e.g. a timed
+    out Discord interaction) does not cancel the fetch for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the in-flight task for key, starting fn() if there is none."""
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once for all concurrent callers with the same key."""
+        return await asyncio.shield(self.start(key, fn))
+
+    def in_flight(self, key: str) -> bool:
+        """Check whether a fetch for key is currently running."""
+        task = self._inflight.get(key)
+        return task is not None and not task.done()
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so background refresh failures aren't reported
+        # as "never retrieved"; awaiting callers still see it.
+        if not task.cancelled():
+            error = task.exception()
+            if error is not None:
+                logger.warning(f"Single-flight task {key!r} failed: {error!r}")
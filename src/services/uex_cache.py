@@ -1,58 +1,89 @@
 """
 UEX API Caching Service for Red Legion Discord Bot
 
-Provides cached UEX price data with automatic refresh mechanism to:
-- Reduce API calls and improve performance
-- Provide fallback data when API is unavailable
-- Automatically refresh data at configurable intervals
-- Handle API failures gracefully
+Single tiered price cache shared by payroll, admin commands and the REST API:
+- L1: in-process snapshot per category with TTL (no DB hit per request)
+- L2: current rows in the uex_prices table (payroll ore prices)
+- L3: UEX Corp API via the shared UEX client
+
+Every API refresh produces one snapshot from which all categories are
+derived; concurrent misses share one fetch and recently expired data is
+served while a background refresh runs.
 
 Usage:
-    from services.uex_cache import UEXCache
-    
-    cache = UEXCache()
-    await cache.start_background_refresh()  # Start auto-refresh
+    from services.uex_cache import get_uex_cache
     
-    prices = await cache.get_ore_prices()  # Get cached or fresh data
+    cache = get_uex_cache()
+    prices = await cache.get_prices()  # Payroll ore prices {ORE: {price, location, system}}
+    ores = await cache.get_ore_prices("high_value")  # Detailed UEX commodity data
 """
 
 import asyncio
-import aiohttp
-import ssl
+import hashlib
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from datetime import datetime
+from typing import Dict, Optional, Any, Tuple
 from pathlib import Path
 import sys
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config.settings import UEX_API_CONFIG
+from config.settings import ORE_TYPES
+from database.connection import get_async_cursor
+from services.uex_client import get_uex_client, initialize_uex_client, shutdown_uex_client
+from services.single_flight import SingleFlight
+
+# L1 key for payroll ore prices, the snapshot persisted to L2
+PAYROLL_CATEGORY = "payroll"
+API_CATEGORIES = ["ores", "high_value", "all"]
+
+SUPPORTED_ORE_NAMES = [
+    'QUANTAINIUM', 'BEXALITE', 'LARANITE', 'AGRICIUM', 'GOLD',
+    'BERYL', 'HEPHAESTANITE', 'BORASE', 'TUNGSTEN', 'TITANIUM',
+    'IRON', 'COPPER', 'ALUMINUM', 'SILICON', 'CORUNDUM', 'QUARTZ',
+    'TARANITE', 'STILERON', 'RICCITE', 'TIN'
+]
+
+
+def _content_hash(prices: Dict[str, Dict]) -> str:
+    """Stable hash of a payroll price snapshot, independent of key order."""
+    return hashlib.sha256(json.dumps(prices, sort_keys=True).encode()).hexdigest()
 
 
 class UEXCache:
     """
-    UEX API caching service with automatic refresh.
+    Tiered UEX price cache (memory -> Postgres -> API) with automatic refresh.
     
     Features:
-    - In-memory cache with TTL
+    - L1 in-memory snapshots with TTL
+    - L2 warm start and persistence via uex_prices
+    - L3 API refresh shared by all categories
     - Background refresh task
     - Fallback to cached data on API failures
-    - Configurable refresh intervals
-    - Multiple data categories support
+    - Explicit invalidation and per-tier hit/miss counters
     """
     
     def __init__(self, 
                  default_ttl: int = 86400,  # 24 hours default TTL (matches UEX API refresh)
                  refresh_interval: int = 86400,  # 24 hours refresh interval
-                 max_retries: int = 3):
+                 max_retries: int = 3,
+                 stale_while_revalidate: int = 21600,  # Serve expired data for up to 6h while refreshing
+                 price_ttl: int = 43200,  # Payroll prices are fresh for 12 hours
+                 price_stale_while_revalidate: int = 129600):  # ...and servable for 36h more
         self.default_ttl = default_ttl
         self.refresh_interval = refresh_interval
         self.max_retries = max_retries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.price_ttl = price_ttl
+        self.price_stale_while_revalidate = price_stale_while_revalidate
         
-        # Cache storage
+        # Cache storage (L1)
         self._cache: Dict[str, Dict[str, Any]] = {}
+        self._flight = SingleFlight()
+        self._tier_stats = {
+            tier: {"hits": 0, "misses": 0} for tier in ("l1", "l2", "l3")
+        }
         self._refresh_task: Optional[asyncio.Task] = None
         self._running = False
         
@@ -83,8 +114,9 @@ class UEXCache:
         """Background task that refreshes cache data periodically."""
         print("🔄 UEX cache background refresh loop started")
         
-        # Initial data fetch
-        await self._refresh_all_cache_data()
+        # Initial data fetch (skipped if warm start loaded fresh prices)
+        if not self._is_cache_valid(f"prices_{PAYROLL_CATEGORY}"):
+            await self._refresh_all_cache_data()
         
         try:
             while self._running:
@@ -98,14 +130,88 @@ class UEXCache:
             print(f"❌ Error in UEX cache refresh loop: {e}")
     
     async def _refresh_all_cache_data(self):
-        """Refresh all cached data categories."""
-        categories = ["ores", "high_value", "all"]
+        """Refresh all cached data categories from one API snapshot."""
+        try:
+            await self._refresh()
+        except Exception as e:
+            print(f"⚠️ Failed to refresh UEX prices: {e}")
+    
+    async def warm_start(self) -> bool:
+        """Load the current L2 snapshot into L1 so the first requests skip the API."""
+        if f"prices_{PAYROLL_CATEGORY}" in self._cache:
+            return True
+        prices, fetched_at = await self._load_l2_prices()
+        if not prices:
+            print("🗄️ No stored UEX prices for warm start")
+            return False
+        self._store_l1(PAYROLL_CATEGORY, prices, fetched_at, self.price_ttl)
+        print(f"🗄️ Warm-started UEX cache with {len(prices)} stored prices from {fetched_at}")
+        return True
+    
+    async def get_prices(self, force_refresh: bool = False) -> Dict[str, Dict]:
+        """
+        Get payroll ore prices through the cache tiers.
         
-        for category in categories:
-            try:
-                await self._fetch_and_cache_prices(category)
-            except Exception as e:
-                print(f"⚠️ Failed to refresh {category} prices: {e}")
+        Args:
+            force_refresh: Skip L1/L2 and fetch a new snapshot from the API
+            
+        Returns:
+            Dict mapping ore names to {price, location, system}, empty if unavailable
+        """
+        cache_key = f"prices_{PAYROLL_CATEGORY}"
+        
+        if not force_refresh:
+            if self._is_cache_valid(cache_key):
+                self._tier_stats["l1"]["hits"] += 1
+                return self._cache[cache_key]["data"]
+            self._tier_stats["l1"]["misses"] += 1
+            
+            # L2 is only consulted when L1 holds nothing (boot, after invalidate)
+            if cache_key not in self._cache:
+                prices, fetched_at = await self._flight.do("l2", self._load_l2_prices)
+                if prices:
+                    self._tier_stats["l2"]["hits"] += 1
+                    self._store_l1(PAYROLL_CATEGORY, prices, fetched_at, self.price_ttl)
+                    if self._is_cache_valid(cache_key):
+                        return prices
+                else:
+                    self._tier_stats["l2"]["misses"] += 1
+            
+            # Recently expired: serve the last good snapshot and revalidate in the background
+            if self._is_cache_servable_stale(cache_key):
+                if not self._flight.in_flight("api"):
+                    print("♻️ Serving stale payroll prices while refreshing")
+                self._flight.start("api", self._fetch_snapshot)
+                return self._cache[cache_key]["data"]
+        
+        # L3: fetch a new snapshot (concurrent callers share one fetch)
+        try:
+            snapshot = await self._refresh()
+            if snapshot and snapshot.get(PAYROLL_CATEGORY):
+                return snapshot[PAYROLL_CATEGORY]
+        except Exception as e:
+            print(f"❌ Failed to fetch fresh payroll prices: {e}")
+        
+        # Fallback to cached data even if expired
+        if cache_key in self._cache:
+            print("🔄 Using expired cache for payroll prices")
+            return self._cache[cache_key]["data"]
+        
+        print("❌ No payroll price data available")
+        return {}
+    
+    def invalidate(self, category: Optional[str] = None):
+        """
+        Drop L1 entries so the next read goes to L2/L3.
+        
+        Args:
+            category: Category to drop ("payroll", "ores", ...); None drops all
+        """
+        if category is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(f"prices_{category}", None)
+        print(f"🗑️ UEX cache invalidated ({category or 'all categories'})")
     
     async def get_ore_prices(self, category: str = "ores", force_refresh: bool = False) -> Optional[Dict]:
         """
@@ -122,12 +228,22 @@ class UEXCache:
         
         # Check if we have valid cached data
         if not force_refresh and self._is_cache_valid(cache_key):
-            print(f"📦 Using cached {category} prices")
+            self._tier_stats["l1"]["hits"] += 1
             return self._cache[cache_key]["data"]
+        if not force_refresh:
+            self._tier_stats["l1"]["misses"] += 1
         
-        # Try to fetch fresh data
+        # Recently expired: serve the last good snapshot and revalidate in the background
+        if not force_refresh and self._is_cache_servable_stale(cache_key):
+            if not self._flight.in_flight("api"):
+                print(f"♻️ Serving stale {category} prices while refreshing")
+            self._flight.start("api", self._fetch_snapshot)
+            return self._cache[cache_key]["data"]
+        
+        # Try to fetch fresh data (concurrent callers share one fetch)
         try:
-            prices = await self._fetch_and_cache_prices(category)
+            snapshot = await self._refresh()
+            prices = snapshot.get(category) if snapshot else None
             if prices:
                 print(f"🔄 Fetched fresh {category} prices")
                 return prices
@@ -144,79 +260,209 @@ class UEXCache:
         print(f"❌ No {category} price data available")
         return None
     
-    async def _fetch_and_cache_prices(self, category: str) -> Optional[Dict]:
-        """Fetch prices from UEX API and cache the result."""
+    async def _refresh(self) -> Optional[Dict[str, Dict]]:
+        """Fetch one API snapshot for all concurrent callers."""
+        return await self._flight.do("api", self._fetch_snapshot)
+    
+    async def _fetch_snapshot(self) -> Optional[Dict[str, Dict]]:
+        """Fetch from UEX (L3), derive every category, store in L1 and L2."""
         for attempt in range(self.max_retries):
-            try:
-                prices = await self._fetch_uex_api(category)
-                if prices:
-                    # Cache the data
-                    cache_key = f"prices_{category}"
-                    self._cache[cache_key] = {
-                        "data": prices,
-                        "timestamp": datetime.now(),
-                        "ttl": self.default_ttl
-                    }
-                    print(f"✅ Cached {category} prices ({len(prices)} items)")
-                    return prices
-            except Exception as e:
-                wait_time = 2 ** attempt  # Exponential backoff
-                print(f"⚠️ UEX API attempt {attempt + 1}/{self.max_retries} failed: {e}")
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(wait_time)
+            data = await self._fetch_uex_api()
+            if data is not None:
+                break
+            self._tier_stats["l3"]["misses"] += 1
+            wait_time = 2 ** attempt  # Exponential backoff
+            print(f"⚠️ UEX API attempt {attempt + 1}/{self.max_retries} failed")
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(wait_time)
+        else:
+            return None
         
-        return None
+        self._tier_stats["l3"]["hits"] += 1
+        fetched_at = datetime.now()
+        snapshot = {category: self._process_uex_data(data, category) for category in API_CATEGORIES}
+        snapshot[PAYROLL_CATEGORY] = self._parse_payroll_prices(data)
+        
+        for category, prices in snapshot.items():
+            if prices:
+                ttl = self.price_ttl if category == PAYROLL_CATEGORY else self.default_ttl
+                self._store_l1(category, prices, fetched_at, ttl)
+                print(f"✅ Cached {category} prices ({len(prices)} items)")
+        
+        if snapshot[PAYROLL_CATEGORY]:
+            await self._store_l2_prices(snapshot[PAYROLL_CATEGORY], fetched_at)
+        
+        return snapshot
     
-    async def _fetch_uex_api(self, category: str) -> Optional[Dict]:
-        """Make actual API call to UEX."""
+    async def _fetch_uex_api(self) -> Optional[Dict]:
+        """Make actual API call to UEX over the shared client session."""
         try:
-            print(f"🔍 Attempting UEX API call for category: {category}")
-            print(f"🔍 API URL: {UEX_API_CONFIG['base_url']}")
-            
-            headers = {
-                'Authorization': f'Bearer {UEX_API_CONFIG["bearer_token"]}',
-                'Accept': 'application/json'
-            }
+            print("🔍 Attempting UEX API call")
             
-            # SSL context (matching existing implementation)
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
+            data = await get_uex_client().get_json()
+            if data is None:
+                return None
             
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                print(f"🌐 Making HTTP GET request to UEX API...")
-                async with session.get(
-                    UEX_API_CONFIG['base_url'], 
-                    headers=headers,
-                    timeout=UEX_API_CONFIG.get('timeout', 30)
-                ) as response:
-                    print(f"📡 UEX API response status: {response.status}")
-                    
-                    if response.status == 200:
-                        print(f"✅ UEX API request successful, parsing JSON...")
-                        data = await response.json()
-                        print(f"🔍 Raw data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-                        
-                        processed = self._process_uex_data(data, category)
-                        print(f"✅ Processed {len(processed)} items for category {category}")
-                        return processed
-                    else:
-                        print(f"❌ UEX API returned status {response.status}")
-                        response_text = await response.text()
-                        print(f"❌ Response body: {response_text[:200]}...")
-                        return None
+            print(f"🔍 Raw data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
+            return data
                         
-        except asyncio.TimeoutError:
-            print("⏰ UEX API request timed out")
-            return None
-        except aiohttp.ClientError as e:
-            print(f"🌐 UEX API connection error: {e}")
-            return None
         except Exception as e:
             print(f"❌ Unexpected UEX API error: {e}")
             return None
     
+    def _store_l1(self, category: str, prices: Dict, fetched_at: datetime, ttl: int):
+        self._cache[f"prices_{category}"] = {
+            "data": prices,
+            "timestamp": fetched_at,
+            "ttl": ttl,
+            "stale_ttl": (
+                self.price_stale_while_revalidate if category == PAYROLL_CATEGORY
+                else self.stale_while_revalidate
+            )
+        }
+    
+    async def _load_l2_prices(self) -> Tuple[Optional[Dict[str, Dict]], Optional[datetime]]:
+        """
+        Read the latest payroll price snapshot from uex_prices.
+        
+        Returns the prices and when a refresh last confirmed them.
+        """
+        try:
+            async with get_async_cursor(commit=False) as cursor:
+                await cursor.execute("""
+                    SELECT p.item_name, p.buy_price_per_scu, p.best_sell_location,
+                           p.system_location, s.checked_at
+                    FROM uex_prices p
+                    JOIN (
+                        SELECT snapshot_id, COALESCE(checked_at, fetched_at) AS checked_at
+                        FROM uex_price_snapshots
+                        WHERE item_category = 'ore'
+                        ORDER BY fetched_at DESC
+                        LIMIT 1
+                    ) s ON p.snapshot_id = s.snapshot_id
+                """)
+                
+                prices = {}
+                checked_at = None
+                for row in cursor.fetchall():
+                    prices[row['item_name'].upper()] = {
+                        'price': float(row['buy_price_per_scu']),
+                        'location': row['best_sell_location'],
+                        'system': row['system_location']
+                    }
+                    checked_at = row['checked_at']
+                
+                return (prices or None), checked_at
+                
+        except Exception as e:
+            print(f"⚠️ Could not read stored UEX prices: {e}")
+            return None, None
+    
+    async def _store_l2_prices(self, prices: Dict[str, Dict], fetched_at: datetime):
+        """
+        Append the payroll prices as a new snapshot in uex_prices.
+        
+        A refresh that returns the same prices as the latest snapshot only
+        marks that snapshot as checked instead of appending a duplicate.
+        """
+        content_hash = _content_hash(prices)
+        try:
+            async with get_async_cursor() as cursor:
+                await cursor.execute("""
+                    SELECT snapshot_id, content_hash
+                    FROM uex_price_snapshots
+                    WHERE item_category = 'ore'
+                    ORDER BY fetched_at DESC
+                    LIMIT 1
+                """)
+                latest = cursor.fetchone()
+                if latest and latest['content_hash'] == content_hash:
+                    await cursor.execute("""
+                        UPDATE uex_price_snapshots
+                        SET checked_at = %s
+                        WHERE snapshot_id = %s
+                    """, (fetched_at, latest['snapshot_id']))
+                    print(f"💾 Prices unchanged since snapshot {latest['snapshot_id']}")
+                    return
+                
+                await cursor.execute("""
+                    INSERT INTO uex_price_snapshots (
+                        item_category, fetched_at, checked_at, item_count, source, content_hash
+                    )
+                    VALUES ('ore', %s, %s, %s, 'uex_api', %s)
+                    RETURNING snapshot_id
+                """, (fetched_at, fetched_at, len(prices), content_hash))
+                snapshot_id = cursor.fetchone()['snapshot_id']
+                
+                # Keep is_current for readers outside the bot
+                await cursor.execute("""
+                    UPDATE uex_prices 
+                    SET is_current = FALSE 
+                    WHERE item_category = 'ore'
+                    AND is_current = TRUE
+                """)
+                
+                names = list(prices.keys())
+                await cursor.execute("""
+                    INSERT INTO uex_prices (
+                        item_name, buy_price_per_scu, best_sell_location,
+                        system_location, item_category, fetched_at, is_current, snapshot_id
+                    )
+                    SELECT name, price, location, system, 'ore', %s, TRUE, %s
+                    FROM UNNEST(%s::text[], %s::numeric[], %s::text[], %s::text[])
+                        AS snapshot(name, price, location, system)
+                """, (
+                    fetched_at,
+                    snapshot_id,
+                    names,
+                    [prices[name]['price'] for name in names],
+                    [prices[name]['location'] for name in names],
+                    [prices[name]['system'] for name in names]
+                ))
+                
+                print(f"💾 Stored price snapshot {snapshot_id} ({len(names)} payroll prices)")
+                
+        except Exception as e:
+            print(f"⚠️ Could not store UEX prices: {e}")
+    
+    def _parse_payroll_prices(self, data: Dict) -> Dict[str, Dict]:
+        """Parse a UEX response into payroll ore prices {ORE: {price, location, system}}."""
+        try:
+            prices = {}
+            commodities = data['data'] if isinstance(data, dict) and 'data' in data else data
+            
+            for item in commodities:
+                name = item.get('name', '').upper()
+                
+                # Skip non-refined ores (we want refined prices) and non-ore items
+                if '(ORE)' in name or '(RAW)' in name:
+                    continue
+                
+                # Check if this is a mineable ore we support
+                is_supported_ore = (
+                    name in ORE_TYPES.values() or
+                    any(ore_name.upper() in name for ore_name in ORE_TYPES.values()) or
+                    name in SUPPORTED_ORE_NAMES
+                )
+                if not is_supported_ore:
+                    continue
+                
+                sell_price = item.get('price_sell', 0)
+                if sell_price > 0:
+                    # Clean up ore name (remove parenthetical descriptions)
+                    clean_name = name.split('(')[0].strip()
+                    prices[clean_name] = {
+                        'price': float(sell_price),
+                        'location': 'Best Available',  # UEX gives us the best sell price
+                        'system': 'Stanton'
+                    }
+            
+            return prices
+            
+        except Exception as e:
+            print(f"⚠️ Error parsing UEX payroll prices: {e}")
+            return {}
+    
     def _process_uex_data(self, raw_data: Dict, category: str) -> Dict:
         """Process raw UEX API data into usable format."""
         processed = {}
@@ -319,12 +565,23 @@ class UEXCache:
         age = datetime.now() - cached_item["timestamp"]
         return age.total_seconds() < cached_item["ttl"]
     
+    def _is_cache_servable_stale(self, cache_key: str) -> bool:
+        """Check if expired cached data is still inside the stale-while-revalidate window."""
+        if cache_key not in self._cache:
+            return False
+        
+        cached_item = self._cache[cache_key]
+        age = datetime.now() - cached_item["timestamp"]
+        return age.total_seconds() < cached_item["ttl"] + cached_item["stale_ttl"]
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics for monitoring."""
         stats = {
             "running": self._running,
             "cache_entries": len(self._cache),
-            "entries": {}
+            "entries": {},
+            "tiers": {tier: dict(counts) for tier, counts in self._tier_stats.items()},
+            "http": get_uex_client().get_metrics()
         }
         
         for key, item in self._cache.items():
@@ -339,8 +596,7 @@ class UEXCache:
     
     def clear_cache(self):
         """Clear all cached data."""
-        self._cache.clear()
-        print("🗑️ UEX cache cleared")
+        self.invalidate()
 
 
 # Global cache instance
@@ -355,7 +611,9 @@ def get_uex_cache() -> UEXCache:
 
 async def initialize_uex_cache():
     """Initialize and start the global UEX cache."""
+    await initialize_uex_client()
     cache = get_uex_cache()
+    await cache.warm_start()
     await cache.start_background_refresh()
     return cache
 
@@ -364,4 +622,5 @@ async def shutdown_uex_cache():
     global _uex_cache
     if _uex_cache:
         await _uex_cache.stop_background_refresh()
-        _uex_cache = None
\ No newline at end of file
+        _uex_cache = None
+    await shutdown_uex_client()
\ No newline at end of file
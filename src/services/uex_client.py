@@ -0,0 +1,223 @@
+"""
+Shared UEX API HTTP Client for Red Legion Discord Bot
+
+One long-lived aiohttp session for every UEX Corp API call so refreshes reuse
+pooled keep-alive connections instead of paying DNS, TCP and TLS setup on
+each request. Responses are requested gzip-compressed, and repeat requests
+send If-None-Match / If-Modified-Since so an unchanged dataset comes back as
+a body-less 304.
+
+Usage:
+    from services.uex_client import get_uex_client
+
+    data = await get_uex_client().get_json()  # Parsed JSON or None
+
+The client is started in initialize_uex_cache() and closed in
+shutdown_uex_cache(); get_json() also starts it lazily if needed.
+"""
+
+import asyncio
+import aiohttp
+import ssl
+import json
+import time
+from datetime import datetime
+from typing import Dict, Optional, Any
+from pathlib import Path
+import sys
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import UEX_API_CONFIG
+from utils.instrumentation import UEX_FETCH_DURATION
+
+
+class UEXClient:
+    """
+    Long-lived UEX API client.
+
+    Features:
+    - Pooled keep-alive connections with DNS caching
+    - gzip/deflate transfer encoding
+    - ETag / Last-Modified conditional requests per URL
+    - Metrics for 304 hit rate and bytes saved
+    """
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 bearer_token: Optional[str] = None,
+                 timeout: Optional[int] = None,
+                 connection_limit: int = 4):
+        self.base_url = base_url or UEX_API_CONFIG['base_url']
+        self.bearer_token = bearer_token or UEX_API_CONFIG['bearer_token']
+        self.timeout = timeout or UEX_API_CONFIG.get('timeout', 30)
+        self.connection_limit = connection_limit
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._start_lock = asyncio.Lock()
+
+        # Conditional request validators and last body per URL
+        self._validators: Dict[str, Dict[str, Any]] = {}
+
+        self._metrics = {
+            "requests": 0,
+            "responses_200": 0,
+            "responses_304": 0,
+            "errors": 0,
+            "bytes_received": 0,
+            "bytes_saved": 0,
+            "last_request_at": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def start(self):
+        """Open the shared session (idempotent)."""
+        async with self._start_lock:
+            if self.is_running:
+                return
+
+            # SSL context (matching existing implementation)
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_context,
+                limit=self.connection_limit,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'Authorization': f'Bearer {self.bearer_token}',
+                    'Accept': 'application/json',
+                    'Accept-Encoding': 'gzip, deflate'
+                }
+            )
+            print("🌐 UEX API client session opened")
+
+    async def close(self):
+        """Close the shared session and its pooled connections."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            print("🌐 UEX API client session closed")
+        self._session = None
+
+    async def get_json(self, url: Optional[str] = None, force: bool = False) -> Optional[Any]:
+        """
+        GET a UEX endpoint and return the parsed JSON body.
+
+        Args:
+            url: Endpoint URL (defaults to the commodities endpoint)
+            force: Skip conditional headers and always download the body
+
+        Returns:
+            Parsed JSON (the cached body on 304) or None on failure
+        """
+        url = url or self.base_url
+        if not self.is_running:
+            await self.start()
+
+        cached = self._validators.get(url)
+        headers = {}
+        if cached and not force:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        self._metrics["requests"] += 1
+        self._metrics["last_request_at"] = datetime.now().isoformat()
+        started = time.perf_counter()
+        outcome = 'error'
+
+        try:
+            async with self._session.get(url, headers=headers) as response:
+                if response.status == 304 and cached:
+                    outcome = 'not_modified'
+                    self._metrics["responses_304"] += 1
+                    self._metrics["bytes_saved"] += cached['size']
+                    return cached['data']
+
+                if response.status != 200:
+                    self._metrics["errors"] += 1
+                    response_text = await response.text()
+                    print(f"❌ UEX API returned status {response.status}: {response_text[:200]}")
+                    return None
+
+                body = await response.read()
+                data = json.loads(body)
+
+                # Content-Length is the on-the-wire (compressed) size when present
+                wire_size = response.content_length or len(body)
+                outcome = 'ok'
+                self._metrics["responses_200"] += 1
+                self._metrics["bytes_received"] += wire_size
+
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    self._validators[url] = {
+                        'etag': etag,
+                        'last_modified': last_modified,
+                        'size': wire_size,
+                        'data': data
+                    }
+                else:
+                    self._validators.pop(url, None)
+
+                return data
+
+        except asyncio.TimeoutError:
+            self._metrics["errors"] += 1
+            print("⏰ UEX API request timed out")
+            return None
+        except aiohttp.ClientError as e:
+            self._metrics["errors"] += 1
+            print(f"🌐 UEX API connection error: {e}")
+            return None
+        except ValueError as e:
+            self._metrics["errors"] += 1
+            print(f"❌ UEX API returned invalid JSON: {e}")
+            return None
+        finally:
+            UEX_FETCH_DURATION.observe(time.perf_counter() - started, outcome)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get client metrics for monitoring."""
+        answered = self._metrics["responses_200"] + self._metrics["responses_304"]
+        return {
+            **self._metrics,
+            "running": self.is_running,
+            "not_modified_rate": self._metrics["responses_304"] / answered if answered else 0.0,
+        }
+
+
+# Global client instance
+_uex_client: Optional[UEXClient] = None
+
+def get_uex_client() -> UEXClient:
+    """Get the global UEX API client instance."""
+    global _uex_client
+    if _uex_client is None:
+        _uex_client = UEXClient()
+    return _uex_client
+
+async def initialize_uex_client() -> UEXClient:
+    """Open the global UEX API client session."""
+    client = get_uex_client()
+    await client.start()
+    return client
+
+async def shutdown_uex_client():
+    """Close the global UEX API client session."""
+    global _uex_client
+    if _uex_client:
+        await _uex_client.close()
+        _uex_client = None
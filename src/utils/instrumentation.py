@@ -0,0 +1,266 @@
+"""
+Instrumentation for Red Legion Discord Bot
+
+Low-overhead latency histograms and counters for the hot paths, rendered
+in the Prometheus text exposition format at /metrics on the Bot API:
+
+- event loop lag (a ticker task measuring how late its sleeps wake up)
+- database pool wait time and checkouts, query duration per statement
+- UEX API fetch latency
+- voice state handler latency
+- interaction (slash command) response time
+
+Histograms use fixed bucket bounds and a preallocated counts list per
+label set, so an observation is one bisect and two additions.
+
+Usage:
+    from utils.instrumentation import DB_QUERY_DURATION, statement_name, get_metrics_registry
+
+    started = time.perf_counter()
+    ...
+    DB_QUERY_DURATION.observe(time.perf_counter() - started, statement_name(query))
+
+    text = get_metrics_registry().render()
+"""
+
+import asyncio
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Bucket bounds in seconds
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+
+
+class Histogram:
+    """Cumulative-bucket histogram for a single label set."""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-quantile (approximate)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float('inf')
+
+
+class HistogramFamily:
+    """Histograms sharing a name and buckets, one per label value tuple."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=FAST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+        if not labelnames:
+            self._children[()] = Histogram(self.buckets)
+
+    def labels(self, *values) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def observe(self, value: float, *labels):
+        self.labels(*labels).observe(value)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for values, child in sorted(self._children.items()):
+            base = _format_labels(self.labelnames, values)
+            running = 0
+            for bound, count in zip(bounds, child.counts):
+                running += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{{{base + ',' + le if base else le}}} {running}"
+            yield f"{self.name}_sum{_braced(base)} {child.sum:.6f}"
+            yield f"{self.name}_count{_braced(base)} {child.count}"
+
+
+class CounterFamily:
+    """Monotonic counters, one per label value tuple."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for values, value in sorted(self._values.items()):
+            yield f"{self.name}{_braced(_format_labels(self.labelnames, values))} {value}"
+
+
+class GaugeFamily:
+    """Gauges read from a callback at render time."""
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], Optional[float]]):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+
+    def render(self) -> Iterable[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            value = None
+        if value is None:
+            return
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {float(value)}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _braced(labels: str) -> str:
+    return f"{{{labels}}}" if labels else ''
+
+
+class MetricsRegistry:
+    """Named metric families rendered together for /metrics."""
+
+    def __init__(self):
+        self._families: Dict[str, object] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=FAST_BUCKETS) -> HistogramFamily:
+        return self._register(HistogramFamily(name, documentation, labelnames, buckets))
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> CounterFamily:
+        return self._register(CounterFamily(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, fn: Callable[[], Optional[float]]) -> GaugeFamily:
+        return self._register(GaugeFamily(name, documentation, fn))
+
+    def _register(self, family):
+        self._families.setdefault(family.name, family)
+        return self._families[family.name]
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for family in self._families.values():
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+_WRITE_TARGET = re.compile(r'(?<!FOR\s)(?<!DO\s)\b(INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+([A-Za-z_][\w.]*)', re.IGNORECASE)
+_READ_TARGET = re.compile(r'\bFROM\s+([A-Za-z_][\w.]*)', re.IGNORECASE)
+
+def statement_name(query: str) -> str:
+    """
+    Stable low-cardinality name for a SQL statement.
+
+    Registered statements (database.statements) use their registry name.
+    Other writes are named after their target table, e.g.
+    "insert:participation", and reads after the first table selected from,
+    so parameter values never become label values.
+    """
+    return getattr(query, 'name', None) or _derived_statement_name(query)
+
+@lru_cache(maxsize=1024)
+def _derived_statement_name(query: str) -> str:
+    write = _WRITE_TARGET.search(query)
+    if write:
+        return f"{write.group(1).split()[0].lower()}:{write.group(2).lower()}"
+    words = query.split(None, 1)
+    verb = words[0].lower() if words else 'unknown'
+    read = _READ_TARGET.search(query)
+    return f"{verb}:{read.group(1).lower()}" if read else verb
+
+
+# Global registry and hot-path metrics
+_registry = MetricsRegistry()
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the global metrics registry."""
+    return _registry
+
+EVENT_LOOP_LAG = _registry.histogram(
+    'redlegion_event_loop_lag_seconds', 'How late a periodic event loop tick woke up.')
+DB_POOL_WAIT = _registry.histogram(
+    'redlegion_db_pool_wait_seconds', 'Time spent waiting to check out a pooled connection.', ('pool',))
+DB_CHECKOUTS = _registry.counter(
+    'redlegion_db_pool_checkouts_total', 'Connections checked out of the pool.', ('pool',))
+DB_QUERY_DURATION = _registry.histogram(
+    'redlegion_db_query_duration_seconds', 'Statement execution time by statement name.', ('statement',))
+UEX_FETCH_DURATION = _registry.histogram(
+    'redlegion_uex_fetch_duration_seconds', 'UEX API request latency by outcome.', ('outcome',), REQUEST_BUCKETS)
+VOICE_HANDLER_DURATION = _registry.histogram(
+    'redlegion_voice_handler_duration_seconds', 'Voice state update handler latency.', ('handler',))
+INTERACTION_RESPONSE = _registry.histogram(
+    'redlegion_interaction_response_seconds', 'Slash command time from interaction creation to completion.',
+    ('command',), REQUEST_BUCKETS)
+API_CACHE_REQUESTS = _registry.counter(
+    'redlegion_api_cache_requests_total', 'Bot API cached read requests by route and result.', ('route', 'result'))
+
+_last_loop_lag = 0.0
+_registry.gauge('redlegion_event_loop_lag_last_seconds', 'Most recent event loop lag sample.', lambda: _last_loop_lag)
+
+
+# Event loop lag monitor
+_loop_lag_task: Optional[asyncio.Task] = None
+
+async def _monitor_loop_lag(interval: float):
+    global _last_loop_lag
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        _last_loop_lag = max(0.0, loop.time() - expected)
+        EVENT_LOOP_LAG.observe(_last_loop_lag)
+
+def start_loop_lag_monitor(interval: float = LOOP_LAG_INTERVAL_SECONDS) -> asyncio.Task:
+    """Start the event loop lag ticker on the running loop (idempotent)."""
+    global _loop_lag_task
+    if _loop_lag_task is None or _loop_lag_task.done():
+        _loop_lag_task = asyncio.create_task(_monitor_loop_lag(interval))
+    return _loop_lag_task
+
+def stop_loop_lag_monitor():
+    """Stop the event loop lag ticker."""
+    global _loop_lag_task
+    if _loop_lag_task is not None:
+        _loop_lag_task.cancel()
+        _loop_lag_task = None
+
+def get_loop_lag() -> Dict[str, float]:
+    """Lag summary for heartbeat logs and diagnostics."""
+    histogram = EVENT_LOOP_LAG.labels()
+    return {
+        'last_ms': round(_last_loop_lag * 1000, 2),
+        'p99_ms': round(histogram.quantile(0.99) * 1000, 2),
+        'samples': histogram.count,
+    }
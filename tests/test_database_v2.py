@@ -286,6 +286,453 @@ def test_database_deployment_initialization():
         print(f"  ❌ Deployment initialization test failed: {e}")
         assert False, f"Deployment initialization test failed: {e}"
 
+def test_async_cursor_adapter():
+    """Test the asyncpg cursor facade used by get_async_cursor()."""
+    print("\n🧪 Testing AsyncCursor placeholder translation and buffering...")
+
+    import asyncio
+    from unittest.mock import AsyncMock
+    from database.connection import AsyncCursor, _to_asyncpg_sql, _returns_rows
+
+    # Placeholder translation keeps literal percent signs intact
+    assert _to_asyncpg_sql("SELECT * FROM t WHERE a = %s AND b LIKE 'x%%' AND c = %s") == \
+        "SELECT * FROM t WHERE a = $1 AND b LIKE 'x%' AND c = $2"
+    assert _returns_rows("\n  SELECT 1")
+    assert _returns_rows("UPDATE participation SET left_at = %s RETURNING username")
+    assert not _returns_rows("UPDATE events SET status = 'closed' WHERE event_id = %s")
+    print("  ✅ SQL translation working")
+
+    conn = Mock()
+    conn.fetch = AsyncMock(return_value=[{'user_id': 1}, {'user_id': 2}])
+    conn.execute = AsyncMock(return_value="UPDATE 3")
+    cursor = AsyncCursor(conn)
+
+    async def exercise():
+        await cursor.execute("SELECT user_id FROM participation WHERE event_id = %s", ('sm-12345',))
+        assert cursor.fetchone() == {'user_id': 1}
+        assert cursor.fetchall() == [{'user_id': 2}]
+        assert cursor.fetchone() is None
+        conn.fetch.assert_awaited_with("SELECT user_id FROM participation WHERE event_id = $1", 'sm-12345')
+
+        await cursor.execute("UPDATE events SET status = 'closed' WHERE event_id = %s", ('sm-12345',))
+        assert cursor.rowcount == 3
+        assert cursor.fetchall() == []
+
+    asyncio.run(exercise())
+    print("  ✅ AsyncCursor adapter test passed")
+
+def test_resolver_cache_persistence():
+    """Test the resolver cache persists endpoint data but never secrets."""
+    print("\n🧪 Testing resolver cache persistence...")
+
+    import json
+    import tempfile
+    from config.resolver_cache import ResolverCache
+
+    cache_file = os.path.join(tempfile.mkdtemp(), 'resolver_cache.json')
+    # A file written by an older version that persisted secrets
+    with open(cache_file, 'w') as f:
+        json.dump({
+            'secret:rl-test/db-password': {'value': 'hunter2', 'resolved_at': 1e12},
+            'cloudsql-ip:rl-test/db': {'value': '10.0.0.1', 'resolved_at': 1e12},
+        }, f)
+
+    cache = ResolverCache(cache_file)
+    assert cache.get_stats()['keys'] == ['cloudsql-ip:rl-test/db']
+    assert 'hunter2' not in open(cache_file).read()
+    print("  ✅ Secrets from older cache files scrubbed")
+
+    # Fresh endpoint data is served without calling the loader
+    assert cache.get('cloudsql-ip:rl-test/db', lambda: 1 / 0, persist=True) == '10.0.0.1'
+
+    assert cache.get('secret:rl-test/discord-token', lambda: 'token-value', persist=True) == 'token-value'
+    assert cache.get('cloudsql-ip:rl-test/replica', lambda: '10.0.0.2', persist=True) == '10.0.0.2'
+    with open(cache_file) as f:
+        stored = json.load(f)
+    assert sorted(stored) == ['cloudsql-ip:rl-test/db', 'cloudsql-ip:rl-test/replica']
+
+    # A restart sees the endpoints, while secrets must be resolved again
+    restarted = ResolverCache(cache_file)
+    assert restarted.get_stats()['keys'] == ['cloudsql-ip:rl-test/db', 'cloudsql-ip:rl-test/replica']
+
+    # Failed refreshes fall back to the last known good value
+    restarted.invalidate('cloudsql-ip:rl-test/db')
+    try:
+        restarted.get('cloudsql-ip:rl-test/db', lambda: None)
+        assert False, "a lookup with no last known good value must raise"
+    except LookupError:
+        pass
+    restarted._entries['cloudsql-ip:rl-test/replica']['resolved_at'] = 0
+    assert restarted.get('cloudsql-ip:rl-test/replica', lambda: 1 / 0) == '10.0.0.2'
+    assert restarted.get_stats()['fallbacks'] == 1
+    print("  ✅ Resolver cache persistence test passed")
+
+def test_member_stats_sql():
+    """Test member_stats fold, rollover and rebuild statements and their parameters."""
+    print("\n🧪 Testing member_stats SQL shape and parameters...")
+
+    import asyncio
+    from contextlib import asynccontextmanager
+    from database.connection import _to_asyncpg_sql, _returns_rows
+    from modules.mining import member_stats
+    from modules.mining.member_stats import (
+        FOLD_EVENT_SQL, MONTHLY_ROLLOVER_SQL, REBUILD_MEMBERS_SQL,
+        fold_event_into_member_stats, rebuild_member_stats
+    )
+
+    # Placeholder counts match the parameters each statement is given
+    assert _to_asyncpg_sql(MONTHLY_ROLLOVER_SQL).count('$') == 1
+    assert _to_asyncpg_sql(FOLD_EVENT_SQL).count('$') == 1
+    assert _to_asyncpg_sql(REBUILD_MEMBERS_SQL).count('$') == 2
+    assert "date_trunc('month', $1::date)" in _to_asyncpg_sql(MONTHLY_ROLLOVER_SQL)
+    assert 'p.user_id = ANY($2::bigint[])' in _to_asyncpg_sql(REBUILD_MEMBERS_SQL)
+
+    # Both upserts key on user_id and report the rows they touched
+    for sql in (FOLD_EVENT_SQL, REBUILD_MEMBERS_SQL):
+        assert 'ON CONFLICT (user_id) DO UPDATE' in sql
+        assert _returns_rows(sql)
+    assert not _returns_rows(MONTHLY_ROLLOVER_SQL)
+    # The lottery owns total_rewards_received; neither upsert writes it
+    assert 'total_rewards_received' not in FOLD_EVENT_SQL.split('INSERT INTO', 1)[1]
+    assert 'total_rewards_received' not in REBUILD_MEMBERS_SQL.split('INSERT INTO', 1)[1]
+    print("  ✅ Statement shape verified")
+
+    executed = []
+
+    class RecordingCursor:
+        rowcount = 0
+
+        async def execute(self, query, params=None):
+            executed.append((query, params))
+            self.rowcount = len(params[1]) if query is REBUILD_MEMBERS_SQL else 2
+
+        def fetchall(self):
+            return [{'user_id': user_id} for user_id in (11, 12, 13, 14, 15)]
+
+    async def exercise():
+        # Fold: rollover for the event's month first, then the upsert for that event
+        rows = await fold_event_into_member_stats(RecordingCursor(), 'sm-12345', date(2026, 3, 1))
+        assert rows == 2
+        assert executed == [(MONTHLY_ROLLOVER_SQL, (date(2026, 3, 1),)), (FOLD_EVENT_SQL, ('sm-12345',))]
+        executed.clear()
+
+        # Rebuild: one statement per batch of user ids, all for the same month
+        @asynccontextmanager
+        async def fake_cursor(commit=True):
+            yield RecordingCursor()
+
+        with patch.object(member_stats, 'get_async_cursor', fake_cursor):
+            result = await rebuild_member_stats(batch_size=2, as_of=date(2026, 3, 15))
+        assert result == {'success': True, 'members_rebuilt': 5}
+        rebuilds = [params for query, params in executed if query is REBUILD_MEMBERS_SQL]
+        assert rebuilds == [
+            (date(2026, 3, 15), [11, 12]),
+            (date(2026, 3, 15), [13, 14]),
+            (date(2026, 3, 15), [15]),
+        ]
+
+    asyncio.run(exercise())
+    print("  ✅ member_stats SQL test passed")
+
+def test_metrics_registry():
+    """Test metric families, Prometheus rendering and SQL statement naming."""
+    print("\n🧪 Testing metrics registry and statement names...")
+
+    from utils.instrumentation import MetricsRegistry, statement_name
+
+    registry = MetricsRegistry()
+    latency = registry.histogram('test_latency_seconds', 'Test latency.', ('route',), buckets=(0.1, 1.0))
+    # Registering a name again returns the existing family
+    assert registry.histogram('test_latency_seconds', 'Other docs.') is latency
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, 'prices')
+    requests = registry.counter('test_requests_total', 'Test requests.', ('route', 'result'))
+    requests.inc('say "hi"', 'hit')
+    requests.inc('say "hi"', 'hit', amount=2)
+    registry.gauge('test_last_seconds', 'Last sample.', lambda: 0.25)
+    registry.gauge('test_missing', 'Not reported.', lambda: None)
+    registry.gauge('test_broken', 'Raises.', lambda: 1 / 0)
+
+    histogram = latency.labels('prices')
+    assert histogram.counts == [2, 1, 1] and histogram.count == 4
+    assert histogram.quantile(0.5) == 0.1 and histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1.0) == float('inf')
+    print("  ✅ Histogram buckets and quantiles working")
+
+    lines = registry.render().splitlines()
+    assert 'test_latency_seconds_bucket{route="prices",le="0.1"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="prices",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="prices",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_sum{route="prices"} 2.650000' in lines
+    assert 'test_latency_seconds_count{route="prices"} 4' in lines
+    assert 'test_requests_total{route="say \\"hi\\"",result="hit"} 3' in lines
+    assert 'test_last_seconds 0.25' in lines
+    assert not any('test_missing' in line or 'test_broken' in line for line in lines)
+    print("  ✅ Prometheus rendering working")
+
+    class RegisteredStatement(str):
+        name = 'participation.record_join'
+
+    assert statement_name(RegisteredStatement('INSERT INTO participation VALUES (%s)')) == 'participation.record_join'
+    assert statement_name("INSERT INTO participation (event_id) VALUES (%s) ON CONFLICT (event_id) DO UPDATE SET x = 1") == 'insert:participation'
+    assert statement_name("UPDATE events SET status = 'closed' WHERE event_id = %s") == 'update:events'
+    assert statement_name("SELECT * FROM events WHERE event_id = 'sm-1' FOR UPDATE") == 'select:events'
+    assert statement_name("SELECT 1") == 'select'
+    print("  ✅ Metrics registry test passed")
+
+def test_slow_query_log():
+    """Test query fingerprints, aggregation, slow sampling and EXPLAIN through AsyncCursor."""
+    print("\n🧪 Testing slow query log...")
+
+    import asyncio
+    from unittest.mock import AsyncMock
+    import database.connection as connection
+    import database.query_log as query_log
+    from database.query_log import QueryLog, fingerprint, is_read_only
+
+    # Literals, parameters and IN lists collapse into one fingerprint
+    assert fingerprint("SELECT * FROM events -- note\nWHERE event_id = 'sm-1' AND n IN (1, 2, 3)") == \
+        fingerprint("select *  from events where event_id = %s and n in ($1, $2)") == \
+        "select * from events where event_id = ? and n in (...)"
+    assert is_read_only("WITH t AS (SELECT 1) SELECT * FROM t WHERE note = 'delete me'")
+    assert not is_read_only("WITH moved AS (DELETE FROM participation RETURNING *) SELECT * FROM moved")
+    assert not is_read_only("UPDATE events SET status = 'closed'")
+    print("  ✅ Fingerprints and read-only detection working")
+
+    log = QueryLog(enabled=True, slow_ms=100, explain_rate=1.0)
+    assert log.record("SELECT * FROM events WHERE event_id = 'sm-1'", 0.01, 1) is None
+    stat = log.record("SELECT * FROM events WHERE event_id = 'sm-2'", 0.2, 1)
+    assert stat is not None and stat.calls == 2 and stat.slow == 1 and stat.rows == 2
+    # Explained once per cooldown
+    assert log.record("SELECT * FROM events WHERE event_id = 'sm-3'", 0.3, 1) is None
+    log.record("UPDATE events SET status = 'closed' WHERE event_id = 'sm-1'", 0.05, 1)
+    assert [s.name for s in log.top(order_by='total')] == ['select:events', 'update:events']
+    assert [s.name for s in log.top(order_by='calls')][0] == 'select:events'
+    assert log.find(stat.id) is stat
+    assert log.get_stats()['calls'] == 4 and log.get_stats()['slow'] == 2
+
+    # The cheapest fingerprint is evicted at capacity
+    with patch.object(query_log, 'MAX_FINGERPRINTS', 2):
+        log.record("DELETE FROM events WHERE event_id = 'sm-9'", 0.5, 0)
+    assert sorted(s.name for s in log.top()) == ['delete:events', 'select:events']
+    log.reset()
+    assert log.top() == [] and log.get_stats()['fingerprints'] == 0
+    print("  ✅ Aggregation, sampling and eviction working")
+
+    class Savepoint:
+        rolled_back = False
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            Savepoint.rolled_back = exc_type is not None
+            return False
+
+    async def fetch(sql, *args):
+        if sql.startswith('EXPLAIN'):
+            return [('Seq Scan on events',)]
+        return [{'event_id': 'sm-1'}]
+
+    conn = Mock()
+    conn.fetch = AsyncMock(side_effect=fetch)
+    conn.transaction = Savepoint
+    slow_log = QueryLog(enabled=True, slow_ms=0, explain_rate=1.0)
+
+    async def exercise():
+        with patch.object(connection, 'get_query_log', return_value=slow_log):
+            await connection.AsyncCursor(conn).execute("SELECT * FROM events WHERE event_id = %s", ('sm-1',))
+
+    asyncio.run(exercise())
+    explained = slow_log.top()[0]
+    assert conn.fetch.await_args_list[1].args == (
+        "EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM events WHERE event_id = $1", 'sm-1'
+    )
+    assert Savepoint.rolled_back and explained.last_plan == 'Seq Scan on events'
+    print("  ✅ Slow query log test passed")
+
+def test_response_cache():
+    """Test cached API bodies: coalesced builds, versions, ETag revalidation and invalidation."""
+    print("\n🧪 Testing Bot API response cache...")
+
+    import asyncio
+    import json
+    from starlette.requests import Request
+    from api.response_cache import ResponseCache
+
+    cache = ResponseCache()
+    state = {'builds': 0, 'count': 1}
+
+    async def build():
+        state['builds'] += 1
+        await asyncio.sleep(0)
+        return {'count': state['count'], 'timestamp': f"t{state['builds']}"}
+
+    def request(if_none_match=None):
+        headers = [(b'if-none-match', if_none_match.encode())] if if_none_match else []
+        return Request({'type': 'http', 'headers': headers, 'method': 'GET', 'path': '/test'})
+
+    async def exercise():
+        # Concurrent misses share one build; later reads are hits until the version changes
+        first, second = await asyncio.gather(cache.get('roster:a', build, 60, 1), cache.get('roster:a', build, 60, 1))
+        assert first is second and state['builds'] == 1
+        assert await cache.get('roster:a', build, 60, 1) is first
+        rebuilt = await cache.get('roster:a', build, 60, 2)
+        assert state['builds'] == 2
+        # Same content keeps the ETag and the original body, timestamp included
+        assert rebuilt.etag == first.etag and rebuilt.body == first.body
+        assert json.loads(first.body) == {'count': 1, 'timestamp': 't1'}
+
+        response = await cache.respond(request(), 'roster:a', build, 60, 2)
+        assert response.status_code == 200 and response.headers['etag'] == first.etag
+        for header in (first.etag, f'"other", W/{first.etag}', '*'):
+            assert (await cache.respond(request(header), 'roster:a', build, 60, 2)).status_code == 304
+        assert state['builds'] == 2
+
+        # Changed content: new ETag, stale validators get the full body
+        state['count'] = 2
+        changed = await cache.get('roster:a', build, 60, 3)
+        assert changed.etag != first.etag and json.loads(changed.body)['count'] == 2
+        assert (await cache.respond(request(first.etag), 'roster:a', build, 60, 3)).status_code == 200
+
+        # Expired entries are rebuilt
+        await cache.get('prices', build, 0)
+        await cache.get('prices', build, 0)
+        assert state['builds'] == 5
+
+        # Invalidation drops only the matching prefix
+        cache.invalidate('roster:')
+        assert cache.get_stats()['entries'] == 1
+        await cache.get('roster:a', build, 60, 3)
+        assert state['builds'] == 6
+        cache.invalidate()
+        assert cache.get_stats()['entries'] == 0
+
+    asyncio.run(exercise())
+    print("  ✅ Response cache test passed")
+
+def test_single_flight():
+    """Test concurrent calls share one task, failures reach every caller and cancellation is isolated."""
+    print("\n🧪 Testing single-flight coalescing...")
+
+    import asyncio
+    from services.single_flight import SingleFlight
+
+    flight = SingleFlight()
+    calls = {'count': 0}
+
+    async def fetch():
+        calls['count'] += 1
+        await asyncio.sleep(0.01)
+        return calls['count']
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError('upstream down')
+
+    async def exercise():
+        results = await asyncio.gather(*(flight.do('ores', fetch) for _ in range(5)))
+        assert results == [1] * 5 and not flight.in_flight('ores')
+        # Finished keys start a new call
+        assert await flight.do('ores', fetch) == 2
+
+        errors = await asyncio.gather(flight.do('bad', fail), flight.do('bad', fail), return_exceptions=True)
+        assert all(isinstance(error, RuntimeError) for error in errors)
+        assert not flight.in_flight('bad')
+
+        # A cancelled caller leaves the shared fetch running for the others
+        impatient = asyncio.ensure_future(flight.do('ores', fetch))
+        patient = asyncio.ensure_future(flight.do('ores', fetch))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        assert await patient == 3 and impatient.cancelled()
+
+        task = flight.start('ores', fetch)
+        assert flight.start('ores', fetch) is task and flight.in_flight('ores')
+        assert await task == 4
+
+    asyncio.run(exercise())
+    print("  ✅ Single-flight test passed")
+
+def test_guild_config_cache():
+    """Test guild configs are loaded once, fallbacks are retried and invalidation reloads."""
+    print("\n🧪 Testing guild config cache...")
+
+    import config.guild_cache as guild_cache
+    from config.guild_cache import GuildConfigCache
+
+    cache = GuildConfigCache()
+    tables = {1: {'Dispatch': '101', 'Alpha': '102'}, 2: {}}
+    cache._load_channels = Mock(side_effect=lambda guild_id: dict(tables[guild_id]))
+
+    with patch.dict(guild_cache.DISCORD_CONFIG, {'ORG_ROLE_ID': '555', 'GUILD_ID': '1'}):
+        config = cache.get(1)
+        assert cache.get() is config and cache.get('1') is config
+        assert config.from_database and config.org_role_id == 555
+        assert cache.is_mining_channel(101, 1) and cache.is_mining_channel('102')
+        assert not cache.is_mining_channel(999, 1)
+        assert cache._load_channels.call_count == 1
+        print("  ✅ Database config cached")
+
+        # No database rows: the fallback channels are served, then retried after the window
+        fallback = cache.get(2)
+        assert not fallback.from_database and dict(fallback.channels) == guild_cache.SUNDAY_MINING_CHANNELS_FALLBACK
+        assert cache.get(2) is fallback
+        tables[2] = {'Beta': '201'}
+        with patch.object(guild_cache, 'FALLBACK_RETRY_SECONDS', 0):
+            assert cache.get(2).is_mining_channel(201)
+        assert cache._load_channels.call_count == 3
+        print("  ✅ Fallback retried")
+
+        # Invalidation reloads one guild, or all of them
+        tables[1] = {'Dispatch': '101'}
+        cache.invalidate(1)
+        assert not cache.get(1).is_mining_channel(102)
+        assert cache.get(2).is_mining_channel(201) and cache._load_channels.call_count == 4
+        cache.invalidate()
+        assert cache.get_stats()['guilds_cached'] == 0
+        stats = cache.get_stats()
+        assert stats['loads'] == 3 and stats['fallbacks'] == 1 and stats['invalidations'] == 2
+    print("  ✅ Guild config cache test passed")
+
+def test_lottery_entries_sql():
+    """Test BUILD_ENTRIES_SQL shape and that drawn or unknown lotteries are never rebuilt."""
+    print("\n🧪 Testing lottery entry SQL shape and guards...")
+
+    import asyncio
+    from contextlib import asynccontextmanager
+    from database.connection import _to_asyncpg_sql, _returns_rows
+    from modules.lottery import core as lottery_core
+    from modules.lottery.core import BUILD_ENTRIES_SQL, LotteryManager
+
+    # One parameter (the lottery id); rows come back so rowcount is the entrant count
+    assert _to_asyncpg_sql(BUILD_ENTRIES_SQL).count('$') == 1
+    assert _returns_rows(BUILD_ENTRIES_SQL)
+    # One ticket per qualifying event, only from closed events
+    assert 'q.events_qualifying, q.events_qualifying' in BUILD_ENTRIES_SQL
+    assert "e.status = 'closed'" in BUILD_ENTRIES_SQL
+    print("  ✅ Statement shape verified")
+
+    for lottery, expected in ((None, 'Lottery not found'), ({'status': 'drawn'}, 'Lottery has already been drawn')):
+        executed = []
+
+        class GuardCursor:
+            async def execute(self, query, params=None):
+                executed.append(query)
+
+            def fetchone(self):
+                return lottery
+
+        @asynccontextmanager
+        async def fake_cursor(commit=True):
+            yield GuardCursor()
+
+        with patch.object(lottery_core, 'get_async_cursor', fake_cursor):
+            result = asyncio.run(LotteryManager().build_entries('lot-x7k2m9'))
+        assert result == {'success': False, 'error': expected}
+        assert len(executed) == 1
+    print("  ✅ Lottery entries SQL test passed")
+
 def run_all_database_tests():
     """Run all database architecture tests."""
     print("🚀 Running Database Architecture v2.0.0 Tests...")
@@ -297,6 +744,15 @@ def run_all_database_tests():
         ("Legacy Compatibility", test_legacy_compatibility),
         ("Schema Initialization", test_database_schema_initialization),
         ("Deployment Initialization", test_database_deployment_initialization),
+        ("Async Cursor Adapter", test_async_cursor_adapter),
+        ("Resolver Cache Persistence", test_resolver_cache_persistence),
+        ("Member Stats SQL", test_member_stats_sql),
+        ("Metrics Registry", test_metrics_registry),
+        ("Slow Query Log", test_slow_query_log),
+        ("Response Cache", test_response_cache),
+        ("Single-Flight Coalescing", test_single_flight),
+        ("Guild Config Cache", test_guild_config_cache),
+        ("Lottery Entries SQL", test_lottery_entries_sql),
     ]
     
     passed = 0
@@ -72,4 +72,783 @@ def test_mining_module_architecture(mock_db, mock_discord):
     
     print("✅ New modules architecture verified")
     print("✅ Mining and payroll modules exist")
-    print("✅ Command wrappers exist")
\ No newline at end of file
+    print("✅ Command wrappers exist")
+
+def test_concurrency_sweep():
+    """Test sweep-line peak, channel peaks and histogram."""
+    from datetime import datetime
+    from modules.mining.concurrency import compute_concurrency
+    
+    t0 = datetime(2026, 1, 4, 18, 0)
+    rows = [
+        {'joined_at': t0.replace(minute=0), 'left_at': t0.replace(minute=30), 'channel_id': 1},
+        {'joined_at': t0.replace(minute=10), 'left_at': t0.replace(minute=20), 'channel_id': 1},
+        # Channel switch at :20 must not double count
+        {'joined_at': t0.replace(minute=20), 'left_at': None, 'channel_id': 2},
+        {'joined_at': t0.replace(minute=15), 'left_at': t0.replace(minute=25), 'channel_id': 2},
+    ]
+    
+    stats = compute_concurrency(rows, now=t0.replace(minute=40), bucket_minutes=10)
+    
+    assert stats.max_concurrent == 3
+    assert stats.peak_at == t0.replace(minute=15)
+    assert stats.channel_peaks == {1: 2, 2: 2}
+    assert [count for _, count in stats.histogram] == [1, 3, 3, 1]
+    assert compute_concurrency([]).max_concurrent == 0
+    print("✅ Concurrency sweep verified")
+
+def test_payroll_allocation_exact():
+    """Test largest-remainder allocation sums exactly and matches legacy shares."""
+    from decimal import Decimal, ROUND_HALF_UP
+    from modules.payroll.allocation import (
+        participation_weights, allocate_payroll, largest_remainder, to_centi, from_centi
+    )
+    
+    def legacy(total, minutes, donation_percentage):
+        """Per-participant Decimal quantization used before the allocation engine."""
+        total_minutes = sum(minutes)
+        results = []
+        for m in minutes:
+            base = total * Decimal(m) / Decimal(total_minutes)
+            final = base - base * Decimal(donation_percentage) / Decimal('100')
+            results.append((base.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                            final.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)))
+        return results
+    
+    corpus = [
+        (Decimal('1000000.00'), [Decimal('60'), Decimal('60'), Decimal('60')], 0),
+        (Decimal('2345678.91'), [Decimal('187.25'), Decimal('43.5'), 12, 240, Decimal('0.75')], 0),
+        (Decimal('999999.99'), [30, 45, 90, 15, 120, 7], 10),
+        (Decimal('0.05'), [1, 1, 1], 0),
+        # Open-session minutes come back from EXTRACT(EPOCH)/60 with many digits
+        (Decimal('87654321.00'), [Decimal('37.48333333333333333'), Decimal('212.0166666666666667'), 5], 25),
+    ]
+    
+    for total, minutes, donation in corpus:
+        allocation = allocate_payroll(to_centi(total), participation_weights(minutes), donation)
+        assert sum(allocation.base_centi) == to_centi(total)
+        assert sum(allocation.final_centi) + allocation.retained_centi == to_centi(total)
+        for (base, final), base_centi, final_centi in zip(
+            legacy(total, minutes, donation), allocation.base_centi, allocation.final_centi
+        ):
+            assert abs(from_centi(base_centi) - base) <= Decimal('0.01')
+            assert abs(from_centi(final_centi) - final) <= Decimal('0.01')
+    
+    # Multipliers and caps reshape weights
+    weights = participation_weights([600, 30, 30], multipliers=[1, 1.5, 1], cap_minutes=60)
+    assert largest_remainder(1001, weights) == [445, 334, 222]
+    print("✅ Payroll allocation exact")
+
+def test_lottery_draw_weighted():
+    """Test seeded lottery drawing is reproducible, distinct and ticket-weighted."""
+    from collections import Counter
+    from modules.lottery.drawing import TicketTree, draw_winners
+    
+    tree = TicketTree([3, 0, 5, 2])
+    assert tree.total == 10
+    assert [tree.find(ticket) for ticket in range(10)] == [0, 0, 0, 2, 2, 2, 2, 2, 3, 3]
+    assert tree.remove(2) == 5 and tree.total == 5
+    assert [tree.find(ticket) for ticket in range(5)] == [0, 0, 0, 3, 3]
+    
+    user_ids = [101, 102, 103, 104, 105]
+    tickets = [1, 4, 0, 2, 3]
+    first = draw_winners('lot-test', user_ids, tickets, winner_count=10, seed='audit')
+    replay = draw_winners('lot-test', user_ids, tickets, winner_count=10, seed='audit')
+    assert first.winners == replay.winners
+    assert first.entries_digest == replay.entries_digest
+    assert sorted(first.winners) == [0, 1, 3, 4]      # Distinct, never the zero-ticket entrant
+    assert first.ticket_snapshots[0] == first.total_tickets == 10
+    
+    wins = Counter(draw_winners('lot-test', user_ids, tickets, seed=str(s)).winners[0] for s in range(4000))
+    assert wins[2] == 0
+    assert wins[1] > wins[4] > wins[3] > wins[0]
+    print("✅ Lottery drawing weighted")
+
+def test_lottery_build_entries_default_tenure():
+    """Test a default-tenure lottery rebuilds entries without a recorded org join date."""
+    import asyncio
+    from contextlib import asynccontextmanager
+    from modules.lottery import core as lottery_core
+    
+    executed = []
+    
+    class FakeCursor:
+        rowcount = 0
+        async def execute(self, query, params=None):
+            executed.append((' '.join(query.split()), params))
+            if query is lottery_core.BUILD_ENTRIES_SQL:
+                self.rowcount = 4
+        def fetchone(self):
+            return {'status': 'open'}
+    
+    @asynccontextmanager
+    async def fake_cursor(commit=True):
+        yield FakeCursor()
+    
+    with patch.object(lottery_core, 'get_async_cursor', fake_cursor):
+        result = asyncio.run(lottery_core.LotteryManager().build_entries('lot-x7k2m9'))
+    
+    assert result == {'success': True, 'entrants': 4}
+    assert [params for _, params in executed] == [('lot-x7k2m9',)] * 3
+    assert executed[1][0] == 'DELETE FROM lottery_entries WHERE lottery_id = %s'
+    # min_org_tenure_days defaults to 30; members without a join date fall
+    # back to their first org-member event instead of comparing NULL
+    build_sql = executed[2][0]
+    assert 'COALESCE(ms.org_join_date, q.org_join_date, f.first_org_event)' in build_sql
+    assert 'WHERE COALESCE(p.is_org_member, false)' in build_sql
+    print("✅ Lottery entries built with tenure fallback")
+
+def test_close_event_flushes_journal_first():
+    """Test closing an event stops tracking (flushing the journal) before the member_stats fold."""
+    import asyncio
+    from contextlib import asynccontextmanager
+    from datetime import datetime
+    from modules.mining import events as events_module
+    from modules.mining.member_stats import FOLD_EVENT_SQL
+    from database.statements import CLOSE_EVENT
+    
+    calls = []
+    
+    class FakeCursor:
+        rowcount = 0
+        async def execute(self, query, params=None):
+            calls.append(query)
+        def fetchone(self):
+            return {'started_at': datetime(2026, 1, 4, 18, 0), 'ended_at': datetime(2026, 1, 4, 20, 0),
+                    'participant_count': 2, 'max_concurrent': 2}
+    
+    @asynccontextmanager
+    async def fake_cursor(commit=True):
+        yield FakeCursor()
+    
+    tracker = Mock()
+    tracker.get_roster.return_value = Mock()
+    tracker.stop_tracking = AsyncMock(side_effect=lambda event_id: calls.append('stop_tracking'))
+    tracker.journal.pending_count.return_value = 0
+    
+    with patch.object(events_module, 'get_database_url', return_value=None), \
+         patch.object(events_module, 'get_async_cursor', fake_cursor):
+        manager = events_module.MiningEventManager(tracker)
+        result = asyncio.run(manager.close_event('sm-a', 1, 'officer'))
+        assert result['success']
+        assert calls[0] == 'stop_tracking' and calls[1] is CLOSE_EVENT and calls[-1] is FOLD_EVENT_SQL
+        tracker.stop_tracking.assert_awaited_once_with('sm-a')
+        
+        # Rows the journal could not write keep the event open so the close can be retried
+        calls.clear()
+        tracker.get_roster.return_value = None
+        tracker.journal.flush = AsyncMock(return_value=0)
+        tracker.journal.pending_count.return_value = 3
+        result = asyncio.run(manager.close_event('sm-b', 1, 'officer'))
+        assert not result['success'] and calls == []
+        tracker.journal.flush.assert_awaited_once()
+    print("✅ Event close flushes participation before folding")
+
+def test_on_ready_reconnect_keeps_voice_tracker():
+    """Test a gateway reconnect (second on_ready) does not rebuild the voice tracker."""
+    import asyncio
+    from bot import client as client_module
+    
+    with patch.object(client_module, 'validate_config'):
+        bot = client_module.RedLegionBot()
+    tracker = Mock()
+    
+    async def start_api_server():
+        bot.voice_tracker = tracker
+    
+    async def exercise():
+        with patch('services.uex_cache.initialize_uex_cache', AsyncMock()), \
+             patch.object(bot.tree, 'sync', AsyncMock(return_value=[])), \
+             patch.object(bot, '_start_api_server', AsyncMock(side_effect=start_api_server)) as start:
+            await bot.on_ready()
+            await bot.on_ready()
+        return start
+    
+    start = asyncio.run(exercise())
+    assert start.await_count == 1
+    assert bot.voice_tracker is tracker
+    print("✅ Voice tracker survives gateway reconnects")
+
+def test_journal_coalesce():
+    """Test journal batches fold into final row states."""
+    from datetime import datetime
+    from modules.mining.journal import ParticipationJournal
+    
+    journal = ParticipationJournal(spill_path=None, dead_letter_path=None)
+    t0 = datetime(2026, 1, 4, 18, 0)
+    join = dict(username='miner', display_name='Miner', channel_id=1, channel_name='vc', is_org_member=True)
+    
+    # Join and leave in one batch: a single closed INSERT, no UPDATE
+    assert journal.record_join('sm-a', 1, joined_at=t0, **join)
+    assert not journal.record_join('sm-a', 1, joined_at=t0, **join)
+    journal.record_leave('sm-a', 1, t0.replace(minute=45))
+    inserts, leaves = journal._coalesce(journal._entries)
+    assert leaves == []
+    assert len(inserts) == 1
+    assert inserts[0]['left_at'] == t0.replace(minute=45) and inserts[0]['duration_minutes'] == 45
+    
+    # Leave only (row written by an earlier flush): an UPDATE
+    journal._entries = []
+    journal.record_leave('sm-a', 2, t0.replace(minute=30))
+    inserts, leaves = journal._coalesce(journal._entries)
+    assert inserts == []
+    assert leaves == [('sm-a', 2, t0.replace(minute=30))]
+    print("✅ Journal coalescing verified")
+
+def test_journal_spill_replay(tmp_path):
+    """Test spill file replay skips entries at or below committed_seq."""
+    import json
+    from datetime import datetime
+    from modules.mining.journal import JournalEntry, ParticipationJournal
+    
+    t0 = datetime(2026, 1, 4, 18, 0)
+    spill_path = tmp_path / 'journal.jsonl'
+    lines = [
+        JournalEntry(1, 'join', 'sm-a', 1, t0, 'a', 'A', 1, 'vc').to_json(),
+        JournalEntry(2, 'join', 'sm-a', 2, t0, 'b', 'B', 1, 'vc').to_json(),
+        json.dumps({'committed_seq': 2}),
+        JournalEntry(3, 'leave', 'sm-a', 1, t0.replace(minute=5)).to_json(),
+        'not json',
+        JournalEntry(4, 'join', 'sm-a', 3, t0, 'c', 'C', 1, 'vc').to_json(),
+    ]
+    spill_path.write_text('\n'.join(lines) + '\n')
+    
+    journal = ParticipationJournal(spill_path=str(spill_path), dead_letter_path=None)
+    journal._replay_spill_file()
+    assert [entry.seq for entry in journal._entries] == [3, 4]
+    assert journal._committed_seq == 2 and journal._seq == 4
+    # Replayed joins belong to events this process does not track yet
+    assert not journal.is_active('sm-a', 3)
+    assert journal.record_join('sm-a', 3, 'c', 'C', 1, 'vc', t0, False)
+    print("✅ Journal spill replay verified")
+
+def test_journal_flush_failure(tmp_path):
+    """Test failed flushes re-queue the batch, then bad rows are dead-lettered."""
+    import asyncio
+    import json
+    import asyncpg
+    from contextlib import asynccontextmanager
+    from datetime import datetime
+    from modules.mining import journal as journal_module
+    
+    t0 = datetime(2026, 1, 4, 18, 0)
+    written = []
+    
+    class Savepoint:
+        async def __aenter__(self):
+            return self
+        async def __aexit__(self, *exc):
+            return False
+    
+    class FakeCursor:
+        connection = Mock(transaction=Savepoint)
+        async def execute(self, query, params=None):
+            # Unknown event: FK violation for any statement that includes it
+            if 'sm-gone' in params[0]:
+                raise asyncpg.ForeignKeyViolationError('event_id not present in events')
+            written.extend(params[1])
+    
+    @asynccontextmanager
+    async def fake_cursor(commit=True):
+        yield FakeCursor()
+    
+    journal = journal_module.ParticipationJournal(
+        spill_path=None, dead_letter_path=str(tmp_path / 'dead.jsonl')
+    )
+    for event_id, user_id in [('sm-a', 1), ('sm-gone', 2), ('sm-a', 3)]:
+        journal.record_join(event_id, user_id, 'u', 'U', 1, 'vc', t0, False)
+    
+    async def exercise():
+        with patch.object(journal_module, 'get_async_cursor', fake_cursor):
+            for attempt in range(1, journal_module.MAX_BATCH_FAILURES + 1):
+                assert await journal.flush() == 0
+                assert journal.pending_count() == 3 and journal.batch_failures == attempt
+            # Next flush isolates the bad row and commits the rest
+            assert await journal.flush() == 3
+    
+    asyncio.run(exercise())
+    assert sorted(written) == [1, 3]
+    assert journal.pending_count() == 0 and journal.batch_failures == 0
+    dead = [json.loads(line) for line in (tmp_path / 'dead.jsonl').read_text().splitlines()]
+    assert len(dead) == 1 and dead[0]['row']['user_id'] == 2 and dead[0]['kind'] == 'insert'
+    print("✅ Journal flush failure handling verified")
+
+def test_payroll_report_render(tmp_path):
+    """Test payroll PDFs render in the worker and repeat requests hit the disk cache."""
+    import asyncio
+    import discord
+    from decimal import Decimal
+    from modules.payroll.reports import ReportService
+    
+    result = {
+        'payroll_id': 'pay-sm-a',
+        'event_data': {'event_id': 'sm-a', 'event_name': 'Aaron Halo run', 'organizer_name': 'Org'},
+        'total_value_auec': Decimal('1000.00'),
+        'total_donated_auec': Decimal('0.00'),
+        'calculated_at': '2026-01-04T20:00:00',
+        'payouts': [
+            {
+                'user_id': user_id, 'username': f'miner{user_id}', 'participation_minutes': 60,
+                'participation_percentage': 50.0, 'base_payout_auec': Decimal('500.00'),
+                'final_payout_auec': Decimal('500.00'), 'is_donor': False
+            }
+            for user_id in (1, 2)
+        ],
+    }
+    service = ReportService(cache_dir=str(tmp_path))
+    
+    async def exercise():
+        try:
+            first = await service.render_payroll_report(result)
+            second = await service.render_payroll_report(result)
+        finally:
+            service.shutdown()
+        return first, second
+    
+    first, second = asyncio.run(exercise())
+    assert isinstance(first, discord.File) and first.filename == 'payroll_pay-sm-a.pdf'
+    assert first.fp.read(5) == b'%PDF-'
+    first.close()
+    second.close()
+    assert service.stats == {'rendered': 1, 'cache_hits': 1, 'errors': 0}
+    assert len(list(tmp_path.glob('*.pdf'))) == 1
+    print("✅ Payroll report rendering verified")
+
+def test_prices_force_refresh_not_cached():
+    """Test a forced price refresh is answered directly and never served from the response cache."""
+    import asyncio
+    import json
+    from starlette.requests import Request
+    import api.server as server
+    
+    routes = {route.path: route.endpoint for route in server.BotAPI().app.routes if hasattr(route, 'endpoint')}
+    get_prices = routes['/prices/current']
+    request = Request({'type': 'http', 'headers': [], 'method': 'GET', 'path': '/prices/current'})
+    fetch = AsyncMock(return_value={'GOLD': {'price': 6500.0, 'location': 'Best Available', 'system': 'Stanton'}})
+    
+    async def exercise():
+        server.get_response_cache().invalidate('prices')
+        with patch.object(server.MiningProcessor, 'get_current_prices', fetch):
+            forced = await get_prices(request, force_refresh=True)
+            first = await get_prices(request)
+            second = await get_prices(request)
+        return forced, json.loads(first.body), second
+    
+    forced, first, second = asyncio.run(exercise())
+    assert forced['cached'] is False
+    assert first['cached'] is True and first['total_ores'] == 1
+    assert json.loads(second.body) == first
+    assert [call.kwargs for call in fetch.await_args_list] == [{'refresh': True}, {'refresh': False}]
+    print("✅ Forced price refresh bypasses the response cache")
+
+def test_org_member_check_uses_guild_config():
+    """Test org membership reads each member's org role from the cached guild config."""
+    import asyncio
+    import modules.mining.participation as participation
+    
+    configs = {1: Mock(org_role_id=111), 2: Mock(org_role_id=None)}
+    cache = Mock()
+    cache.get.side_effect = lambda guild_id: configs[guild_id]
+    
+    def member(guild_id, role_ids):
+        return Mock(guild=Mock(id=guild_id), display_name=f'member-{guild_id}',
+                    get_role=lambda role_id: Mock() if role_id in role_ids else None)
+    
+    tracker = participation.VoiceTracker(Mock())
+    with patch.object(participation, 'get_guild_config_cache', return_value=cache):
+        is_org_member = tracker._org_member_check()
+        assert is_org_member(member(1, {111})) is True
+        assert is_org_member(member(1, {222})) is False
+        assert is_org_member(member(2, {111})) is False
+        assert asyncio.run(tracker._check_org_member_status(member(1, {111}))) is True
+    assert [call.args for call in cache.get.call_args_list] == [(1,), (1,), (2,), (1,)]
+    print("✅ Org member check reads the guild config cache")
+
+def test_event_report_endpoint(tmp_path):
+    """Test the event report endpoint renders the participation PDF and 404s unknown events."""
+    import asyncio
+    from decimal import Decimal
+    from fastapi import HTTPException
+    import api.server as server
+    from modules.payroll.core import ParticipantSummary
+    from modules.payroll.reports import ReportService
+    
+    participants = [
+        ParticipantSummary(
+            event_id='sm-a', user_id=user_id, username=f'miner{user_id}', display_name=None,
+            total_minutes=Decimal(minutes), session_count=1, is_org_member=True,
+            first_joined=None, last_active=None
+        )
+        for user_id, minutes in ((1, 90), (2, 30))
+    ]
+    routes = {route.path: route.endpoint for route in server.BotAPI().app.routes if hasattr(route, 'endpoint')}
+    get_report = routes['/events/{event_id}/report']
+    service = ReportService(cache_dir=str(tmp_path))
+    
+    async def exercise():
+        get_event = AsyncMock(side_effect=lambda event_id: {'event_id': 'sm-a', 'event_name': 'Aaron Halo run'} if event_id == 'sm-a' else None)
+        try:
+            with patch.object(server.PayrollCalculator, 'get_event_by_id', get_event), \
+                 patch.object(server.PayrollCalculator, 'get_event_participants', AsyncMock(return_value=participants)), \
+                 patch.object(server, 'get_report_service', return_value=service):
+                response = await get_report('sm-a')
+                try:
+                    await get_report('sm-missing')
+                    missing = None
+                except HTTPException as e:
+                    missing = e.status_code
+        finally:
+            service.shutdown()
+        return response, missing
+    
+    response, missing = asyncio.run(exercise())
+    assert response.media_type == 'application/pdf'
+    assert 'event_sm-a.pdf' in response.headers['content-disposition']
+    with open(response.path, 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+    assert missing == 404
+    assert service.stats == {'rendered': 1, 'cache_hits': 0, 'errors': 0}
+    print("✅ Event report endpoint verified")
+
+def test_voice_routing_channel_index():
+    """Test voice updates route through the channel -> event index, including moves and switches."""
+    import asyncio
+    from modules.mining.live_stream import get_live_streams
+    from modules.mining.participation import VoiceTracker
+    
+    tracker = VoiceTracker(Mock())
+    tracker.journal = Mock()
+    tracker._check_org_member_status = AsyncMock(return_value=False)
+    member = Mock(id=7, display_name='Miner Seven')
+    member.name = 'miner7'
+    
+    def state(channel_id):
+        if channel_id is None:
+            return Mock(channel=None)
+        channel = Mock(id=channel_id)
+        channel.name = f'channel-{channel_id}'
+        return Mock(channel=channel)
+    
+    # The newer event claims a shared channel
+    assert tracker._register_event('sm-a', {'A1': '101', 'A2': '102'}) == {'success': True}
+    assert tracker._register_event('sm-b', {'B1': '201', 'A2': '102', 'Bad': 'x'}) == {'success': True}
+    assert tracker.channel_events == {101: 'sm-a', 102: 'sm-b', 201: 'sm-b'}
+    assert tracker.tracked_events['sm-a']['channel_ids'] == {101}
+    
+    async def exercise():
+        await tracker.on_voice_state_update(member, state(None), state(101))
+        await tracker.on_voice_state_update(member, state(101), state(101))  # mute toggle
+        await tracker.on_voice_state_update(member, state(101), state(102))  # across events
+        await tracker.on_voice_state_update(member, state(102), state(201))  # within sm-b
+        await tracker.on_voice_state_update(member, state(201), state(999))  # untracked channel
+    
+    try:
+        asyncio.run(exercise())
+        joins = [call.kwargs['event_id'] for call in tracker.journal.record_join.call_args_list]
+        leaves = [call.args[0] for call in tracker.journal.record_leave.call_args_list]
+        assert joins == ['sm-a', 'sm-b', 'sm-b']
+        assert leaves == ['sm-a', 'sm-b', 'sm-b']
+        assert len(tracker.get_roster('sm-a')) == 0 and len(tracker.get_roster('sm-b')) == 0
+        assert [message.type for message in get_live_streams().get('sm-b').backlog] == ['join', 'switch', 'leave']
+        
+        tracker._unindex_channels('sm-b')
+        assert tracker.channel_events == {101: 'sm-a'}
+    finally:
+        get_live_streams().close('sm-a')
+        get_live_streams().close('sm-b')
+    print("✅ Channel -> event voice routing verified")
+
+def test_voice_replay_harness(tmp_path):
+    """Test the voice replay harness round-trips streams and replays them against the tracker."""
+    import importlib.util
+    import json
+    import random
+    import subprocess
+    
+    script = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'benchmarks', 'voice_replay.py')
+    spec = importlib.util.spec_from_file_location('voice_replay', script)
+    voice_replay = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(voice_replay)
+    
+    records = list(voice_replay.generate_stream(200, 2, 3, 20, 0.5, random.Random(3)))
+    assert records == list(voice_replay.generate_stream(200, 2, 3, 20, 0.5, random.Random(3)))
+    stream_path = tmp_path / 'stream.jsonl'
+    voice_replay.write_stream(stream_path, records)
+    meta, updates = voice_replay.load_stream(stream_path)
+    assert meta == records[0]['meta'] and updates == records[1:]
+    assert sorted(meta['events']) == ['sm-bench0', 'sm-bench1']
+    assert all(update['t'] <= later['t'] for update, later in zip(updates, updates[1:]))
+    
+    voice_replay.write_stream(tmp_path / 'no_meta.jsonl', records[1:])
+    with pytest.raises(ValueError):
+        voice_replay.load_stream(tmp_path / 'no_meta.jsonl')
+    
+    baseline = {'targets': {'tracker': {'wall_s': 2.0, 'handler_latency': {'p99_ms': 0.0}}}}
+    current = {'targets': {'tracker': {'wall_s': 1.5, 'handler_latency': {'p99_ms': 0.2}}}}
+    assert voice_replay.compare(baseline, current) == {
+        'tracker.handler_latency.p99_ms': {'baseline': 0.0, 'current': 0.2, 'change_pct': None},
+        'tracker.wall_s': {'baseline': 2.0, 'current': 1.5, 'change_pct': -25.0},
+    }
+    
+    # The replay patches module globals, so it runs in its own process
+    output_path = tmp_path / 'results.json'
+    subprocess.run(
+        [sys.executable, script, '--replay', str(stream_path), '--targets', 'tracker',
+         '--db-latency-ms', '0', '--output', str(output_path)],
+        env={**os.environ, 'DATABASE_URL': os.environ.get('DATABASE_URL', 'postgresql://replay@localhost/replay')},
+        capture_output=True, check=True, timeout=120
+    )
+    results = json.loads(output_path.read_text())
+    assert results['stream']['updates'] == 200
+    tracker = results['targets']['tracker']
+    assert tracker['handler_latency']['p50_ms'] <= tracker['handler_latency']['p99_ms'] <= tracker['handler_latency']['max_ms']
+    assert 0 < tracker['db_round_trips'] < len(updates)
+    print("✅ Voice replay harness verified")
+
+def test_event_stream_sequencing():
+    """Test live stream sequence numbers, resume from the backlog, snapshots and resync."""
+    import asyncio
+    import json
+    from datetime import datetime
+    import modules.mining.live_stream as live_stream
+    from modules.mining.live_stream import EventStream, LiveStreamHub
+    from modules.mining.roster import LiveRoster
+    
+    async def drain(subscription):
+        messages = []
+        while not subscription.queue.empty():
+            messages.append(await subscription.next(timeout=1))
+        return messages
+    
+    async def exercise():
+        roster = LiveRoster('sm-a', [101])
+        stream = EventStream('sm-a', roster, backlog_size=3)
+        live = stream.subscribe()
+        for user_id in (1, 2, 3, 4):
+            entry = roster.join(user_id, f'm{user_id}', f'M{user_id}', 101, 'vc', datetime(2026, 1, 4, 20, 0), False)
+            stream.publish('join', {**entry.to_dict(), 'at': entry.joined_at})
+        
+        # Live subscribers get a snapshot, then every delta in order
+        messages = await drain(live)
+        assert [(m.seq, m.type) for m in messages] == [(0, 'snapshot'), (1, 'join'), (2, 'join'), (3, 'join'), (4, 'join')]
+        assert json.loads(messages[4].data)['user_id'] == 4 and json.loads(messages[4].data)['seq'] == 4
+        
+        # Resume while the deltas after `since` are still in the backlog (seqs 2-4)
+        assert [m.seq for m in await drain(stream.subscribe(since=1))] == [2, 3, 4]
+        assert await drain(stream.subscribe(since=4)) == []
+        # Too old or from a newer stream: start over from a snapshot
+        for since in (0, 9):
+            snapshot = (await drain(stream.subscribe(since=since)))[0]
+            assert snapshot.type == 'snapshot' and json.loads(snapshot.data)['total_active'] == 4
+        
+        # A subscriber that falls behind is resynced with one snapshot
+        with patch.object(live_stream, 'SUBSCRIBER_QUEUE_SIZE', 2):
+            slow = stream.subscribe(since=4)
+        for _ in range(3):
+            stream.publish('leave', {'user_id': 1, 'channel_id': 101, 'at': datetime(2026, 1, 4, 21, 0)})
+        assert slow.resyncs == 1
+        # The snapshot is taken at the overflowing delta's sequence number
+        assert [(m.seq, m.type) for m in await drain(slow)] == [(7, 'snapshot')]
+        
+        # Closing ends iteration after the queued messages
+        stream.close()
+        assert [m.seq for m in [message async for message in slow]] == []
+        assert [m.type for m in [message async for message in stream.subscribe()]] == ['snapshot']
+        
+        # A restarted event gets a new stream for its new roster
+        hub = LiveStreamHub()
+        first = hub.open('sm-b', roster)
+        assert hub.open('sm-b', roster) is first
+        second = hub.open('sm-b', LiveRoster('sm-b', [201]))
+        assert second is not first and first.closed
+    
+    asyncio.run(exercise())
+    print("✅ Live stream sequencing verified")
+
+def test_live_roster_versioning():
+    """Test roster versions, minute accrual and reconcile against Discord's channel members."""
+    import asyncio
+    import discord
+    from datetime import datetime, timedelta
+    from modules.mining.live_stream import get_live_streams
+    from modules.mining.participation import VoiceTracker
+    from modules.mining.roster import LiveRoster
+    
+    start = datetime(2026, 1, 4, 20, 0)
+    roster = LiveRoster('sm-a', [101, 102])
+    roster.started_at = start
+    assert roster.join(1, 'm1', 'M1', 101, 'vc-101', start, True) is not None
+    assert roster.join(2, 'm2', 'M2', 102, 'vc-102', start + timedelta(minutes=10)) is not None
+    assert roster.join(1, 'm1', 'M1', 102, 'vc-102', start) is None  # already active: no change
+    assert roster.version == 2 and roster.channel_counts() == {101: 1, 102: 1}
+    
+    assert roster.leave(1, start + timedelta(minutes=30)).channel_id == 101
+    assert roster.leave(1, start + timedelta(minutes=40)) is None
+    assert roster.version == 3 and roster.channel_counts() == {102: 1}
+    assert roster.total_minutes(start + timedelta(minutes=40)) == 60.0
+    assert [p['user_id'] for p in roster.participants()] == [2]
+    
+    summary = roster.summary(start + timedelta(minutes=40))
+    assert summary == {
+        'event_id': 'sm-a', 'total_participants': 2, 'org_participants': 1, 'active_participants': 1,
+        'peak_concurrent': 2, 'total_minutes': 60, 'tracked_minutes': 40, 'channels': {102: 1}, 'version': 3,
+    }
+    
+    # Members in unchecked channels are left alone; moves and missing members are reported
+    roster.join(3, 'm3', 'M3', 101, 'vc-101', start)
+    assert roster.diff({2: 101, 4: 102}, {101}) == ([4], [3], [2])
+    
+    def voice_member(user_id):
+        member = Mock(id=user_id, display_name=f'M{user_id}', bot=False)
+        member.name = f'm{user_id}'
+        return member
+    
+    channels = {}
+    for channel_id, user_ids in ((101, [2]), (102, [4])):
+        channel = Mock(spec=discord.VoiceChannel, id=channel_id, members=[voice_member(u) for u in user_ids])
+        channel.name = f'vc-{channel_id}'
+        channels[channel_id] = channel
+    tracker = VoiceTracker(Mock(get_channel=channels.get))
+    tracker.journal = Mock()
+    tracker._check_org_member_status = AsyncMock(return_value=False)
+    
+    async def exercise():
+        tracker._register_event('sm-a', {'vc-101': '101', 'vc-102': '102'})
+        roster = tracker.get_roster('sm-a')
+        roster.join(2, 'm2', 'M2', 102, 'vc-102', start)
+        roster.join(3, 'm3', 'M3', 101, 'vc-101', start)
+        version = roster.version
+        result = await tracker.reconcile('sm-a')
+        return roster, version, result
+    
+    try:
+        roster, version, result = asyncio.run(exercise())
+        assert result == {'joined': 1, 'left': 1, 'moved': 1}
+        assert {p['user_id']: p['channel_id'] for p in roster.participants()} == {2: 101, 4: 102}
+        assert roster.version == version + 4
+        assert [m.type for m in get_live_streams().get('sm-a').backlog] == ['leave', 'switch', 'join']
+    finally:
+        get_live_streams().close('sm-a')
+    print("✅ Live roster versioning and reconcile verified")
+
+def test_batch_tracking_endpoint():
+    """Test the batch endpoint stops first, resolves channels once per guild and reports per event."""
+    import asyncio
+    from fastapi import HTTPException
+    from pydantic import ValidationError
+    import api.server as server
+    
+    routes = {route.path: route.endpoint for route in server.BotAPI().app.routes if hasattr(route, 'endpoint')}
+    batch = routes['/events/tracking/batch']
+    calls = []
+    
+    async def stop_tracking_batch(event_ids):
+        calls.append(('stop', list(event_ids)))
+        return {event_id: {'event_id': event_id, 'total_participants': 3} for event_id in event_ids}
+    
+    async def start_tracking_batch(events):
+        calls.append(('start', events))
+        return {event_id: {'success': True} for event_id in events}
+    
+    tracker = Mock(stop_tracking_batch=AsyncMock(side_effect=stop_tracking_batch),
+                   start_tracking_batch=AsyncMock(side_effect=start_tracking_batch))
+    guild_channels = {1: {'Dispatch': '101'}, 2: {}}
+    lookup = Mock(side_effect=lambda guild_id: guild_channels[guild_id])
+    request = server.BatchTrackingRequest(
+        stop=['sm-old'],
+        start=[
+            {'event_id': 'sm-a', 'guild_id': 1},
+            {'event_id': 'sm-b', 'guild_id': 1},
+            {'event_id': 'sm-c', 'channels': {'Override': '301'}},
+            {'event_id': 'sm-d', 'guild_id': 2},
+        ]
+    )
+    
+    async def exercise():
+        with patch.object(server, 'voice_tracker', tracker), \
+             patch.object(server, 'get_sunday_mining_channels', lookup):
+            result = await batch(request)
+        with patch.object(server, 'voice_tracker', None):
+            try:
+                await batch(request)
+                unavailable = None
+            except HTTPException as e:
+                unavailable = e.status_code
+        return result, unavailable
+    
+    result, unavailable = asyncio.run(exercise())
+    assert calls == [
+        ('stop', ['sm-old']),
+        ('start', {'sm-a': {'Dispatch': '101'}, 'sm-b': {'Dispatch': '101'}, 'sm-c': {'Override': '301'}}),
+    ]
+    assert [call.args for call in lookup.call_args_list] == [(1,), (2,)]
+    assert result['success'] is False
+    assert result['started']['sm-d'] == {'success': False, 'error': 'No channels configured for tracking'}
+    assert all(result['started'][event_id]['success'] for event_id in ('sm-a', 'sm-b', 'sm-c'))
+    assert result['stopped']['sm-old']['total_participants'] == 3
+    assert unavailable == 503
+    
+    with pytest.raises(ValidationError):
+        server.BatchTrackingRequest(stop=[f'sm-{i}' for i in range(51)])
+    print("✅ Batch tracking endpoint verified")
+
+def test_seed_existing_members_bulk():
+    """Test members already in voice are seeded for a batch of events with one INSERT."""
+    import asyncio
+    import discord
+    from contextlib import asynccontextmanager
+    from modules.mining import journal as journal_module
+    from modules.mining.live_stream import get_live_streams
+    from modules.mining.participation import VoiceTracker
+    
+    executed = []
+    
+    class RecordingCursor:
+        async def execute(self, query, params=None):
+            executed.append((query, params))
+    
+    @asynccontextmanager
+    async def fake_cursor(commit=True):
+        yield RecordingCursor()
+    
+    def voice_member(user_id, bot=False):
+        member = Mock(id=user_id, display_name=f'M{user_id}', bot=bot)
+        member.name = f'm{user_id}'
+        return member
+    
+    channels = {}
+    for channel_id, members in ((101, [voice_member(1), voice_member(99, bot=True)]),
+                                (102, [voice_member(2)]), (201, [voice_member(3)])):
+        channel = Mock(spec=discord.VoiceChannel, id=channel_id, members=members)
+        channel.name = f'vc-{channel_id}'
+        channels[channel_id] = channel
+    
+    tracker = VoiceTracker(Mock(get_channel=channels.get))
+    tracker.journal = journal_module.ParticipationJournal(spill_path=None, dead_letter_path=None)
+    tracker._org_member_check = Mock(return_value=lambda member: member.id == 1)
+    
+    async def exercise():
+        with patch.object(journal_module, 'get_async_cursor', fake_cursor):
+            try:
+                # Channel 102 is in both events; the later one claims it
+                return await tracker.start_tracking_batch({
+                    'sm-a': {'vc-101': '101', 'vc-102': '102'},
+                    'sm-b': {'vc-102': '102', 'vc-201': '201'},
+                })
+            finally:
+                await tracker.shutdown()
+    
+    try:
+        results = asyncio.run(exercise())
+        assert results == {'sm-a': {'success': True}, 'sm-b': {'success': True}}
+        assert tracker._org_member_check.call_count == 1
+        assert len(executed) == 1 and executed[0][0] is journal_module.INSERT_PARTICIPATION_BATCH
+        event_ids, user_ids = executed[0][1][0], executed[0][1][1]
+        org_flags = executed[0][1][-1]
+        assert sorted(zip(event_ids, user_ids, org_flags)) == [('sm-a', 1, True), ('sm-b', 2, False), ('sm-b', 3, False)]
+        assert sorted(p['user_id'] for p in tracker.get_roster('sm-b').participants()) == [2, 3]
+        assert [m.type for m in get_live_streams().get('sm-a').backlog] == ['join']
+    finally:
+        get_live_streams().close('sm-a')
+        get_live_streams().close('sm-b')
+    print("✅ Bulk seeding of members already in voice verified")